@@ -0,0 +1,7 @@
+"""
+Benchmarks for the Vehicle Rental System.
+
+Run the Shop benchmark suite with:
+
+    python -m benchmarks.bench_shop --scales 10000 100000 1000000 --output results.json
+"""
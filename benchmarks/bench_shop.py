@@ -0,0 +1,186 @@
+"""
+Shop benchmark suite.
+
+For each scale (number of rental rows) a deterministic dataset is
+generated and written to a scratch data_dir, then the main Shop
+operations are timed one call at a time. Results are written as JSON so
+runs can be compared; pass --baseline to report operations that got
+slower than a previous run.
+
+    python -m benchmarks.bench_shop --scales 10000 100000 1000000 --output results.json
+    python -m benchmarks.bench_shop --scales 10000 --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import data_generator
+from models.shop import Shop
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+# ITV and maintenance scans are timed as of days from a fixed one so results do not drift;
+# each call asks about a different day so a cached answer is never what gets timed
+AS_OF = date(2024, 6, 1)
+
+
+def summarize(durations):
+    """Per-call statistics of a list of durations in seconds, in microseconds."""
+    ordered = sorted(durations)
+    count = len(ordered)
+    return {
+        'calls': count,
+        'total_s': round(sum(ordered), 6),
+        'mean_us': round(sum(ordered) / count * 1e6, 3),
+        'min_us': round(ordered[0] * 1e6, 3),
+        'p50_us': round(ordered[count // 2] * 1e6, 3),
+        'p95_us': round(ordered[min(count - 1, int(count * 0.95))] * 1e6, 3),
+        'max_us': round(ordered[-1] * 1e6, 3),
+    }
+
+
+def timed(fn, calls):
+    """Call fn(i) for i in range(calls), timing each call."""
+    durations = []
+    for i in range(calls):
+        started = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def bench_scale(rows, ops=1000, repeat=5, vehicle_ratio=0.1, client_ratio=0.1, seed=0, data_dir=None):
+    """
+    Benchmark one scale.
+
+    Args:
+        rows (int): Number of rentals; vehicles and clients scale with it
+        ops (int): Calls timed for per-rental operations
+        repeat (int): Calls timed for fleet-wide queries, loads and saves
+        vehicle_ratio (float): Vehicles per rental row
+        client_ratio (float): Clients per rental row
+        seed (int): Random seed of the dataset and of the operations
+        data_dir (str): Scratch directory, defaults to a temporary one
+
+    Returns:
+        dict: {'rows': rows, 'entities': counts, 'operations': {name: statistics}}
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = data_dir or scratch
+        dataset = data_generator.generate(vehicles=max(1, int(rows * vehicle_ratio)),
+                                          clients=max(1, int(rows * client_ratio)),
+                                          rentals=rows, admins=max(1, rows // 10_000), seed=seed)
+        entities = dataset.counts()
+        data_generator.write(dataset, data_dir)
+        del dataset
+
+        operations = {}
+        shop = Shop("Benchmark Shop", data_dir=data_dir)
+        operations['load_data'] = summarize(timed(lambda i: shop.load_data(), repeat))
+
+        rng = random.Random(seed)
+        free = [vehicle.vehicle_id for vehicle in shop.get_available_vehicles()]
+        idle = [client.user_id for client in shop.clients if not client.active_rental_count]
+        calls = min(ops, len(free), len(idle))
+        vehicle_ids, client_ids = rng.sample(free, calls), rng.sample(idle, calls)
+        rentals = []
+
+        def create(i):
+            rentals.append(shop.create_rental(vehicle_ids[i], client_ids[i], start_date="2024-06-01"))
+
+        if calls:
+            operations['create_rental'] = summarize(timed(create, calls))
+            operations['end_rental'] = summarize(timed(lambda i: shop.end_rental(rentals[i].rental_id, rentals[i].initial_mileage + 1000), calls))
+
+        client_sample = [f"C{rng.randrange(entities['clients'])}" for _ in range(ops)]
+        operations['get_client_rentals'] = summarize(
+            timed(lambda i: shop.get_client_rentals(client_sample[i]), ops))
+        operations['get_available_vehicles'] = summarize(timed(lambda i: shop.get_available_vehicles(), repeat))
+        operations['get_vehicles_needing_itv'] = summarize(
+            timed(lambda i: shop.get_vehicles_needing_itv(30, as_of=AS_OF + timedelta(days=i)), repeat))
+        operations['get_vehicles_needing_maintenance'] = summarize(
+            timed(lambda i: shop.get_vehicles_needing_maintenance(30, as_of=AS_OF + timedelta(days=i)), repeat))
+        operations['save_data'] = summarize(timed(lambda i: shop.save_data(force=True), repeat))
+        shop.close()
+    return {'rows': rows, 'entities': entities, 'operations': operations}
+
+
+def run(scales=DEFAULT_SCALES, **options):
+    """Benchmark every scale and return the JSON-ready report."""
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'seed': options.get('seed', 0),
+        },
+        'results': [bench_scale(rows, **options) for rows in scales],
+    }
+
+
+def compare(baseline, current, tolerance=0.2, statistic='p50_us'):
+    """
+    Find the operations that got slower than in a baseline report.
+
+    Args:
+        baseline (dict): Report of an earlier run
+        current (dict): Report of this run
+        tolerance (float): Allowed relative slowdown
+        statistic (str): Statistic compared
+
+    Returns:
+        list: (rows, operation, before, after) for each slower operation
+    """
+    before = {(result['rows'], name): stats[statistic]
+              for result in baseline['results'] for name, stats in result['operations'].items()}
+    regressions = []
+    for result in current['results']:
+        for name, stats in result['operations'].items():
+            previous = before.get((result['rows'], name))
+            if previous and stats[statistic] > previous * (1 + tolerance):
+                regressions.append((result['rows'], name, previous, stats[statistic]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Shop operations at several scales.")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="Numbers of rental rows to benchmark")
+    parser.add_argument('--ops', type=int, default=1000, help="Calls timed for per-rental operations")
+    parser.add_argument('--repeat', type=int, default=5, help="Calls timed for fleet-wide operations")
+    parser.add_argument('--vehicle-ratio', type=float, default=0.1, help="Vehicles per rental row")
+    parser.add_argument('--client-ratio', type=float, default=0.1, help="Clients per rental row")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--baseline', help="JSON report of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, ops=args.ops, repeat=args.repeat, vehicle_ratio=args.vehicle_ratio,
+                 client_ratio=args.client_ratio, seed=args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for rows, name, before, after in regressions:
+            print(f"{name} at {rows} rows: p50 {before:.1f} us -> {after:.1f} us", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
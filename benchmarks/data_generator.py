@@ -0,0 +1,117 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+The same counts and seed always produce the same vehicles, users and
+rentals, so timings from different runs compare like for like. Rentals
+are consistent with the shop's rules: a vehicle has at most one open
+rental and a client at most Client.MAX_ACTIVE_RENTALS.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.admin import Admin
+from models.rental import Rental
+from models.csv_repository import CsvRepository
+from models.passwords import hash_password
+
+BRANDS = {
+    Car: ["Toyota", "Seat", "BMW", "Renault", "Volkswagen"],
+    Motorbike: ["Honda", "Yamaha", "BMW", "Ducati"],
+    Truck: ["Volvo", "MAN", "Scania", "Iveco"],
+}
+FIRST_DAY = datetime(2020, 1, 1)
+HISTORY_DAYS = 4 * 365
+# Every generated user shares one hash, so generation does not run PBKDF2 per user
+PASSWORD = "secret"
+
+
+class Dataset:
+    """Generated vehicles, users (clients then admins) and rentals."""
+
+    __slots__ = ('vehicles', 'users', 'rentals')
+
+    def __init__(self, vehicles, users, rentals):
+        self.vehicles = vehicles
+        self.users = users
+        self.rentals = rentals
+
+    @property
+    def clients(self):
+        return [user for user in self.users if isinstance(user, Client)]
+
+    def counts(self):
+        """Number of generated entities of each kind."""
+        clients = len(self.clients)
+        return {'vehicles': len(self.vehicles), 'clients': clients, 'admins': len(self.users) - clients,
+                'rentals': len(self.rentals), 'active_rentals': sum(r.is_active() for r in self.rentals)}
+
+
+def generate(vehicles, clients, rentals, admins=1, active_ratio=0.1, seed=0):
+    """
+    Generate a dataset.
+
+    Args:
+        vehicles (int): Number of vehicles (cars, motorbikes and trucks, about 6:3:1)
+        clients (int): Number of clients
+        rentals (int): Number of rentals, open and closed
+        admins (int): Number of admins
+        active_ratio (float): Share of the vehicles out on an open rental
+        seed (int): Random seed
+
+    Returns:
+        Dataset: The generated entities, ids being V<n>, C<n>, A<n> and R<n>
+    """
+    if vehicles <= 0 or clients <= 0:
+        raise ValueError("Vehicle and client counts must be positive")
+    rng = random.Random(seed)
+    password = hash_password(PASSWORD, salt=b'benchmark-salt!!')
+
+    fleet = []
+    for i in range(vehicles):
+        vehicle_class = rng.choices((Car, Motorbike, Truck), weights=(6, 3, 1))[0]
+        if vehicle_class is Car:
+            extra = rng.choice((3, 5))
+        elif vehicle_class is Motorbike:
+            extra = rng.choice((125, 600, 1000))
+        else:
+            extra = rng.randint(5, 40)
+        year = rng.randint(2005, 2024)
+        vehicle = vehicle_class(f"V{i}", rng.choice(BRANDS[vehicle_class]), "Model", year,
+                                float(rng.randint(20, 200)), extra)
+        vehicle.matriculation_date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        vehicle.mileage = rng.randrange(300_000)
+        fleet.append(vehicle)
+
+    users = [Client(f"Client {i}", "1990-01-15", f"C{i}", password) for i in range(clients)]
+    users.extend(Admin(f"Admin {i}", "1980-05-30", f"A{i}", password) for i in range(admins))
+
+    # Open rentals go to distinct vehicles, round-robin over clients to respect the limit
+    active = min(int(vehicles * active_ratio), rentals, clients * Client.MAX_ACTIVE_RENTALS)
+    rented = rng.sample(range(vehicles), active)
+    history = []
+    for i in range(rentals - active):
+        start = FIRST_DAY + timedelta(days=rng.randrange(HISTORY_DAYS))
+        rental = Rental(f"R{i}", f"C{rng.randrange(clients)}", f"V{rng.randrange(vehicles)}", start,
+                        start + timedelta(days=rng.randint(1, 21)))
+        rental.return_date = rental.end_date
+        rental.final_mileage = rng.randrange(300_000)
+        history.append(rental)
+    last_day = FIRST_DAY + timedelta(days=HISTORY_DAYS)
+    for j, vehicle_index in enumerate(rented):
+        start = last_day - timedelta(days=rng.randint(0, 21))
+        history.append(Rental(f"R{rentals - active + j}", f"C{j % clients}", f"V{vehicle_index}", start))
+    return Dataset(fleet, users, history)
+
+
+def write(dataset, data_dir):
+    """Write a dataset as the CSV files a Shop loads from data_dir."""
+    os.makedirs(data_dir, exist_ok=True)
+    repository = CsvRepository(data_dir)
+    repository.save(dataset.vehicles, dataset.users, dataset.rentals, {'vehicles', 'users', 'rentals'})
+    repository.save_reservations([])
+    repository.close()
@@ -0,0 +1,240 @@
+"""
+Concurrent load test of a Shop under a mixed rent/return/browse workload.
+
+A deterministic dataset is written to a scratch data_dir and loaded into
+one Shop, then worker threads run a weighted mix of operations against it
+at the same time. Each worker owns a disjoint slice of the clients and
+draws its operations from its own seeded generator: a single-worker run
+is reproducible exactly, and runs with more workers differ only by how
+the workers interleave. The report gives the throughput and a latency
+histogram with p50/p95/p99 per operation, as JSON.
+
+    python -m benchmarks.load_test --workers 8 --ops 20000 --mix rent=2 return=2 browse=5 history=1
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import data_generator
+from models.shop import Shop
+
+OPERATIONS = ('rent', 'return', 'browse', 'available', 'history', 'fleet_stats')
+DEFAULT_MIX = {'rent': 2, 'return': 2, 'browse': 4, 'available': 1, 'history': 1}
+# Upper bounds of the latency histogram buckets, in microseconds; the last bucket is open
+BUCKETS_US = (10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000,
+              500_000, 1_000_000)
+VEHICLE_TYPES = ('Car', 'Motorbike', 'Truck')
+
+
+def parse_mix(items):
+    """Parse ['rent=2', 'browse=5'] into {'rent': 2.0, 'browse': 5.0}."""
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Operation must be one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The operation mix needs a positive weight")
+    return mix
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def histogram(latencies_us):
+    """Count latencies per bucket of BUCKETS_US, plus an open last bucket."""
+    counts = [0] * (len(BUCKETS_US) + 1)
+    for latency in latencies_us:
+        for i, bound in enumerate(BUCKETS_US):
+            if latency <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}us" for bound in BUCKETS_US] + [f">{BUCKETS_US[-1]}us"]
+    return {label: count for label, count in zip(labels, counts) if count}
+
+
+class Worker(threading.Thread):
+    """Runs its share of the operations against the shop and records their latencies."""
+
+    def __init__(self, shop, index, client_ids, vehicle_ids, mix, ops, seed, barrier):
+        super().__init__(name=f"load-worker-{index}", daemon=True)
+        self.shop = shop
+        self.client_ids = client_ids
+        self.vehicle_ids = vehicle_ids
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.ops = ops
+        self.rng = random.Random(f"{seed}:{index}")
+        self.barrier = barrier
+        self.open_rentals = []
+        self.latencies = {name: [] for name in OPERATIONS}
+        self.rejected = {name: 0 for name in OPERATIONS}
+        self.errors = []
+
+    def run(self):
+        self.barrier.wait()
+        for _ in range(self.ops):
+            name = self.rng.choices(self.names, self.weights)[0]
+            if name == 'return' and not self.open_rentals:
+                name = 'rent'
+            call = getattr(self, f"_{name}")
+            started = time.perf_counter()
+            try:
+                ok = call()
+            except Exception as e:
+                self.errors.append(f"{name}: {e!r}")
+                ok = False
+            self.latencies[name].append((time.perf_counter() - started) * 1e6)
+            if not ok:
+                self.rejected[name] += 1
+
+    def _rent(self):
+        rental = self.shop.create_rental(self.rng.choice(self.vehicle_ids), self.rng.choice(self.client_ids))
+        if rental is None:
+            return False
+        self.open_rentals.append(rental)
+        return True
+
+    def _return(self):
+        rental = self.open_rentals.pop(self.rng.randrange(len(self.open_rentals)))
+        return self.shop.end_rental(rental.rental_id, rental.initial_mileage + self.rng.randrange(2_000))
+
+    def _browse(self):
+        low = self.rng.randint(20, 150)
+        self.shop.search_vehicles(vehicle_type=self.rng.choice(VEHICLE_TYPES), min_rate=low, max_rate=low + 50,
+                                  available=True, limit=20)
+        return True
+
+    def _available(self):
+        self.shop.get_available_vehicles()
+        return True
+
+    def _history(self):
+        self.shop.get_client_rentals(self.rng.choice(self.client_ids))
+        return True
+
+    def _fleet_stats(self):
+        self.shop.fleet_stats(by_vehicle=False)
+        return True
+
+
+def run(workers=4, ops=10_000, mix=None, vehicles=2_000, clients=2_000, rentals=20_000, seed=0, journal=False,
+        data_dir=None):
+    """
+    Run a load test.
+
+    Args:
+        workers (int): Worker threads
+        ops (int): Operations in total, split evenly between workers
+        mix (dict): Operation name -> weight, see OPERATIONS
+        vehicles, clients, rentals (int): Size of the generated dataset
+        seed (int): Seed of the dataset and of every worker's operations
+        journal (bool): Journal every mutation, as a durable deployment would
+        data_dir (str): Scratch directory, defaults to a temporary one
+
+    Returns:
+        dict: JSON-ready report with the throughput and, per operation,
+            the count, rejected calls, percentiles and histogram
+    """
+    mix = dict(mix or DEFAULT_MIX)
+    if workers <= 0 or ops <= 0:
+        raise ValueError("Workers and operations must be positive")
+    with tempfile.TemporaryDirectory() as scratch:
+        data_dir = data_dir or scratch
+        dataset = data_generator.generate(vehicles=vehicles, clients=clients, rentals=rentals, seed=seed)
+        data_generator.write(dataset, data_dir)
+        vehicle_ids = [vehicle.vehicle_id for vehicle in dataset.vehicles]
+        client_ids = [client.user_id for client in dataset.clients]
+        del dataset
+
+        shop = Shop("Load Test Shop", data_dir=data_dir, journal=journal)
+        barrier = threading.Barrier(workers + 1)
+        pool = [Worker(shop, i, client_ids[i::workers] or client_ids, vehicle_ids, mix,
+                       ops // workers + (i < ops % workers), seed, barrier)
+                for i in range(workers)]
+        for worker in pool:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for worker in pool:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        shop.close()
+
+    operations = {}
+    for name in OPERATIONS:
+        latencies = sorted(latency for worker in pool for latency in worker.latencies[name])
+        if not latencies:
+            continue
+        operations[name] = {
+            'count': len(latencies),
+            'rejected': sum(worker.rejected[name] for worker in pool),
+            'throughput_per_s': round(len(latencies) / elapsed, 1),
+            'mean_us': round(sum(latencies) / len(latencies), 1),
+            'p50_us': round(percentile(latencies, 0.50), 1),
+            'p95_us': round(percentile(latencies, 0.95), 1),
+            'p99_us': round(percentile(latencies, 0.99), 1),
+            'max_us': round(latencies[-1], 1),
+            'histogram': histogram(latencies),
+        }
+    total = sum(stats['count'] for stats in operations.values())
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'workers': workers,
+            'mix': mix,
+            'journal': journal,
+            'dataset': {'vehicles': vehicles, 'clients': clients, 'rentals': rentals},
+        },
+        'elapsed_s': round(elapsed, 3),
+        'operations_total': total,
+        'throughput_per_s': round(total / elapsed, 1),
+        'errors': [error for worker in pool for error in worker.errors],
+        'operations': operations,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a concurrent mixed workload against a Shop.")
+    parser.add_argument('--workers', type=int, default=4, help="Worker threads")
+    parser.add_argument('--ops', type=int, default=10_000, help="Operations in total")
+    parser.add_argument('--mix', nargs='+', metavar='OP=WEIGHT',
+                        help=f"Operation weights, operations being {', '.join(OPERATIONS)}")
+    parser.add_argument('--vehicles', type=int, default=2_000)
+    parser.add_argument('--clients', type=int, default=2_000)
+    parser.add_argument('--rentals', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--journal', action='store_true', help="Journal mutations to disk")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(workers=args.workers, ops=args.ops, mix=parse_mix(args.mix) if args.mix else None,
+                 vehicles=args.vehicles, clients=args.clients, rentals=args.rentals, seed=args.seed,
+                 journal=args.journal)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,8 @@ import sys
 # Add the project root directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import csv
-from datetime import datetime
-from models import User, Client, Admin, Vehicle, Car, Motorbike, Truck, Rental, Shop
+import getpass
+from models import Admin, Client, Car, Motorbike, Truck, Shop
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -42,129 +41,90 @@ def print_admin_menu():
     print("6. Logout")
     return input("Enter your choice (1-6): ")
 
-def load_users():
-    users = []
-    try:
-        with open('data/users.csv', 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row['role'] == 'admin':
-                    users.append(Admin(row['username'], row['password']))
-                else:
-                    users.append(Client(row['username'], row['password']))
-    except FileNotFoundError:
-        pass
-    return users
-
-def save_users(users):
-    os.makedirs('data', exist_ok=True)
-    with open('data/users.csv', 'w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=['username', 'password', 'role'])
-        writer.writeheader()
-        for user in users:
-            writer.writerow({
-                'username': user.username,
-                'password': user.password,
-                'role': 'admin' if isinstance(user, Admin) else 'client'
-            })
-
-def load_rentals():
-    rentals = []
-    try:
-        with open('data/rentals.csv', 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                rental = Rental(
-                    row['rental_id'],
-                    row['client_username'],
-                    row['vehicle_id'],
-                    datetime.strptime(row['start_date'], '%Y-%m-%d'),
-                    datetime.strptime(row['end_date'], '%Y-%m-%d') if row['end_date'] else None
-                )
-                rentals.append(rental)
-    except FileNotFoundError:
-        pass
-    return rentals
-
-def save_rentals(rentals):
-    os.makedirs('data', exist_ok=True)
-    with open('data/rentals.csv', 'w', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=['rental_id', 'client_username', 'vehicle_id', 'start_date', 'end_date'])
-        writer.writeheader()
-        for rental in rentals:
-            writer.writerow({
-                'rental_id': rental.rental_id,
-                'client_username': rental.client_username,
-                'vehicle_id': rental.vehicle_id,
-                'start_date': rental.start_date.strftime('%Y-%m-%d'),
-                'end_date': rental.end_date.strftime('%Y-%m-%d') if rental.end_date else ''
-            })
-
-def register(users):
+def register(shop):
     print("\nREGISTRATION")
-    username = input("Enter username: ")
-    if any(user.username == username for user in users):
-        print("Username already exists!")
+    user_id = input("Enter client ID (starting with 'C'): ")
+    if shop.get_client_by_id(user_id) or shop.get_admin_by_id(user_id):
+        print("User ID already exists!")
         return None
     
-    password = input("Enter password: ")
-    confirm_password = input("Confirm password: ")
+    name = input("Enter name: ")
+    birth_date = input("Enter birth date (YYYY-MM-DD): ")
+    password = getpass.getpass("Enter password: ")
+    confirm_password = getpass.getpass("Confirm password: ")
     
     if password != confirm_password:
         print("Passwords do not match!")
         return None
     
-    role = input("Enter role (client/admin): ").lower()
-    if role not in ['client', 'admin']:
-        print("Invalid role!")
+    try:
+        # Shop.add_client stores a salted hash of the password
+        if not shop.add_client(Client(name, birth_date, user_id, password)):
+            print("User ID already exists!")
+            return None
+    except ValueError as e:
+        print(f"Error: {e}")
         return None
     
-    if role == 'admin':
-        user = Admin(username, password)
-    else:
-        user = Client(username, password)
-    
-    users.append(user)
-    save_users(users)
     print("Registration successful!")
-    return user
+    return login(shop, user_id, password)
 
-def login(users):
-    print("\nLOGIN")
-    username = input("Enter username: ")
-    password = input("Enter password: ")
-    
-    for user in users:
-        if user.username == username and user.password == password:
-            print(f"Welcome, {username}!")
-            return user
+def login(shop, user_id=None, password=None):
+    if user_id is None:
+        print("\nLOGIN")
+        user_id = input("Enter user ID: ")
+        password = getpass.getpass("Enter password: ")
     
-    print("Invalid username or password!")
-    return None
+    token = shop.login(user_id, password)
+    if token is None:
+        print("Invalid user ID or password!")
+        return None
+    user = shop.session_user(token)
+    print(f"Welcome, {user.name}!")
+    return token
+
+def print_vehicles(vehicles):
+    if not vehicles:
+        print("No vehicles found.")
+    for vehicle in vehicles:
+        print(f"{vehicle.vehicle_id}: {vehicle}")
+
+def print_rentals(rentals):
+    if not rentals:
+        print("No rentals found.")
+    for rental in rentals:
+        status = "active" if rental.is_active() else f"returned {rental.end_date:%Y-%m-%d}"
+        print(f"{rental.rental_id}: {rental.vehicle_id} rented by {rental.client_username} "
+              f"from {rental.start_date:%Y-%m-%d} ({status})")
 
 def client_menu(client, shop):
     while True:
         choice = print_client_menu()
         
         if choice == '1':
-            shop.display_available_vehicles()
+            print_vehicles(shop.get_available_vehicles())
         elif choice == '2':
             vehicle_id = input("Enter vehicle ID to rent: ")
-            try:
-                rental = shop.rent_vehicle(vehicle_id, client.username)
-                if rental:
-                    print(f"Vehicle rented successfully! Rental ID: {rental.rental_id}")
-            except ValueError as e:
-                print(f"Error: {e}")
+            rental = shop.create_rental(vehicle_id, client.user_id)
+            if rental:
+                print(f"Vehicle rented successfully! Rental ID: {rental.rental_id}")
+            else:
+                print("The vehicle cannot be rented!")
         elif choice == '3':
             rental_id = input("Enter rental ID to return: ")
+            rental = shop.get_rental_by_id(rental_id)
+            if not rental or rental.client_username != client.user_id:
+                print("Unknown rental!")
+                continue
             try:
-                if shop.return_vehicle(rental_id):
+                if shop.end_rental(rental_id, int(input("Enter final mileage: "))):
                     print("Vehicle returned successfully!")
+                else:
+                    print("The rental is not active!")
             except ValueError as e:
                 print(f"Error: {e}")
         elif choice == '4':
-            shop.display_client_rentals(client.username)
+            print_rentals(shop.get_client_rentals(client.user_id))
         elif choice == '5':
             print("Logging out...")
             break
@@ -181,42 +141,41 @@ def admin_menu(admin, shop):
                 print("Invalid vehicle type!")
                 continue
             
-            vehicle_id = input("Enter vehicle ID: ")
-            brand = input("Enter brand: ")
-            model = input("Enter model: ")
-            year = int(input("Enter year: "))
-            daily_rate = float(input("Enter daily rate: "))
-            
             try:
+                vehicle_id = input("Enter vehicle ID: ")
+                brand = input("Enter brand: ")
+                model = input("Enter model: ")
+                year = int(input("Enter year: "))
+                daily_rate = float(input("Enter daily rate: "))
                 if vehicle_type == 'car':
-                    num_doors = int(input("Enter number of doors: "))
-                    shop.add_vehicle(Car(vehicle_id, brand, model, year, daily_rate, num_doors))
+                    vehicle = Car(vehicle_id, brand, model, year, daily_rate, int(input("Enter number of doors: ")))
                 elif vehicle_type == 'motorbike':
-                    engine_size = input("Enter engine size: ")
-                    shop.add_vehicle(Motorbike(vehicle_id, brand, model, year, daily_rate, engine_size))
+                    vehicle = Motorbike(vehicle_id, brand, model, year, daily_rate, int(input("Enter engine size: ")))
                 else:
-                    cargo_capacity = float(input("Enter cargo capacity: "))
-                    shop.add_vehicle(Truck(vehicle_id, brand, model, year, daily_rate, cargo_capacity))
-                print("Vehicle added successfully!")
+                    vehicle = Truck(vehicle_id, brand, model, year, daily_rate, float(input("Enter cargo capacity: ")))
+                if shop.add_vehicle(vehicle):
+                    print("Vehicle added successfully!")
+                else:
+                    print("Vehicle ID already exists!")
             except ValueError as e:
                 print(f"Error: {e}")
         
         elif choice == '2':
             vehicle_id = input("Enter vehicle ID to remove: ")
-            try:
-                if shop.remove_vehicle(vehicle_id):
-                    print("Vehicle removed successfully!")
-            except ValueError as e:
-                print(f"Error: {e}")
+            if shop.remove_vehicle(vehicle_id):
+                print("Vehicle removed successfully!")
+            else:
+                print("The vehicle is unknown, rented or reserved!")
         
         elif choice == '3':
-            shop.display_all_vehicles()
+            print_vehicles(shop.vehicles)
         
         elif choice == '4':
-            shop.display_all_rentals()
+            print_rentals(shop.rentals)
         
         elif choice == '5':
-            shop.display_all_users()
+            for user in shop.clients + shop.admins:
+                print(f"{user.user_id}: {user.name} ({type(user).__name__})")
         
         elif choice == '6':
             print("Logging out...")
@@ -226,38 +185,50 @@ def admin_menu(admin, shop):
             print("Invalid choice!")
 
 def main():
-    users = load_users()
-    rentals = load_rentals()
-    shop = Shop(rentals)
+    shop = Shop("Vehicle Rental Shop", journal=True)
     
-    while True:
-        clear_screen()
-        print_header()
-        choice = print_menu()
-        
-        if choice == '1':
-            user = login(users)
-            if user:
-                if isinstance(user, Admin):
-                    admin_menu(user, shop)
-                else:
-                    client_menu(user, shop)
-        
-        elif choice == '2':
-            user = register(users)
-            if user:
-                if isinstance(user, Admin):
-                    admin_menu(user, shop)
-                else:
-                    client_menu(user, shop)
-        
-        elif choice == '3':
-            print("Thank you for using the Vehicle Rental System!")
-            break
-        else:
-            print("Invalid choice!")
-        
-        input("\nPress Enter to continue...")
+    try:
+        while True:
+            clear_screen()
+            print_header()
+            choice = print_menu()
+            
+            if choice in ('1', '2'):
+                token = login(shop) if choice == '1' else register(shop)
+                user = shop.session_user(token) if token else None
+                if user:
+                    if isinstance(user, Admin):
+                        admin_menu(user, shop)
+                    else:
+                        client_menu(user, shop)
+                    shop.logout(token)
+            
+            elif choice == '3':
+                print("Thank you for using the Vehicle Rental System!")
+                break
+            else:
+                print("Invalid choice!")
+            
+            input("\nPress Enter to continue...")
+    finally:
+        shop.save_data()
+        shop.close()
+
+def serve(port=8765):
+    """Serve the shop to concurrent clients over JSON-over-TCP on localhost."""
+    import asyncio
+    from models import ShopService
+    shop = Shop("Vehicle Rental Shop", journal=True)
+    print(f"Serving on 127.0.0.1:{port}")
+    try:
+        asyncio.run(ShopService(shop, port=port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shop.close()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
+    else:
+        main() 
\ No newline at end of file
@@ -12,7 +12,12 @@ from .car import Car
 from .motorbike import Motorbike
 from .truck import Truck
 from .rental import Rental
+from .reservation import Reservation
 from .shop import Shop
+from .repository import Repository, HistoryRepository
+from .csv_repository import CsvRepository
+from .sqlite_repository import SqliteRepository
+from .service import ShopService
 
 __all__ = [
     'User',
@@ -23,5 +28,11 @@ __all__ = [
     'Motorbike',
     'Truck',
     'Rental',
-    'Shop'
+    'Reservation',
+    'Shop',
+    'Repository',
+    'HistoryRepository',
+    'CsvRepository',
+    'SqliteRepository',
+    'ShopService'
 ] 
\ No newline at end of file
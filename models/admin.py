@@ -3,7 +3,10 @@ from .user import User
 class Admin(User):
     """Admin user type that can manage the rental shop."""
     
+    __slots__ = ('role',)
+    
     VALID_ROLES = {'mechanic', 'rental_manager', 'administrator'}
+    is_admin = True
     
     def __init__(self, name, birth_date, user_id, password, role='administrator'):
         """
@@ -21,7 +24,6 @@ class Admin(User):
         super().__init__(name, birth_date, user_id, password)
         self._validate_role(role)
         self.role = role
-        self.is_admin = True
     
     def _validate_role(self, role):
         """Validate that the role is one of the valid roles."""
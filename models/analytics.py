@@ -0,0 +1,182 @@
+"""
+Rental history analytics computed with NumPy.
+
+RentalAnalytics turns a rental set into flat columns once: start and end
+day ordinals, the row of each rental's vehicle, and per-vehicle daily
+rate, type and brand codes. Reports are then vectorized group-bys
+(np.bincount) over those columns, so each one costs a few passes over the
+arrays whatever the number of groups.
+
+Durations are counted in calendar days, from the start day to the end
+day whatever the time of day, the same basis as FleetStats: a closed
+rental earns Vehicle.calculate_rental_cost(days). This matches
+Rental.calculate_duration() for rentals stored as plain dates, but a
+rental that carries times of day can last a day more here (18:00 on the
+1st to 09:00 on the 3rd is 2 days, not 1). Open rentals are counted and
+occupy their vehicle up to as_of, but earn nothing yet.
+"""
+
+from datetime import date, datetime
+from operator import attrgetter
+import numpy as np
+
+GROUP_KEYS = ('type', 'brand', 'client', 'vehicle', 'month')
+
+# date(1970, 1, 1).toordinal(): ordinals minus this are datetime64[D] values
+_EPOCH_ORDINAL = 719163
+
+_vehicle_id = attrgetter('vehicle_id')
+_start_date = attrgetter('start_date')
+_end_date = attrgetter('end_date')
+_client = attrgetter('client_username')
+
+
+def _factorize(keys):
+    """Map each key to a dense integer code, in order of first appearance."""
+    keys = list(keys)
+    codes = {key: code for code, key in enumerate(dict.fromkeys(keys))}
+    return list(codes), np.fromiter(map(codes.__getitem__, keys), dtype=np.int64, count=len(keys))
+
+
+def _ordinal(value):
+    """Accept a date, datetime or YYYY-MM-DD string."""
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d")
+    return value.toordinal()
+
+
+def _month_names(months):
+    """Format months counted from 1970-01 as 'YYYY-MM'."""
+    return [str(month) for month in months.astype('datetime64[M]')]
+
+
+class RentalAnalytics:
+    """Columnar view of a rental set with vectorized group-by reports."""
+
+    def __init__(self, rentals, vehicles, as_of=None):
+        """
+        Build the columns.
+
+        Rentals of vehicles that are not in vehicles are left out, since
+        their daily rate is unknown.
+
+        Args:
+            rentals (iterable): Rentals to analyse
+            vehicles (list): Vehicles the rentals refer to
+            as_of (date): Day open rentals are measured up to, defaults to today
+        """
+        self.as_of = _ordinal(as_of or date.today())
+        self.vehicle_ids = [vehicle.vehicle_id for vehicle in vehicles]
+        rows = {vehicle_id: i for i, vehicle_id in enumerate(self.vehicle_ids)}
+        self.daily_rates = np.fromiter((vehicle.daily_rate for vehicle in vehicles), dtype=np.float64,
+                                       count=len(vehicles))
+        self.type_names, self.vehicle_types = _factorize(vehicle.type for vehicle in vehicles)
+        self.brand_names, self.vehicle_brands = _factorize(vehicle.brand for vehicle in vehicles)
+
+        rentals = [rental for rental in rentals if rental.vehicle_id in rows]
+        count = len(rentals)
+        self.vehicle_rows = np.fromiter(map(rows.__getitem__, map(_vehicle_id, rentals)), dtype=np.int64, count=count)
+        self.starts = np.fromiter(map(datetime.toordinal, map(_start_date, rentals)), dtype=np.int64, count=count)
+        ends = np.fromiter((end.toordinal() if end else -1 for end in map(_end_date, rentals)),
+                           dtype=np.int64, count=count)
+        self.closed = ends >= 0
+        self.ends = np.where(self.closed, ends, self.as_of)
+        self.client_names, self.clients = _factorize(map(_client, rentals))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def report(self, group_by='type', start_date=None, end_date=None):
+        """
+        Compute rental count, revenue, average duration and utilization per group.
+
+        Counts, revenue and durations cover the rentals starting within the
+        period. Utilization is the share of the group's vehicle-days in the
+        period spent rented, counting every rental that overlaps it; a
+        client's share is measured against the whole fleet.
+
+        Args:
+            group_by (str): 'type', 'brand', 'client', 'vehicle' or 'month' (of the start date)
+            start_date (date or str): First day of the period, defaults to the first rental
+            end_date (date or str): Last day of the period, defaults to as_of
+
+        Returns:
+            dict: group -> {'rentals': int, 'revenue': float,
+                'average_duration': float or None (no closed rental),
+                'utilization': float}
+        """
+        if group_by not in GROUP_KEYS:
+            raise ValueError(f"Group key must be one of {', '.join(GROUP_KEYS)}")
+        first = _ordinal(start_date) if start_date else (int(self.starts.min()) if len(self) else self.as_of)
+        last = _ordinal(end_date) if end_date else self.as_of
+        if last < first:
+            raise ValueError("End date must not be before start date")
+        days = last - first + 1
+
+        if group_by == 'month':
+            # Months counted from 1970-01, offset so the period's first month is group 0
+            base = self._months(np.array([first]))[0]
+            codes = self._months(self.starts) - base
+            names = _month_names(np.arange(base, self._months(np.array([last]))[0] + 1))
+        else:
+            names, codes = self._groups(group_by)
+        groups = len(names)
+
+        selected = (self.starts >= first) & (self.starts <= last)
+        in_range = selected & (codes >= 0) & (codes < groups)
+        group_codes = codes[in_range]
+        durations = (self.ends - self.starts)[in_range]
+        closed = self.closed[in_range]
+        revenue = np.where(closed, durations * self.daily_rates[self.vehicle_rows[in_range]], 0.0)
+        rentals = np.bincount(group_codes, minlength=groups)
+        revenues = np.bincount(group_codes, weights=revenue, minlength=groups)
+        closed_counts = np.bincount(group_codes, weights=closed, minlength=groups)
+        duration_sums = np.bincount(group_codes, weights=np.where(closed, durations, 0), minlength=groups)
+
+        utilization = self._utilization(group_by, codes, groups, first, last + 1, days)
+
+        return {name: {
+            'rentals': int(rentals[i]),
+            'revenue': float(revenues[i]),
+            'average_duration': float(duration_sums[i] / closed_counts[i]) if closed_counts[i] else None,
+            'utilization': float(utilization[i])
+        } for i, name in enumerate(names)}
+
+    def _groups(self, group_by):
+        """Group names and the group code of every rental."""
+        if group_by == 'type':
+            return self.type_names, self.vehicle_types[self.vehicle_rows]
+        if group_by == 'brand':
+            return self.brand_names, self.vehicle_brands[self.vehicle_rows]
+        if group_by == 'vehicle':
+            return self.vehicle_ids, self.vehicle_rows
+        return self.client_names, self.clients
+
+    @staticmethod
+    def _months(ordinals):
+        return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+    def _utilization(self, group_by, codes, groups, lo, hi, days):
+        """Rented vehicle-days over available vehicle-days per group, within [lo, hi)."""
+        starts = np.clip(self.starts, lo, hi)
+        ends = np.clip(self.ends, lo, hi)
+        overlapping = ends > starts
+        fleet = len(self.vehicle_ids)
+
+        if group_by == 'month':
+            # Vehicles out on each day of the period, then summed per month
+            starts, ends = starts[overlapping] - lo, ends[overlapping] - lo
+            out = np.cumsum(np.bincount(starts, minlength=days + 1) - np.bincount(ends, minlength=days + 1))[:days]
+            day_months = self._months(np.arange(lo, hi)) - self._months(np.array([lo]))[0]
+            rented = np.bincount(day_months, weights=out, minlength=groups)
+            capacity = np.bincount(day_months, minlength=groups) * fleet
+        else:
+            rented = np.bincount(codes[overlapping], weights=(ends - starts)[overlapping], minlength=groups)
+            if group_by == 'client':
+                capacity = np.full(groups, fleet * days)
+            elif group_by == 'vehicle':
+                capacity = np.full(groups, days)
+            else:
+                vehicle_codes = self.vehicle_types if group_by == 'type' else self.vehicle_brands
+                capacity = np.bincount(vehicle_codes, minlength=groups) * days
+        return np.where(capacity > 0, rented / np.maximum(capacity, 1), 0.0)
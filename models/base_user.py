@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+from .interning import intern_key
 
 class BaseUser(ABC):
     """Base class for all user types."""
     
+    __slots__ = ('name', 'birth_date', 'user_id', '_rentals')
+    
     @abstractmethod
     def __init__(self, name, birth_date, user_id):
         """
@@ -15,8 +18,19 @@ class BaseUser(ABC):
         """
         self.name = name
         self.birth_date = birth_date
-        self.user_id = user_id
-        self.rentals = []
+        self.user_id = intern_key(user_id)
+        self._rentals = None
+    
+    @property
+    def rentals(self):
+        """Rentals attached to this user; the list is only created on first use."""
+        if self._rentals is None:
+            self._rentals = []
+        return self._rentals
+    
+    @rentals.setter
+    def rentals(self, rentals):
+        self._rentals = rentals
     
     @abstractmethod
     def update_info(self, name=None, birth_date=None, user_id=None):
@@ -3,6 +3,8 @@ from abc import ABC, abstractmethod
 class BaseVehicle(ABC):
     """Base class for all vehicle types."""
     
+    __slots__ = ()
+    
     @abstractmethod
     def __init__(self, vehicle_id, brand, model, year, daily_rate):
         """Initialize a new vehicle."""
@@ -23,6 +25,16 @@ class BaseVehicle(ABC):
         """Calculate the next maintenance date."""
         pass
     
+    @abstractmethod
+    def next_itv_date(self, as_of=None):
+        """Return the next ITV date as a date object, relative to as_of (default today)."""
+        pass
+    
+    @abstractmethod
+    def next_maintenance_date(self, as_of=None):
+        """Return the next maintenance date as a date object, relative to as_of (default today)."""
+        pass
+    
     @abstractmethod
     def needs_maintenance_by_km(self, km_since_last_maintenance):
         """Check if the vehicle needs maintenance based on kilometers driven."""
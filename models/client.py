@@ -4,13 +4,56 @@ from .vehicle import Vehicle
 class Client(User):
     """Client user type that can rent vehicles."""
     
-    def __init__(self, name, birth_date, user_id, password):
-        """Initialize a client user."""
+    __slots__ = ('_registered_vehicles', 'rental_limit', 'active_rental_count')
+    
+    MAX_ACTIVE_RENTALS = 3
+    
+    def __init__(self, name, birth_date, user_id, password, rental_limit=None):
+        """
+        Initialize a client user.
+        
+        Args:
+            name (str): Client name
+            birth_date (str): Date of birth (YYYY-MM-DD)
+            user_id (str): Unique identifier, starting with 'C'
+            password (str): Client password
+            rental_limit (int): Maximum number of active rentals, e.g. for a
+                corporate account; None for MAX_ACTIVE_RENTALS
+        """
         if not user_id.startswith('C'):
             raise ValueError("Client ID must start with 'C'")
         super().__init__(name, birth_date, user_id, password)
-        self.registered_vehicles = []
-        self.rentals = []
+        self._registered_vehicles = None
+        self.rental_limit = self._validate_rental_limit(rental_limit)
+        # Open rentals; only the Shop changes it, as it opens and closes rentals
+        self.active_rental_count = 0
+    
+    @staticmethod
+    def _validate_rental_limit(rental_limit):
+        """Accept None, a non-negative integer or its text form (as read from CSV)."""
+        if rental_limit is None or rental_limit == '':
+            return None
+        if isinstance(rental_limit, str) and rental_limit.isdigit():
+            rental_limit = int(rental_limit)
+        if not isinstance(rental_limit, int) or isinstance(rental_limit, bool) or rental_limit < 0:
+            raise ValueError("Rental limit must be a non-negative integer")
+        return rental_limit
+    
+    @property
+    def max_active_rentals(self):
+        """Number of rentals the client may have open at once."""
+        return self.MAX_ACTIVE_RENTALS if self.rental_limit is None else self.rental_limit
+    
+    def set_rental_limit(self, rental_limit):
+        """Set the client's own active-rental limit, or None to use MAX_ACTIVE_RENTALS."""
+        self.rental_limit = self._validate_rental_limit(rental_limit)
+    
+    @property
+    def registered_vehicles(self):
+        """Vehicles registered by the client; the list is only created on first use."""
+        if self._registered_vehicles is None:
+            self._registered_vehicles = []
+        return self._registered_vehicles
     
     def register_vehicle(self, vehicle):
         """Register a vehicle to the client."""
@@ -18,7 +61,7 @@ class Client(User):
             raise TypeError("Only Vehicle objects can be registered")
         
         # Check if vehicle is already registered
-        for v in self.registered_vehicles:
+        for v in self._registered_vehicles or ():
             if v.license_plate == vehicle.license_plate:
                 return False
         
@@ -27,7 +70,7 @@ class Client(User):
     
     def unregister_vehicle(self, license_plate):
         """Unregister a vehicle from the client."""
-        for i, vehicle in enumerate(self.registered_vehicles):
+        for i, vehicle in enumerate(self._registered_vehicles or ()):
             if vehicle.license_plate == license_plate:
                 self.registered_vehicles.pop(i)
                 return True
@@ -35,7 +78,7 @@ class Client(User):
     
     def get_vehicle_by_license_plate(self, license_plate):
         """Get a vehicle by license plate."""
-        for vehicle in self.registered_vehicles:
+        for vehicle in self._registered_vehicles or ():
             if vehicle.license_plate == license_plate:
                 return vehicle
         return None
@@ -66,6 +109,7 @@ class Client(User):
         """Convert client to dictionary for saving to CSV."""
         data = super().to_dict()
         data['type'] = 'Client'
+        data['rental_limit'] = self.rental_limit
         # We don't save the vehicles here as they are saved separately
         return data
 
@@ -75,23 +119,26 @@ class Client(User):
             name=data['name'],
             birth_date=data['birth_date'],
             user_id=data['user_id'],
-            password=data['password']
+            password=data['password'],
+            rental_limit=data.get('rental_limit')
         )
 
     def add_rental(self, rental):
         self.rentals.append(rental)
 
     def get_active_rentals(self):
-        return [rental for rental in self.rentals if rental.is_active()]
-    
-    def can_rent_vehicle(self, vehicle):
-        """Check if the client can rent a specific vehicle."""
-        # Check if the client has any active rentals
-        active_rentals = self.get_active_rentals()
-        if len(active_rentals) >= 3:  # Maximum 3 active rentals per client
-            return False
-        return True
+        return [rental for rental in self._rentals or () if rental.is_active()]
+    
+    def can_rent_vehicle(self, vehicle, pending=0):
+        """
+        Check if the client can rent a specific vehicle, in constant time.
+        
+        Args:
+            vehicle (Vehicle): Vehicle to rent
+            pending (int): Rentals about to be opened for the client alongside this one
+        """
+        return self.active_rental_count + pending < self.max_active_rentals
     
     def can_return_vehicle(self, rental):
         """Check if the client can return a specific rental."""
-        return rental in self.rentals and rental.is_active() 
\ No newline at end of file
+        return rental in (self._rentals or ()) and rental.is_active() 
\ No newline at end of file
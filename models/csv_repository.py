@@ -0,0 +1,96 @@
+import os
+from .repository import Repository
+from .vehicle import Vehicle
+from .user import User
+from .rental import Rental
+from .reservation import Reservation
+from .journal import Journal
+from .rental_archive import RentalArchive
+
+class CsvRepository(Repository):
+    """Stores the shop as vehicles.csv, users.csv, rentals.csv and reservations.csv, with an optional journal."""
+
+    def __init__(self, data_dir="data", journal=False, journal_fsync='always', archive_compression='gzip'):
+        """
+        Initialize a CSV repository.
+
+        Args:
+            data_dir (str): Directory holding the CSV data files
+            journal (bool): Append every mutation to a write-ahead journal
+                so it is durable without rewriting the CSV files
+            journal_fsync (str): Journal fsync policy ('always', 'interval' or 'never')
+            archive_compression (str): Compression of archived rental
+                partitions ('gzip' or 'lzma'), stored under data_dir/archive
+        """
+        self.data_dir = data_dir
+        self.journal_enabled = journal
+        self._journal = Journal(self._path("journal.log"), journal_fsync)
+        self.archive = RentalArchive(self._path("archive"), archive_compression)
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def load(self):
+        """Load the CSV files."""
+        return (Vehicle.load_vehicles_from_csv(self._path("vehicles.csv")),
+                User.load_users_from_csv(self._path("users.csv")),
+                Rental.load_rentals_from_csv(self._path("rentals.csv")))
+
+    def save(self, vehicles, users, rentals, collections):
+        """
+        Rewrite the CSV files of the given collections atomically.
+
+        The CSV files are then a full snapshot, so the journal records
+        made before the last checkpoint() are dropped.
+        """
+        if 'vehicles' in collections:
+            Vehicle.save_vehicles_to_csv(vehicles, self._path("vehicles.csv"))
+        if 'users' in collections:
+            User.save_users_to_csv(users, self._path("users.csv"))
+        if 'rentals' in collections:
+            Rental.save_rentals_to_csv(rentals, self._path("rentals.csv"))
+        self._journal.discard_rotated()
+
+    def load_reservations(self):
+        """Load reservations.csv."""
+        return Reservation.load_reservations_from_csv(self._path("reservations.csv"))
+
+    def save_reservations(self, reservations):
+        """Rewrite reservations.csv atomically."""
+        Reservation.save_reservations_to_csv(reservations, self._path("reservations.csv"))
+
+    def checkpoint(self):
+        """Set the journal aside so records made while save() runs are kept."""
+        self._journal.rotate()
+
+    def record(self, op, data):
+        """Append the mutation to the journal when journaling is enabled."""
+        if self.journal_enabled:
+            self._journal.append(op, data)
+
+    def pending_records(self):
+        """Yield the journaled mutations."""
+        return self._journal.replay()
+
+    def iter_rentals(self, client_id=None, vehicle_id=None, start_date=None, end_date=None):
+        """
+        Stream the archived rentals, then rentals.csv, at constant memory.
+
+        Unsaved changes are not included.
+        """
+        def matches(rental):
+            return ((client_id is None or rental.client_username == client_id)
+                    and (vehicle_id is None or rental.vehicle_id == vehicle_id)
+                    and (start_date is None or rental.start_date >= start_date)
+                    and (end_date is None or rental.start_date <= end_date))
+
+        def history():
+            yield from self.archive.iter_rentals(filter=matches)
+            yield from Rental.iter_rentals_from_csv(self._path("rentals.csv"), filter=matches)
+
+        return history()
+
+    def close(self):
+        """Release the journal file handle."""
+        self._journal.close()
@@ -0,0 +1,73 @@
+import csv
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+
+WRITE_BUFFER_SIZE = 1 << 20
+DATE_CACHE_SIZE = 1 << 14
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_day(text):
+    """
+    Parse a YYYY-MM-DD string into a datetime.
+    
+    Memoized: a data file holds far fewer distinct days than rows, and
+    datetimes are immutable so every row of a day can share one.
+    """
+    return datetime.strptime(text, "%Y-%m-%d")
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _format_ordinal(ordinal):
+    return date.fromordinal(ordinal).strftime("%Y-%m-%d")
+
+def format_day(value):
+    """Format a date or datetime as YYYY-MM-DD, memoized per day."""
+    return _format_ordinal(value.toordinal())
+
+def column_positions(header, required, optional=()):
+    """
+    Map column names to their position in a CSV header.
+    
+    Args:
+        header (list): First row of the file
+        required (iterable): Columns that must be present
+        optional (iterable): Columns mapped to None when absent
+    
+    Returns:
+        dict: Column name -> position (or None)
+    
+    Raises:
+        ValueError: If a required column is missing
+    """
+    positions = {name: position for position, name in enumerate(header)}
+    missing = [name for name in required if name not in positions]
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+    return {name: positions.get(name) for name in (*required, *optional)}
+
+@contextmanager
+def atomic_csv_writer(filename):
+    """
+    Write a CSV file atomically.
+
+    Rows go to a temporary file in the same directory, which replaces
+    filename only once it has been fully written and synced, so a crash
+    never leaves a truncated CSV behind.
+
+    Yields:
+        csv.writer: Writer over a buffered temporary file
+    """
+    directory = os.path.dirname(filename) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
+            yield csv.writer(csvfile)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
@@ -0,0 +1,140 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+
+class DueDateIndex:
+    """
+    Sorted index of vehicles by their next due date (ITV or maintenance). Thread-safe.
+
+    A vehicle's due date depends on the reference date, but only changes at
+    a few points in time (e.g. once a year). Each entry is kept with the
+    first day it no longer holds, so a query for the same or a later day
+    only recomputes the entries that expired since the last query, then
+    bisects: O((e + k) log n) for e expired entries and k results. Only a
+    query for an earlier day than the last one rebuilds the whole index.
+    """
+
+    def __init__(self, due_date_fn, valid_until_fn=None):
+        """
+        Initialize an empty index.
+
+        Args:
+            due_date_fn (callable): due_date_fn(vehicle, as_of) -> date
+            valid_until_fn (callable): valid_until_fn(vehicle, as_of) -> first
+                day after as_of whose due date may differ; None to recompute
+                every entry for each new day
+        """
+        self._due_date_fn = due_date_fn
+        self._valid_until_fn = valid_until_fn
+        self._vehicles = {}
+        self._entries = []  # sorted (due ordinal, vehicle_id)
+        self._due = {}      # vehicle_id -> due ordinal
+        self._until = {}    # vehicle_id -> ordinal of the first day its entry no longer holds
+        self._expiries = [] # heap of (until ordinal, vehicle_id), stale pairs skipped when popped
+        self._stale = set()
+        self._as_of = None  # ordinal of the day the entries hold for
+        self._lock = threading.Lock()
+
+    def reset(self, vehicles):
+        """Replace the indexed vehicles."""
+        with self._lock:
+            self._vehicles = {v.vehicle_id: v for v in vehicles}
+            self._entries = []
+            self._due = {}
+            self._until = {}
+            self._expiries = []
+            self._stale = set()
+            self._as_of = None
+
+    def add(self, vehicle):
+        """Add a vehicle; its due date is computed on the next query."""
+        with self._lock:
+            self._vehicles[vehicle.vehicle_id] = vehicle
+            self._stale.add(vehicle.vehicle_id)
+
+    def remove(self, vehicle_id):
+        """Remove a vehicle from the index."""
+        with self._lock:
+            self._vehicles.pop(vehicle_id, None)
+            self._stale.discard(vehicle_id)
+            self._drop_entry(vehicle_id)
+
+    def invalidate(self, vehicle_id):
+        """Mark a vehicle's due date for recomputation."""
+        with self._lock:
+            if vehicle_id in self._vehicles:
+                self._stale.add(vehicle_id)
+
+    def due_within(self, days, as_of=None):
+        """
+        Get the vehicles due between as_of and as_of + days (inclusive).
+
+        Args:
+            days (int): Number of days to look ahead
+            as_of (date): Reference date, defaults to today
+
+        Returns:
+            list: (vehicle, days_until_due) tuples ordered by due date
+        """
+        as_of = as_of or date.today()
+        today = as_of.toordinal()
+        with self._lock:
+            if self._as_of is None or today < self._as_of:
+                self._rebuild(as_of)
+            else:
+                self._expire(today)
+                self._as_of = today
+                if self._stale:
+                    self._refresh(as_of)
+
+            start = bisect_left(self._entries, (today,))
+            end = bisect_left(self._entries, (today + days + 1,))
+            return [(self._vehicles[vehicle_id], due - today)
+                    for due, vehicle_id in self._entries[start:end]]
+
+    def _compute(self, vehicle, as_of):
+        """Due ordinal of a vehicle as of a day, and the first day it no longer holds."""
+        due = self._due_date_fn(vehicle, as_of).toordinal()
+        if self._valid_until_fn is None:
+            return due, as_of.toordinal() + 1
+        return due, self._valid_until_fn(vehicle, as_of).toordinal()
+
+    def _rebuild(self, as_of):
+        """Recompute every due date for a reference date before the current one."""
+        self._due, self._until = {}, {}
+        for vehicle_id, vehicle in self._vehicles.items():
+            self._due[vehicle_id], self._until[vehicle_id] = self._compute(vehicle, as_of)
+        self._entries = sorted((ordinal, vehicle_id) for vehicle_id, ordinal in self._due.items())
+        self._expiries = [(until, vehicle_id) for vehicle_id, until in self._until.items()]
+        heapq.heapify(self._expiries)
+        self._stale = set()
+        self._as_of = as_of.toordinal()
+
+    def _expire(self, today):
+        """Mark the vehicles whose entries no longer hold on a later day as stale."""
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= today:
+            until, vehicle_id = heapq.heappop(expiries)
+            if self._until.get(vehicle_id) == until:
+                self._stale.add(vehicle_id)
+
+    def _refresh(self, as_of):
+        """Recompute the due dates of stale vehicles only."""
+        for vehicle_id in self._stale:
+            self._drop_entry(vehicle_id)
+            ordinal, until = self._compute(self._vehicles[vehicle_id], as_of)
+            self._due[vehicle_id] = ordinal
+            self._until[vehicle_id] = until
+            heapq.heappush(self._expiries, (until, vehicle_id))
+            insort(self._entries, (ordinal, vehicle_id))
+        self._stale = set()
+
+    def _drop_entry(self, vehicle_id):
+        self._until.pop(vehicle_id, None)
+        ordinal = self._due.pop(vehicle_id, None)
+        if ordinal is None:
+            return
+        i = bisect_left(self._entries, (ordinal, vehicle_id))
+        if i < len(self._entries) and self._entries[i] == (ordinal, vehicle_id):
+            del self._entries[i]
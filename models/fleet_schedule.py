@@ -0,0 +1,146 @@
+"""
+Fleet-wide ITV and maintenance schedules computed with NumPy.
+
+The rules mirror Car, Motorbike and Truck.next_itv_date / next_maintenance_date
+but are applied to whole columns of matriculation dates at once. Rows the
+vectorized rules cannot express (unknown vehicle types, or dates that would
+land on a non-existent day such as 29 February in a common year) are handed
+to the per-object methods so results, and errors, stay identical.
+"""
+
+from datetime import date
+import numpy as np
+from .car import Car
+from .motorbike import Motorbike
+from .truck import Truck
+
+CAR, MOTORBIKE, TRUCK, OTHER = 0, 1, 2, 3
+# Exact classes only: subclasses may override the rules and take the fallback path
+_TYPE_CODES = {Car: CAR, Motorbike: MOTORBIKE, Truck: TRUCK}
+
+
+def compute_itv_schedule(vehicles, as_of=None):
+    """
+    Compute the next ITV date of every vehicle.
+
+    Args:
+        vehicles (list): Vehicles to schedule
+        as_of (date): Reference date, defaults to today
+
+    Returns:
+        dict: vehicle_id -> date, same as vehicle.next_itv_date(as_of)
+    """
+    as_of = as_of or date.today()
+    columns = _Columns(vehicles, as_of)
+    ys = columns.years_since
+    year, month, day = as_of.year, as_of.month, as_of.day
+    ry, rm, rd = columns.my.copy(), columns.mm.copy(), columns.md.copy()
+    valid = np.ones(len(vehicles), dtype=bool)
+
+    # Biennial step used by cars aged 4-9 and motorbikes aged 5+
+    biennial = year + 2 - (ys % 2)
+
+    car = columns.types == CAR
+    young = car & (ys < 4)
+    ry[young] = columns.my[young] + 4
+    middle = car & (ys >= 4) & (ys < 10)
+    ry[middle] = biennial[middle]
+    old = car & (ys >= 10)
+    ry[old] = year + 1
+    valid &= ~((middle | old) & ~_is_valid_date(ry, month, day))
+
+    bike = columns.types == MOTORBIKE
+    young = bike & (ys < 5)
+    ry[young] = columns.my[young] + 5
+    old = bike & (ys >= 5)
+    ry[old] = biennial[old]
+    valid &= ~(old & ~_is_valid_date(ry, month, day))
+
+    truck = columns.types == TRUCK
+    young = truck & (ys < 10)
+    ry[young], rm[young], rd[young] = year + 1, month, day
+    old = truck & (ys >= 10)
+    before_anniversary = (month < columns.mm) | ((month == columns.mm) & (day < columns.md))
+    ry[old] = year
+    first_half = old & ~before_anniversary & (columns.mm <= 6)
+    rm[first_half] = columns.mm[first_half] + 6
+    second_half = old & ~before_anniversary & (columns.mm > 6)
+    ry[second_half] = year + 1
+    rm[second_half] = columns.mm[second_half] - 6
+
+    valid &= columns.types != OTHER
+    valid &= _is_valid_date(ry, rm, rd)
+    return columns.collect(ry, rm, rd, valid, lambda v: v.next_itv_date(as_of))
+
+
+def compute_maintenance_schedule(vehicles, as_of=None):
+    """
+    Compute the next maintenance date of every vehicle.
+
+    Args:
+        vehicles (list): Vehicles to schedule
+        as_of (date): Reference date, defaults to today
+
+    Returns:
+        dict: vehicle_id -> date, same as vehicle.next_maintenance_date(as_of)
+    """
+    as_of = as_of or date.today()
+    columns = _Columns(vehicles, as_of)
+    ry = np.full(len(vehicles), as_of.year + 1)
+    rm, rd = columns.mm.copy(), columns.md.copy()
+
+    truck = columns.types == TRUCK
+    in_60_days = np.datetime64(as_of, 'D') + np.timedelta64(60, 'D')
+    truck_date = in_60_days.astype(object)
+    ry[truck], rm[truck], rd[truck] = truck_date.year, truck_date.month, truck_date.day
+
+    valid = (columns.types != OTHER) & _is_valid_date(ry, rm, rd)
+    return columns.collect(ry, rm, rd, valid, lambda v: v.next_maintenance_date(as_of))
+
+
+class _Columns:
+    """Matriculation dates and vehicle types as NumPy columns."""
+
+    def __init__(self, vehicles, as_of):
+        self.vehicles = vehicles
+        self.types = np.fromiter((_TYPE_CODES.get(type(v), OTHER) for v in vehicles),
+                                 dtype=np.int8, count=len(vehicles))
+        matriculation = np.array([v.matriculation_date for v in vehicles], dtype='datetime64[D]')
+        self.my, self.mm, self.md = _split(matriculation)
+        self.years_since = as_of.year - self.my
+
+    def collect(self, ry, rm, rd, valid, fallback):
+        """Build the vehicle_id -> date mapping, using fallback for invalid rows."""
+        result_dates = _combine(np.where(valid, ry, 1970), np.where(valid, rm, 1), np.where(valid, rd, 1))
+        schedule = {}
+        for vehicle, ok, value in zip(self.vehicles, valid.tolist(), result_dates.tolist()):
+            schedule[vehicle.vehicle_id] = value if ok else fallback(vehicle)
+        return schedule
+
+
+def _split(dates):
+    """Split a datetime64[D] array into year, month and day integer arrays."""
+    months = dates.astype('datetime64[M]')
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_numbers = months.astype(np.int64) % 12 + 1
+    days = (dates - months.astype('datetime64[D]')).astype(np.int64) + 1
+    return years, month_numbers, days
+
+
+def _combine(years, months, days):
+    """Build a datetime64[D] array from year, month and day arrays."""
+    month_starts = (np.asarray(years) - 1970).astype('datetime64[Y]').astype('datetime64[M]') \
+        + (np.asarray(months) - 1).astype('timedelta64[M]')
+    return month_starts.astype('datetime64[D]') + (np.asarray(days) - 1).astype('timedelta64[D]')
+
+
+def _is_valid_date(years, months, days):
+    """Check that each (year, month, day) triple is a real calendar date."""
+    years, months, days = np.broadcast_arrays(years, months, days)
+    in_range = (months >= 1) & (months <= 12) & (years >= 1) & (years <= 9999) & (days >= 1)
+    safe_months = np.where(in_range, months, 1)
+    safe_years = np.where(in_range, years, 1970)
+    start = _combine(safe_years, safe_months, 1)
+    next_start = (start.astype('datetime64[M]') + np.timedelta64(1, 'M')).astype('datetime64[D]')
+    days_in_month = (next_start - start).astype(np.int64)
+    return in_range & (days <= days_in_month)
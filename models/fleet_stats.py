@@ -0,0 +1,166 @@
+import threading
+
+class _Counters:
+    """Running totals of one vehicle, one vehicle type or the whole fleet."""
+
+    __slots__ = ('rentals', 'active', 'rented_days', 'mileage', 'revenue')
+
+    def __init__(self):
+        self.rentals = 0
+        self.active = 0
+        self.rented_days = 0
+        self.mileage = 0
+        self.revenue = 0.0
+
+    def add(self, other, sign=1):
+        self.rentals += sign * other.rentals
+        self.active += sign * other.active
+        self.rented_days += sign * other.rented_days
+        self.mileage += sign * other.mileage
+        self.revenue += sign * other.revenue
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def _rented_days(rental):
+    """Calendar days from a closed rental's start day to its end day, ignoring the time of day."""
+    return (rental.end_date.date() - rental.start_date.date()).days
+
+
+class FleetStats:
+    """
+    Rental counters per vehicle, per vehicle type and for the whole fleet,
+    updated in O(1) as rentals open and close. Thread-safe.
+
+    A rental counts towards 'rentals' from the moment it opens and towards
+    'active' while it is open. When it closes, the calendar days from its
+    start day to its end day are added to 'rented_days' and the distance
+    driven to 'mileage' (when both its initial and final mileage are
+    known). Days are counted the way the stored dates keep them, so the
+    live counters match a recount after reloading. 'revenue' prices a
+    vehicle's rented days at its current daily rate; call reprice when the
+    rate changes. Rentals of vehicles not in the shop are not counted.
+    """
+
+    def __init__(self):
+        self._vehicles = {}  # vehicle_id -> (type, _Counters)
+        self._types = {}     # type -> _Counters
+        self._fleet = _Counters()
+        self._lock = threading.Lock()
+
+    def reset(self, rentals, vehicles_by_id):
+        """Recount from a rental list, looking vehicles up in vehicles_by_id."""
+        # Accumulate per vehicle in one pass, then roll the vehicles up into types and fleet
+        totals = {}  # vehicle_id -> (vehicle, _Counters), or None for unknown vehicles
+        for rental in rentals:
+            entry = totals.get(rental.vehicle_id, False)
+            if entry is False:
+                vehicle = vehicles_by_id.get(rental.vehicle_id)
+                entry = totals[rental.vehicle_id] = None if vehicle is None else (vehicle, _Counters())
+            if entry is None:
+                continue
+            counters = entry[1]
+            counters.rentals += 1
+            if rental.end_date is None:
+                counters.active += 1
+            else:
+                counters.rented_days += _rented_days(rental)
+                if rental.initial_mileage is not None and rental.final_mileage is not None:
+                    counters.mileage += rental.final_mileage - rental.initial_mileage
+
+        vehicles, types, fleet = {}, {}, _Counters()
+        for entry in totals.values():
+            if entry is not None:
+                vehicle, counters = entry
+                counters.revenue = vehicle.calculate_rental_cost(counters.rented_days)
+                vehicles[vehicle.vehicle_id] = (vehicle.type, counters)
+                types.setdefault(vehicle.type, _Counters()).add(counters)
+                fleet.add(counters)
+        with self._lock:
+            self._vehicles, self._types, self._fleet = vehicles, types, fleet
+
+    def open(self, rental, vehicle):
+        """Count a rental added to the shop, closed or not."""
+        with self._lock:
+            self._apply(vehicle, self._opened())
+            if not rental.is_active():
+                self._apply(vehicle, self._closed(rental))
+
+    def close(self, rental, vehicle):
+        """Count the return of a rental that was open."""
+        with self._lock:
+            self._apply(vehicle, self._closed(rental))
+
+    def reprice(self, vehicle):
+        """Price a vehicle's rented days again after its daily rate changed."""
+        with self._lock:
+            if vehicle.vehicle_id in self._vehicles:
+                self._apply(vehicle, _Counters())
+
+    def discard(self, rentals, vehicles_by_id):
+        """Take closed rentals leaving the shop, e.g. archived ones, out of the counters."""
+        with self._lock:
+            for rental in rentals:
+                vehicle = vehicles_by_id.get(rental.vehicle_id)
+                if vehicle is not None and rental.vehicle_id in self._vehicles:
+                    # A closed rental counts once in 'rentals' and no longer in 'active'
+                    delta = self._closed(rental)
+                    delta.rentals, delta.active = 1, 0
+                    self._apply(vehicle, delta, sign=-1)
+
+    def remove_vehicle(self, vehicle_id):
+        """Drop a vehicle's counters along with its share of the type and fleet totals."""
+        with self._lock:
+            entry = self._vehicles.pop(vehicle_id, None)
+            if entry is not None:
+                vehicle_type, counters = entry
+                self._types[vehicle_type].add(counters, sign=-1)
+                self._fleet.add(counters, sign=-1)
+
+    def snapshot(self, by_vehicle=True):
+        """
+        Copy the counters.
+
+        Returns:
+            dict: {'fleet': counters, 'types': {type: counters},
+                'vehicles': {vehicle_id: counters}} where counters is a dict
+                of rentals, active, rented_days, mileage and revenue
+        """
+        with self._lock:
+            stats = {'fleet': self._fleet.to_dict(),
+                     'types': {vehicle_type: counters.to_dict() for vehicle_type, counters in self._types.items()}}
+            if by_vehicle:
+                stats['vehicles'] = {vehicle_id: counters.to_dict()
+                                     for vehicle_id, (_, counters) in self._vehicles.items()}
+            return stats
+
+    def _apply(self, vehicle, delta, sign=1):
+        """Apply a change to a vehicle's counters, reprice its rented days and roll it up."""
+        entry = self._vehicles.get(vehicle.vehicle_id)
+        if entry is None:
+            entry = self._vehicles[vehicle.vehicle_id] = (vehicle.type, _Counters())
+        vehicle_type, counters = entry
+        change = _Counters()
+        change.add(delta, sign)
+        change.revenue = vehicle.calculate_rental_cost(counters.rented_days + change.rented_days) - counters.revenue
+        counters.add(change)
+        self._types.setdefault(vehicle_type, _Counters()).add(change)
+        self._fleet.add(change)
+
+    @staticmethod
+    def _opened():
+        delta = _Counters()
+        delta.rentals = 1
+        delta.active = 1
+        return delta
+
+    @staticmethod
+    def _closed(rental):
+        """The change of a rental closing: no longer active, days and mileage accrued."""
+        delta = _Counters()
+        delta.active = -1
+        delta.rented_days = _rented_days(rental)
+        if rental.initial_mileage is not None and rental.final_mileage is not None:
+            delta.mileage = rental.final_mileage - rental.initial_mileage
+        return delta
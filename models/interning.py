@@ -0,0 +1,11 @@
+import sys
+
+def intern_key(value):
+    """
+    Intern a string key so every object holding the same ID shares one string.
+    
+    IDs loaded from CSV rows, journal records or database rows are fresh
+    strings each time; interning them collapses the copies held by
+    rentals, vehicles and users into one. Non-string values pass through.
+    """
+    return sys.intern(value) if type(value) is str else value
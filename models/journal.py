@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+class Journal:
+    """Append-only log of shop mutations, replayed on top of the CSV snapshots."""
+
+    VALID_FSYNC_POLICIES = {'always', 'interval', 'never'}
+
+    def __init__(self, filename, fsync='always', fsync_interval=1.0):
+        """
+        Initialize a journal.
+
+        Args:
+            filename (str): Path of the journal file
+            fsync (str): 'always' syncs every record, 'interval' at most once
+                per fsync_interval seconds, 'never' leaves it to the OS
+            fsync_interval (float): Seconds between syncs for the 'interval' policy
+        """
+        if fsync not in self.VALID_FSYNC_POLICIES:
+            raise ValueError(f"Fsync policy must be one of {', '.join(self.VALID_FSYNC_POLICIES)}")
+        self.filename = filename
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.rotated_filename = filename + '.old'
+        self._file = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, op, data):
+        """Append one mutation record and sync it according to the fsync policy. Thread-safe."""
+        line = json.dumps({'op': op, 'data': data}) + '\n'
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+                self._file = open(self.filename, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync == 'always':
+                os.fsync(self._file.fileno())
+            elif self.fsync == 'interval':
+                now = time.monotonic()
+                if now - self._last_sync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    self._last_sync = now
+
+    def sync(self):
+        """Force buffered records to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """
+        Set the current records aside so new ones start a fresh file.
+
+        Used while a snapshot is written: records set aside are covered by
+        the snapshot and dropped by discard_rotated() once it is on disk,
+        while records appended meanwhile survive. Records left over from
+        an earlier, failed rotation are kept in front of the current ones.
+        """
+        with self._lock:
+            self._close()
+            if not os.path.exists(self.filename):
+                return
+            if os.path.exists(self.rotated_filename):
+                with open(self.rotated_filename, 'a', encoding='utf-8') as rotated, \
+                        open(self.filename, 'r', encoding='utf-8') as current:
+                    shutil.copyfileobj(current, rotated)
+                    rotated.flush()
+                    os.fsync(rotated.fileno())
+            else:
+                os.replace(self.filename, self.rotated_filename)
+            with open(self.filename, 'w', encoding='utf-8') as journal_file:
+                os.fsync(journal_file.fileno())
+
+    def discard_rotated(self):
+        """Drop the records set aside by rotate()."""
+        with self._lock:
+            if os.path.exists(self.rotated_filename):
+                os.remove(self.rotated_filename)
+
+    def replay(self):
+        """
+        Yield the (op, data) records of the journal in order.
+
+        Records set aside by rotate() come first. A torn final record, left
+        by a crash in the middle of a write, is ignored.
+        """
+        for filename in (self.rotated_filename, self.filename):
+            if not os.path.exists(filename):
+                continue
+            with open(filename, 'r', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        if line.endswith('\n'):
+                            raise
+                        break
+                    yield record['op'], record['data']
+
+    def truncate(self):
+        """Discard every record, typically once a snapshot has been written."""
+        with self._lock:
+            self._close()
+            if os.path.exists(self.rotated_filename):
+                os.remove(self.rotated_filename)
+            if os.path.exists(self.filename):
+                with open(self.filename, 'w', encoding='utf-8') as journal_file:
+                    os.fsync(journal_file.fileno())
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,106 @@
+import threading
+from contextlib import contextmanager
+
+class LockTable:
+    """One re-entrant lock per key, created on first use."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        """Get the lock of a key."""
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(key, threading.RLock())
+        return lock
+
+    @contextmanager
+    def hold(self, keys):
+        """
+        Hold the locks of several keys.
+
+        Locks are taken in sorted key order, so two callers holding
+        overlapping key sets cannot deadlock each other.
+        """
+        locks = [self.get(key) for key in sorted(set(keys))]
+        acquired = []
+        try:
+            for lock in locks:
+                lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+class SharedLock:
+    """
+    Lock held shared by many threads or exclusively by one.
+
+    Both modes are re-entrant: a thread holding the lock exclusively may
+    take it again in either mode, and a thread holding it shared may take
+    it shared again. Waiting exclusive holders are served before new
+    shared holders so they are not starved.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._owner = None
+        self._owner_depth = 0
+        self._waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def shared(self):
+        """Hold the lock shared."""
+        me = threading.get_ident()
+        depth = getattr(self._local, 'depth', 0)
+        if self._owner == me or depth:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+        with self._condition:
+            while self._owner is not None or self._waiting:
+                self._condition.wait()
+            self._shared += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._condition:
+                self._shared -= 1
+                if not self._shared:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the lock exclusively, waiting for every shared holder to leave."""
+        me = threading.get_ident()
+        with self._condition:
+            if self._owner != me:
+                if getattr(self._local, 'depth', 0):
+                    raise RuntimeError("Cannot upgrade a shared lock to exclusive")
+                self._waiting += 1
+                try:
+                    while self._owner is not None or self._shared:
+                        self._condition.wait()
+                finally:
+                    self._waiting -= 1
+                self._owner = me
+            self._owner_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._owner_depth -= 1
+                if not self._owner_depth:
+                    self._owner = None
+                    self._condition.notify_all()
@@ -1,15 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from .vehicle import Vehicle
 
 class Motorbike(Vehicle):
+    __slots__ = ('engine_size',)
+    
     def __init__(self, vehicle_id, brand, model, year, daily_rate, engine_size):
         super().__init__(vehicle_id, brand, model, year, daily_rate)
         self.engine_size = engine_size
         self.type = "Motorbike"
     
-    def calculate_next_itv(self):
-        matriculation_date = datetime.strptime(self.matriculation_date, "%Y-%m-%d")
-        current_date = datetime.now()
+    def next_itv_date(self, as_of=None):
+        matriculation_date = self._matriculation()
+        current_date = as_of or date.today()
         years_since_matriculation = current_date.year - matriculation_date.year
         
         if years_since_matriculation < 5:
@@ -20,24 +22,20 @@ class Motorbike(Vehicle):
                 years_to_add = 2
             next_itv_date = current_date.replace(year=current_date.year + years_to_add)
         
-        next_itv_date = next_itv_date.replace(
+        return next_itv_date.replace(
             day=matriculation_date.day,
             month=matriculation_date.month
         )
-        
-        return next_itv_date.strftime("%Y-%m-%d")
     
-    def calculate_next_maintenance(self):
-        matriculation_date = datetime.strptime(self.matriculation_date, "%Y-%m-%d")
-        current_date = datetime.now()
+    def next_maintenance_date(self, as_of=None):
+        matriculation_date = self._matriculation()
+        current_date = as_of or date.today()
         
-        next_maintenance_date = current_date.replace(
+        return current_date.replace(
             year=current_date.year + 1,
             day=matriculation_date.day,
             month=matriculation_date.month
         )
-        
-        return next_maintenance_date.strftime("%Y-%m-%d")
     
     def needs_maintenance_by_km(self, km_since_last_maintenance):
         return km_since_last_maintenance >= 1000
@@ -0,0 +1,40 @@
+import hashlib
+import hmac
+import os
+
+ALGORITHM = 'pbkdf2_sha256'
+ITERATIONS = 100_000
+SALT_BYTES = 16
+
+
+def hash_password(password, salt=None, iterations=ITERATIONS):
+    """
+    Hash a password with PBKDF2-HMAC-SHA256 and a random salt.
+
+    Returns:
+        str: 'pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>', which
+            carries everything verify_password needs
+    """
+    if not isinstance(password, str):
+        raise TypeError("Password must be a string")
+    salt = os.urandom(SALT_BYTES) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_password_hash(value):
+    """Check whether a stored password is a hash rather than legacy plain text."""
+    return isinstance(value, str) and value.startswith(ALGORITHM + '$') and value.count('$') == 3
+
+
+def verify_password(password, stored):
+    """Check a password against a hash made by hash_password, in constant time."""
+    if not isinstance(password, str) or not is_password_hash(stored):
+        return False
+    _, iterations, salt, expected = stored.split('$')
+    try:
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt), int(iterations))
+    except ValueError:
+        # A malformed hash, or a legacy password that happens to look like one
+        return False
+    return hmac.compare_digest(digest.hex(), expected)
@@ -1,19 +1,43 @@
 import csv
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import uuid
+from .csv_utils import atomic_csv_writer, column_positions, format_day, parse_day
+from .interning import intern_key
+
+def _mileage(value):
+    """Parse a mileage column, keeping fractional values (written by end_rental with a float)."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+def _as_day(value):
+    """Accept a date, a datetime or a YYYY-MM-DD string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.fromordinal(value.toordinal())
+    return parse_day(value)
 
 class Rental:
     """Class to handle rental operations."""
     
+    __slots__ = ('rental_id', 'client_username', 'vehicle_id', 'start_date', 'end_date',
+                 'initial_mileage', 'final_mileage', 'return_date')
+    
     VALID_ASSURANCE_TYPES = {'basic', 'medium', 'full'}
+    CSV_FIELDS = ['rental_id', 'client_username', 'vehicle_id', 'start_date', 'end_date', 'is_active', 'initial_mileage', 'final_mileage', 'return_date']
     
     def __init__(self, rental_id, client_username, vehicle_id, start_date, end_date=None):
         self.rental_id = rental_id
-        self.client_username = client_username
-        self.vehicle_id = vehicle_id
-        self.start_date = start_date if isinstance(start_date, datetime) else datetime.strptime(start_date, "%Y-%m-%d")
-        self.end_date = end_date if end_date is None else (end_date if isinstance(end_date, datetime) else datetime.strptime(end_date, "%Y-%m-%d"))
+        self.client_username = intern_key(client_username)
+        self.vehicle_id = intern_key(vehicle_id)
+        self.start_date = _as_day(start_date)
+        self.end_date = end_date if end_date is None else _as_day(end_date)
         self.initial_mileage = None
         self.final_mileage = None
         self.return_date = None
@@ -24,7 +48,7 @@ class Rental:
         return cls(rental_id, client_username, vehicle_id, start_date)
 
     def end(self, end_date):
-        self.end_date = end_date if isinstance(end_date, datetime) else datetime.strptime(end_date, "%Y-%m-%d")
+        self.end_date = _as_day(end_date)
 
     def is_active(self):
         return self.end_date is None
@@ -82,58 +106,129 @@ class Rental:
             'rental_id': self.rental_id,
             'client_username': self.client_username,
             'vehicle_id': self.vehicle_id,
-            'start_date': self.start_date.strftime("%Y-%m-%d"),
-            'end_date': self.end_date.strftime("%Y-%m-%d") if self.end_date else None,
+            'start_date': format_day(self.start_date),
+            'end_date': format_day(self.end_date) if self.end_date else None,
             'is_active': self.is_active(),
             'initial_mileage': self.initial_mileage,
             'final_mileage': self.final_mileage,
-            'return_date': self.return_date.strftime("%Y-%m-%d") if self.return_date else None
+            'return_date': format_day(self.return_date) if self.return_date else None
         }
     
+    def to_csv_row(self):
+        """Serialize the rental as a row matching CSV_FIELDS."""
+        return [
+            self.rental_id,
+            self.client_username,
+            self.vehicle_id,
+            format_day(self.start_date),
+            format_day(self.end_date) if self.end_date else None,
+            self.end_date is None,
+            self.initial_mileage,
+            self.final_mileage,
+            format_day(self.return_date) if self.return_date else None
+        ]
+    
     @classmethod
     def save_rentals_to_csv(cls, rentals, filename):
         """Save a list of rentals to a CSV file."""
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        fieldnames = ['rental_id', 'client_username', 'vehicle_id', 'start_date', 'end_date', 'is_active', 'initial_mileage', 'final_mileage', 'return_date']
-        
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for rental in rentals:
-                writer.writerow(rental.to_dict())
+        with atomic_csv_writer(filename) as writer:
+            writer.writerow(cls.CSV_FIELDS)
+            writer.writerows(rental.to_csv_row() for rental in rentals)
     
     @classmethod
     def load_rentals_from_csv(cls, filename):
         """Load rentals from a CSV file."""
-        rentals = []
+        return list(cls.iter_rentals_from_csv(filename))
+    
+    @classmethod
+    def iter_rentals_from_csv(cls, filename, filter=None):
+        """
+        Stream rentals from a CSV file one row at a time.
+        
+        Only the current row is held in memory, and the file is closed as
+        soon as the consumer stops iterating.
         
+        Args:
+            filename (str): Path of the rentals CSV file
+            filter (callable): Optional predicate; only rentals for which
+                filter(rental) is true are yielded
+        
+        Yields:
+            Rental: Rentals in file order
+        """
         if not os.path.exists(filename):
-            return rentals
+            return
         
         with open(filename, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                try:
-                    # Create the rental
-                    rental = cls(
-                        rental_id=row['rental_id'],
-                        client_username=row['client_username'],
-                        vehicle_id=row['vehicle_id'],
-                        start_date=row['start_date'],
-                        end_date=row['end_date'] if row['end_date'] else None
-                    )
-                    
-                    # Set the fields that aren't in the constructor
-                    rental.initial_mileage = int(row['initial_mileage']) if row['initial_mileage'] else None
-                    rental.final_mileage = int(row['final_mileage']) if row['final_mileage'] else None
-                    rental.return_date = datetime.strptime(row['return_date'], "%Y-%m-%d") if row['return_date'] else None
-                    
-                    rentals.append(rental)
-                except Exception as e:
-                    print(f"Error loading rental: {e}")
+            yield from cls.iter_rentals_from_rows(csv.reader(csvfile), filter)
+
+    @classmethod
+    def iter_rentals_from_rows(cls, rows, filter=None):
+        """
+        Decode rentals from csv.reader rows, the first one being the header.
+        
+        Rows that cannot be parsed are reported and skipped.
+        
+        Args:
+            rows (iterator): Rows of a rentals CSV file, header first
+            filter (callable): Optional predicate on the Rental
+        """
+        header = next(rows, None)
+        if header is None:
+            return
+        try:
+            decode = cls.csv_row_decoder(header)
+        except ValueError as e:
+            print(f"Error loading rentals: {e}")
+            return
+        for row in rows:
+            try:
+                rental = decode(row)
+            except Exception as e:
+                print(f"Error loading rental: {e}")
+                continue
+            
+            if filter is None or filter(rental):
+                yield rental
+
+    @classmethod
+    def csv_row_decoder(cls, header):
+        """
+        Compile a decoder for the rows of a rentals CSV file.
+        
+        Column positions are resolved once from the header, so each row is
+        decoded straight from the csv.reader list without building a dict.
+        
+        Args:
+            header (list): Header row of the file
+        
+        Returns:
+            callable: row -> Rental
+        
+        Raises:
+            ValueError: If a column is missing
+        """
+        columns = column_positions(header, [field for field in cls.CSV_FIELDS if field != 'is_active'])
+        rental_id = columns['rental_id']
+        client_username = columns['client_username']
+        vehicle_id = columns['vehicle_id']
+        start_date = columns['start_date']
+        end_date = columns['end_date']
+        initial_mileage = columns['initial_mileage']
+        final_mileage = columns['final_mileage']
+        return_date = columns['return_date']
+        
+        def decode(row):
+            end = row[end_date]
+            returned = row[return_date]
+            rental = cls(row[rental_id], row[client_username], row[vehicle_id],
+                         parse_day(row[start_date]), parse_day(end) if end else None)
+            rental.initial_mileage = _mileage(row[initial_mileage])
+            rental.final_mileage = _mileage(row[final_mileage])
+            rental.return_date = parse_day(returned) if returned else None
+            return rental
         
-        return rentals
+        return decode
 
     @classmethod
     def from_dict(cls, data):
@@ -147,5 +242,8 @@ class Rental:
         )
         rental.initial_mileage = data.get('initial_mileage')
         rental.final_mileage = data.get('final_mileage')
-        rental.return_date = data.get('return_date')
+        return_date = data.get('return_date')
+        if isinstance(return_date, str):
+            return_date = parse_day(return_date)
+        rental.return_date = return_date
         return rental 
\ No newline at end of file
@@ -0,0 +1,217 @@
+import csv
+import gzip
+import heapq
+import json
+import lzma
+import os
+from collections import OrderedDict
+from datetime import datetime
+from operator import attrgetter
+from .rental import Rental
+
+_start_date = attrgetter('start_date')
+
+
+class RentalArchive:
+    """
+    Cold storage for closed rentals.
+
+    Rentals are grouped into one compressed CSV partition per month of
+    their end date (rentals-YYYY-MM.csv.gz or .csv.xz). A small JSON index
+    records which clients and vehicles appear in each partition and its
+    earliest start date, so a history query only decompresses the
+    partitions it needs. Recently read partitions are kept in a small
+    in-memory cache.
+    """
+
+    VALID_COMPRESSIONS = {'gzip': ('.csv.gz', gzip.open), 'lzma': ('.csv.xz', lzma.open)}
+
+    def __init__(self, directory, compression='gzip', cache_size=8):
+        """
+        Open an archive directory. Nothing is created until rentals are archived.
+
+        Args:
+            directory (str): Directory holding the partitions and index.json
+            compression (str): 'gzip' or 'lzma' for newly written partitions
+            cache_size (int): Number of decompressed partitions kept in memory
+        """
+        if compression not in self.VALID_COMPRESSIONS:
+            raise ValueError(f"Compression must be one of {', '.join(self.VALID_COMPRESSIONS)}")
+        self.directory = directory
+        self.compression = compression
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._index = self._read_index()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_index(self):
+        """Load index.json: partition -> {'file', 'clients', 'vehicles', 'first_start'}, with id sets."""
+        try:
+            with open(self._path("index.json"), 'r') as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        for entry in index.values():
+            entry['clients'] = set(entry['clients'])
+            entry['vehicles'] = set(entry['vehicles'])
+        return index
+
+    def _write_index(self):
+        tmp_filename = self._path("index.json.tmp")
+        with open(tmp_filename, 'w') as index_file:
+            json.dump(self._index, index_file, sort_keys=True, default=sorted)
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(tmp_filename, self._path("index.json"))
+
+    @staticmethod
+    def partition_of(rental):
+        """Partition key ('YYYY-MM' of the end date) of a closed rental."""
+        return rental.end_date.strftime("%Y-%m")
+
+    @property
+    def partitions(self):
+        """Sorted partition keys."""
+        return sorted(self._index)
+
+    def archive(self, rentals):
+        """
+        Add closed rentals to their partitions.
+
+        Each touched partition is rewritten atomically, merged with what it
+        already holds; rentals already archived are not duplicated, so
+        archiving the same rentals again after an interrupted call is
+        harmless.
+
+        Args:
+            rentals (iterable): Closed rentals
+
+        Returns:
+            int: Number of rentals newly archived
+        """
+        by_partition = {}
+        for rental in rentals:
+            if rental.is_active():
+                raise ValueError(f"Rental {rental.rental_id} is still active")
+            by_partition.setdefault(self.partition_of(rental), []).append(rental)
+        if not by_partition:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        added = 0
+        stale_files = []
+        for partition, new_rentals in by_partition.items():
+            existing = self._load_partition(partition) if partition in self._index else []
+            known = {rental.rental_id for rental in existing}
+            fresh = [rental for rental in new_rentals if rental.rental_id not in known]
+            if not fresh:
+                continue
+            merged = sorted(existing + fresh, key=_start_date)
+            old_file = self._index.get(partition, {}).get('file')
+            filename = self._write_partition(partition, merged)
+            if old_file and old_file != filename:
+                stale_files.append(old_file)
+            self._index[partition] = {
+                'file': filename,
+                'clients': {rental.client_username for rental in merged},
+                'vehicles': {rental.vehicle_id for rental in merged},
+                'first_start': merged[0].start_date.strftime("%Y-%m-%d")
+            }
+            self._cache.pop(partition, None)
+            added += len(fresh)
+        self._write_index()
+        for old_file in stale_files:
+            os.remove(self._path(old_file))
+        return added
+
+    def client_rentals(self, user_id):
+        """Get a client's archived rentals ordered by start date."""
+        return self._collect('clients', user_id, lambda rental: rental.client_username == user_id)
+
+    def vehicle_rentals(self, vehicle_id):
+        """Get a vehicle's archived rentals ordered by start date."""
+        return self._collect('vehicles', vehicle_id, lambda rental: rental.vehicle_id == vehicle_id)
+
+    def vehicle_rentals_between(self, vehicle_id, start_date, end_date):
+        """
+        Get a vehicle's archived rentals that overlap a period, ordered by start date.
+
+        Partitions are keyed by end month, so only those from the period's
+        first month onwards are read, and of these only the ones whose
+        earliest rental starts on or before the period's last day.
+
+        Args:
+            vehicle_id (str): Vehicle ID
+            start_date (datetime): First day of the period
+            end_date (datetime): Last day of the period
+        """
+        first_month = start_date.strftime("%Y-%m")
+        last_day = end_date.strftime("%Y-%m-%d")
+        partitions = [partition for partition in self.partitions
+                      if partition >= first_month and self._index[partition].get('first_start', '') <= last_day]
+        # Rentals carry the time of day: compare with whole days
+        first_day = datetime.fromordinal(start_date.toordinal())
+        next_day = datetime.fromordinal(end_date.toordinal() + 1)
+        return self._collect('vehicles', vehicle_id,
+                             lambda rental: (rental.vehicle_id == vehicle_id and rental.start_date < next_day
+                                             and rental.end_date >= first_day),
+                             partitions)
+
+    def iter_rentals(self, filter=None):
+        """
+        Stream every archived rental, one partition at a time, bypassing the cache.
+
+        Args:
+            filter (callable): Optional predicate on the Rental
+        """
+        for partition in self.partitions:
+            for rental in self._iter_partition(partition):
+                if filter is None or filter(rental):
+                    yield rental
+
+    def _collect(self, key, value, predicate, partitions=None):
+        """Merge the matching rentals of the partitions (all by default) whose index lists value."""
+        runs = [[rental for rental in self._cached_partition(partition) if predicate(rental)]
+                for partition in (self.partitions if partitions is None else partitions)
+                if value in self._index[partition][key]]
+        return list(heapq.merge(*runs, key=_start_date))
+
+    def _cached_partition(self, partition):
+        rentals = self._cache.get(partition)
+        if rentals is None:
+            rentals = self._load_partition(partition)
+            self._cache[partition] = rentals
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(partition)
+        return rentals
+
+    def _load_partition(self, partition):
+        return list(self._iter_partition(partition))
+
+    def _iter_partition(self, partition):
+        filename = self._index[partition]['file']
+        opener = lzma.open if filename.endswith('.xz') else gzip.open
+        with opener(self._path(filename), 'rt', newline='') as csvfile:
+            yield from Rental.iter_rentals_from_rows(csv.reader(csvfile))
+
+    def _write_partition(self, partition, rentals):
+        suffix, opener = self.VALID_COMPRESSIONS[self.compression]
+        filename = f"rentals-{partition}{suffix}"
+        tmp_filename = self._path(filename + ".tmp")
+        try:
+            with opener(tmp_filename, 'wt', newline='') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(Rental.CSV_FIELDS)
+                writer.writerows(rental.to_csv_row() for rental in rentals)
+            with open(tmp_filename, 'rb') as written:
+                os.fsync(written.fileno())
+            os.replace(tmp_filename, self._path(filename))
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+        return filename
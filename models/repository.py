@@ -0,0 +1,130 @@
+from abc import ABC, abstractmethod
+
+class Repository(ABC):
+    """
+    Storage backend used by Shop.
+
+    Shop keeps the working set in memory and reports every mutation to
+    its repository through record(). The operations are:
+
+        add_vehicle, remove_vehicle, update_vehicle, add_user,
+        remove_client, remove_admin, set_password, set_rental_limit,
+        create_rental, end_rental, create_rentals, end_rentals,
+        create_reservation, cancel_reservation
+
+    Each record carries the JSON-compatible data Shop logs for it
+    (to_dict() output for additions, ids and changed fields otherwise).
+    The bulk create_rentals and end_rentals records hold a list of
+    create_rental / end_rental records that must be applied atomically.
+    """
+
+    # True when record() persists each mutation immediately, so save_data
+    # has nothing left to write unless forced.
+    writes_through = False
+    # False when load() only returns open rentals and the rest of the
+    # history has to be queried from the backend (see HistoryRepository).
+    history_in_memory = True
+    # RentalArchive holding closed rentals moved out of memory, or None
+    # when the backend does not support archiving.
+    archive = None
+
+    @abstractmethod
+    def load(self):
+        """
+        Load the stored data.
+
+        Returns:
+            tuple: (vehicles, users, rentals) lists
+        """
+        pass
+
+    @abstractmethod
+    def save(self, vehicles, users, rentals, collections):
+        """
+        Store a full snapshot of the given collections.
+
+        Args:
+            vehicles (list): All vehicles
+            users (list): All clients and admins
+            rentals (list): Rentals held in memory
+            collections (set): Names to write: 'vehicles', 'users', 'rentals'
+        """
+        pass
+
+    def load_reservations(self):
+        """Load the stored reservations. Backends without reservation storage have none."""
+        return []
+
+    def save_reservations(self, reservations):
+        """
+        Store a full snapshot of the reservations.
+
+        Shop calls this from save_data, before save(), when reservations changed.
+        """
+        pass
+
+    def record(self, op, data):
+        """Persist a single mutation. Raises if it cannot be applied."""
+        pass
+
+    def checkpoint(self):
+        """
+        Mark the point a snapshot is taken at.
+
+        Shop calls this with mutations paused, right before it copies the
+        state passed to save(). Mutations recorded after it must survive
+        that save().
+        """
+        pass
+
+    def pending_records(self):
+        """Yield (op, data) mutations recorded after the last snapshot."""
+        return iter(())
+
+    @abstractmethod
+    def iter_rentals(self, client_id=None, vehicle_id=None, start_date=None, end_date=None):
+        """
+        Stream the stored rental history.
+
+        Args:
+            client_id (str): Only rentals of this client
+            vehicle_id (str): Only rentals of this vehicle
+            start_date (datetime): Only rentals starting on or after this date
+            end_date (datetime): Only rentals starting on or before this date
+        """
+        pass
+
+    def close(self):
+        """Release any open files or connections."""
+        pass
+
+
+class HistoryRepository(Repository):
+    """
+    Storage backend that keeps the rental history out of memory.
+
+    load() only returns the open rentals; Shop answers history queries
+    through the methods below instead.
+    """
+
+    history_in_memory = False
+
+    @abstractmethod
+    def get_rental(self, rental_id):
+        """Get a stored rental by ID, or None."""
+        pass
+
+    @abstractmethod
+    def client_rentals(self, user_id):
+        """Get a client's rentals ordered by start date."""
+        pass
+
+    @abstractmethod
+    def vehicle_rentals(self, vehicle_id):
+        """Get a vehicle's rentals ordered by start date."""
+        pass
+
+    @abstractmethod
+    def vehicle_rentals_between(self, vehicle_id, start_date, end_date):
+        """Get a vehicle's rentals overlapping a period, both days included, ordered by start date."""
+        pass
@@ -0,0 +1,97 @@
+import csv
+import os
+from datetime import date, datetime
+import uuid
+from .csv_utils import atomic_csv_writer, column_positions, format_day, parse_day
+from .interning import intern_key
+
+def _as_day(value):
+    """Accept a date, a datetime or a YYYY-MM-DD string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.fromordinal(value.toordinal())
+    return parse_day(value)
+
+class Reservation:
+    """Advance booking of a vehicle for a range of days, both ends included."""
+
+    __slots__ = ('reservation_id', 'client_username', 'vehicle_id', 'start_date', 'end_date')
+
+    CSV_FIELDS = ['reservation_id', 'client_username', 'vehicle_id', 'start_date', 'end_date']
+
+    def __init__(self, reservation_id, client_username, vehicle_id, start_date, end_date):
+        self.reservation_id = reservation_id
+        self.client_username = intern_key(client_username)
+        self.vehicle_id = intern_key(vehicle_id)
+        self.start_date = _as_day(start_date)
+        self.end_date = _as_day(end_date)
+        if self.end_date < self.start_date:
+            raise ValueError("End date must not be before start date")
+
+    @classmethod
+    def create(cls, client_username, vehicle_id, start_date, end_date):
+        reservation_id = str(uuid.uuid4())
+        return cls(reservation_id, client_username, vehicle_id, start_date, end_date)
+
+    def to_dict(self):
+        """Convert reservation to dictionary for saving to CSV."""
+        return {
+            'reservation_id': self.reservation_id,
+            'client_username': self.client_username,
+            'vehicle_id': self.vehicle_id,
+            'start_date': format_day(self.start_date),
+            'end_date': format_day(self.end_date)
+        }
+
+    def to_csv_row(self):
+        """Serialize the reservation as a row matching CSV_FIELDS."""
+        return [self.reservation_id, self.client_username, self.vehicle_id,
+                format_day(self.start_date), format_day(self.end_date)]
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a reservation object from a dictionary."""
+        return cls(
+            reservation_id=data['reservation_id'],
+            client_username=data['client_username'],
+            vehicle_id=data['vehicle_id'],
+            start_date=data['start_date'],
+            end_date=data['end_date']
+        )
+
+    @classmethod
+    def save_reservations_to_csv(cls, reservations, filename):
+        """Save a list of reservations to a CSV file."""
+        with atomic_csv_writer(filename) as writer:
+            writer.writerow(cls.CSV_FIELDS)
+            writer.writerows(reservation.to_csv_row() for reservation in reservations)
+
+    @classmethod
+    def load_reservations_from_csv(cls, filename):
+        """Load reservations from a CSV file. Rows that cannot be parsed are reported and skipped."""
+        if not os.path.exists(filename):
+            return []
+
+        reservations = []
+        with open(filename, 'r', newline='') as csvfile:
+            rows = csv.reader(csvfile)
+            header = next(rows, None)
+            if header is None:
+                return []
+            try:
+                columns = column_positions(header, cls.CSV_FIELDS)
+            except ValueError as e:
+                print(f"Error loading reservations: {e}")
+                return []
+            positions = [columns[field] for field in cls.CSV_FIELDS]
+            for row in rows:
+                try:
+                    reservations.append(cls(*(row[i] for i in positions)))
+                except Exception as e:
+                    print(f"Error loading reservation: {e}")
+        return reservations
+
+    def __str__(self):
+        return (f"Reservation {self.reservation_id}: {self.vehicle_id} for {self.client_username} "
+                f"from {format_day(self.start_date)} to {format_day(self.end_date)}")
@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_right, insort
+
+class ReservationCalendar:
+    """
+    Booked day ranges per vehicle, each kept as a sorted interval list. Thread-safe.
+
+    The ranges of a vehicle never overlap, so sorted by start they are also
+    sorted by end: the only booking that can overlap a range is the last
+    one starting on or before the range's end, found by bisection.
+    """
+
+    def __init__(self):
+        self._bookings = {}  # vehicle_id -> sorted [(start ordinal, end ordinal, reservation_id)]
+        self._lock = threading.Lock()
+
+    def reset(self, reservations):
+        """Replace the booked ranges."""
+        with self._lock:
+            self._bookings = {}
+            for reservation in sorted(reservations, key=self._entry):
+                self._bookings.setdefault(reservation.vehicle_id, []).append(self._entry(reservation))
+
+    def add(self, reservation):
+        """
+        Book a reservation's range.
+
+        Returns:
+            bool: False, leaving the calendar unchanged, if the range
+                overlaps one already booked for the vehicle
+        """
+        entry = self._entry(reservation)
+        with self._lock:
+            bookings = self._bookings.setdefault(reservation.vehicle_id, [])
+            if self._conflict(bookings, entry[0], entry[1]) is not None:
+                return False
+            insort(bookings, entry)
+            return True
+
+    def remove(self, reservation):
+        """Free a reservation's range."""
+        entry = self._entry(reservation)
+        with self._lock:
+            bookings = self._bookings.get(reservation.vehicle_id)
+            if bookings and entry in bookings:
+                bookings.remove(entry)
+                if not bookings:
+                    del self._bookings[reservation.vehicle_id]
+
+    def is_free(self, vehicle_id, start_date, end_date):
+        """Check whether no booking of the vehicle overlaps the range, in O(log k)."""
+        with self._lock:
+            bookings = self._bookings.get(vehicle_id)
+            return not bookings or self._conflict(bookings, start_date.toordinal(), end_date.toordinal()) is None
+
+    def booked_between(self, vehicle_id, start_date, end_date=None):
+        """
+        Get the ids of the reservations overlapping a range, in date order.
+
+        Args:
+            vehicle_id (str): Vehicle ID
+            start_date (datetime): First day of the range
+            end_date (datetime): Last day of the range, or None for a range
+                with no end, such as a rental with no planned return
+
+        Returns:
+            list: Reservation ids, found in O(log k + m) for m results
+        """
+        with self._lock:
+            bookings = self._bookings.get(vehicle_id)
+            if not bookings:
+                return []
+            start = start_date.toordinal()
+            i = len(bookings) if end_date is None else bisect_right(bookings, (end_date.toordinal(), float('inf')))
+            # Ends are sorted like starts, so the overlapping bookings are the last ones before i
+            found = []
+            while i and bookings[i - 1][1] >= start:
+                i -= 1
+                found.append(bookings[i][2])
+            return found[::-1]
+
+    def has_bookings(self, vehicle_id, from_date=None):
+        """Check whether the vehicle has bookings, optionally only those ending on or after from_date."""
+        with self._lock:
+            bookings = self._bookings.get(vehicle_id)
+            if not bookings:
+                return False
+            return from_date is None or bookings[-1][1] >= from_date.toordinal()
+
+    @staticmethod
+    def _entry(reservation):
+        return (reservation.start_date.toordinal(), reservation.end_date.toordinal(), reservation.reservation_id)
+
+    @staticmethod
+    def _conflict(bookings, start, end):
+        i = bisect_right(bookings, (end, float('inf')))
+        if i and bookings[i - 1][1] >= start:
+            return bookings[i - 1][2]
+        return None
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .vehicle import Vehicle
+from .client import Client
+
+logger = logging.getLogger(__name__)
+
+class ShopService:
+    """
+    Asyncio JSON-over-TCP front end serving a Shop to concurrent clients.
+
+    The protocol is one JSON object per line in each direction. A request
+    names an operation and its arguments, e.g.
+    {"op": "rent", "vehicle_id": "V1"}; the reply is {"ok": true,
+    "result": ...} or {"ok": false, "error": "..."}, echoing the request's
+    "id" when one is given. Connections log in with
+    {"op": "login", "user_id": ..., "password": ...}, which returns a
+    session token; the connection keeps using it for the following
+    requests, and a request may also carry a "token" from another
+    connection. Tokens are checked against the shop's session store, so
+    requests after login do no user lookup or password hashing.
+
+    Shop calls run on a thread pool (Shop is thread-safe), so journal syncs
+    and snapshot saves never block the event loop.
+    """
+
+    # op -> (handler method, role required: None, 'client' or 'admin')
+    OPERATIONS = {
+        'ping': ('_op_ping', None),
+        'login': ('_op_login', None),
+        'logout': ('_op_logout', None),
+        'register': ('_op_register', None),
+        'list_available': ('_op_list_available', None),
+        'search': ('_op_search', None),
+        'rent': ('_op_rent', 'client'),
+        'return': ('_op_return', 'client'),
+        'my_rentals': ('_op_my_rentals', 'client'),
+        'reserve': ('_op_reserve', 'client'),
+        'cancel_reservation': ('_op_cancel_reservation', 'client'),
+        'pick_up': ('_op_pick_up', 'client'),
+        'my_reservations': ('_op_my_reservations', 'client'),
+        'add_vehicle': ('_op_add_vehicle', 'admin'),
+        'remove_vehicle': ('_op_remove_vehicle', 'admin'),
+        'list_vehicles': ('_op_list_vehicles', 'admin'),
+        'list_rentals': ('_op_list_rentals', 'admin'),
+        'list_users': ('_op_list_users', 'admin'),
+        'set_rental_limit': ('_op_set_rental_limit', 'admin'),
+        'fleet_stats': ('_op_fleet_stats', 'admin'),
+        'save': ('_op_save', 'admin'),
+    }
+
+    SEARCH_CRITERIA = ('vehicle_type', 'brand', 'min_rate', 'max_rate', 'min_year', 'max_year', 'available',
+                       'start_date', 'end_date', 'sort_by', 'descending', 'limit')
+
+    def __init__(self, shop, host='127.0.0.1', port=8765, save_interval=30.0, max_workers=8):
+        """
+        Initialize a service.
+
+        Args:
+            shop (Shop): Shop to serve
+            host (str): Address to bind, localhost by default
+            port (int): Port to bind, 0 for any free port
+            save_interval (float): Seconds between background saves of
+                changed collections, None to save only on request and stop
+            max_workers (int): Threads running Shop calls
+        """
+        self.shop = shop
+        self.host = host
+        self.port = port
+        self.save_interval = save_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shop')
+        self._server = None
+        self._autosave_task = None
+
+    async def start(self):
+        """Start listening; the bound port is available as self.port."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.save_interval:
+            self._autosave_task = asyncio.create_task(self._autosave())
+
+    async def stop(self):
+        """Stop listening, save pending changes and release the thread pool."""
+        if self._autosave_task is not None:
+            self._autosave_task.cancel()
+            try:
+                await self._autosave_task
+            except asyncio.CancelledError:
+                pass
+            self._autosave_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self._run(self.shop.save_data)
+        self._executor.shutdown()
+
+    async def serve_forever(self):
+        """Start the service and run until cancelled."""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def handle_request(self, session, request):
+        """
+        Execute one request.
+
+        Args:
+            session (dict): Per-connection state; 'token' holds the session
+                token, 'user' is set to its user for the request
+            request (dict): Decoded request
+
+        Returns:
+            dict: Reply to send back
+        """
+        reply = {}
+        if isinstance(request, dict) and 'id' in request:
+            reply['id'] = request['id']
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            op = request.get('op')
+            if op not in self.OPERATIONS:
+                raise ValueError(f"Operation must be one of {', '.join(self.OPERATIONS)}")
+            method, role = self.OPERATIONS[op]
+            token = request.get('token') or session.get('token')
+            user = session['user'] = self.shop.session_user(token) if token else None
+            if role is not None and (user is None or self._role(user) != role):
+                raise PermissionError(f"Operation '{op}' requires a logged-in {role}")
+            result = await self._run(getattr(self, method), session, request)
+        except KeyError as e:
+            reply.update(ok=False, error=f"Missing parameter: {e.args[0]}")
+        except (ValueError, TypeError, PermissionError) as e:
+            reply.update(ok=False, error=str(e))
+        except Exception:
+            # Anything else is a fault of the shop, e.g. a failed save; keep the connection
+            logger.exception("Error handling request %r", request.get('op'))
+            reply.update(ok=False, error="Internal error")
+        else:
+            reply.update(ok=True, result=result)
+        return reply
+
+    async def _handle_connection(self, reader, writer):
+        session = {'token': None, 'user': None}
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the stream limit
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    reply = {'ok': False, 'error': "Invalid JSON"}
+                else:
+                    reply = await self.handle_request(session, request)
+                writer.write(json.dumps(reply, default=str).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _autosave(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self._run(self.shop.save_data)
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    def _role(user):
+        return 'admin' if getattr(user, 'is_admin', False) else 'client'
+
+    # Operations, run on the thread pool
+
+    def _op_ping(self, session, request):
+        return 'pong'
+
+    def _op_login(self, session, request):
+        token = self.shop.login(request['user_id'], request['password'])
+        if token is None:
+            raise PermissionError("Invalid user id or password")
+        user = self.shop.session_user(token)
+        session['token'], session['user'] = token, user
+        return {'user_id': user.user_id, 'name': user.name, 'type': self._role(user), 'token': token}
+
+    def _op_logout(self, session, request):
+        token = request.get('token') or session.get('token')
+        if token:
+            self.shop.logout(token)
+        session['token'] = session['user'] = None
+        return None
+
+    def _op_register(self, session, request):
+        client = Client(request['name'], request['birth_date'], request['user_id'], request['password'])
+        if not self.shop.add_client(client):
+            raise ValueError(f"User {client.user_id} already exists")
+        return {'user_id': client.user_id}
+
+    def _op_list_available(self, session, request):
+        vehicles = self.shop.get_available_vehicles(request.get('start_date'), request.get('end_date'))
+        return [vehicle.to_dict() for vehicle in vehicles]
+
+    def _op_search(self, session, request):
+        criteria = {name: request[name] for name in self.SEARCH_CRITERIA if name in request}
+        return [vehicle.to_dict() for vehicle in self.shop.search_vehicles(**criteria)]
+
+    def _op_rent(self, session, request):
+        user_id = session['user'].user_id
+        rental = self.shop.create_rental(request['vehicle_id'], user_id, request.get('start_date'))
+        if rental is None:
+            raise ValueError(f"Vehicle {request['vehicle_id']} cannot be rented by {user_id}")
+        return rental.to_dict()
+
+    def _op_return(self, session, request):
+        rental = self.shop.get_rental_by_id(request['rental_id'])
+        if rental is None or rental.client_username != session['user'].user_id:
+            raise ValueError(f"No rental {request['rental_id']} for this user")
+        if not self.shop.end_rental(rental.rental_id, request['final_mileage']):
+            raise ValueError(f"Rental {rental.rental_id} cannot be ended")
+        return rental.to_dict()
+
+    def _op_my_rentals(self, session, request):
+        user_id = session['user'].user_id
+        if request.get('active'):
+            rentals = self.shop.get_client_active_rentals(user_id)
+        else:
+            rentals = self.shop.get_client_rentals(user_id)
+        return [rental.to_dict() for rental in rentals]
+
+    def _op_reserve(self, session, request):
+        user_id = session['user'].user_id
+        reservation = self.shop.reserve_vehicle(request['vehicle_id'], user_id,
+                                                request['start_date'], request['end_date'])
+        if reservation is None:
+            raise ValueError(f"Vehicle {request['vehicle_id']} cannot be reserved for those days")
+        return reservation.to_dict()
+
+    def _own_reservation(self, session, request):
+        reservation = self.shop.get_reservation_by_id(request['reservation_id'])
+        if reservation is None or reservation.client_username != session['user'].user_id:
+            raise ValueError(f"No reservation {request['reservation_id']} for this user")
+        return reservation
+
+    def _op_cancel_reservation(self, session, request):
+        reservation = self._own_reservation(session, request)
+        if not self.shop.cancel_reservation(reservation.reservation_id):
+            raise ValueError(f"Reservation {reservation.reservation_id} cannot be cancelled")
+        return None
+
+    def _op_pick_up(self, session, request):
+        reservation = self._own_reservation(session, request)
+        rental = self.shop.start_reservation(reservation.reservation_id, request.get('start_date'))
+        if rental is None:
+            raise ValueError(f"Vehicle {reservation.vehicle_id} cannot be picked up")
+        return rental.to_dict()
+
+    def _op_my_reservations(self, session, request):
+        return [reservation.to_dict() for reservation in self.shop.get_client_reservations(session['user'].user_id)]
+
+    def _op_add_vehicle(self, session, request):
+        vehicle = Vehicle.from_record(request['vehicle'])
+        if not self.shop.add_vehicle(vehicle):
+            raise ValueError(f"Vehicle {vehicle.vehicle_id} already exists")
+        return vehicle.to_dict()
+
+    def _op_remove_vehicle(self, session, request):
+        if not self.shop.remove_vehicle(request['vehicle_id']):
+            raise ValueError(f"Vehicle {request['vehicle_id']} is unknown or rented")
+        return None
+
+    def _op_list_vehicles(self, session, request):
+        return [vehicle.to_dict() for vehicle in list(self.shop.vehicles)]
+
+    def _op_list_rentals(self, session, request):
+        if request.get('active'):
+            rentals = self.shop.get_active_rentals()
+        elif request.get('client_id'):
+            rentals = self.shop.get_client_rentals(request['client_id'])
+        elif request.get('vehicle_id'):
+            rentals = self.shop.get_vehicle_rentals(request['vehicle_id'])
+        else:
+            rentals = list(self.shop.rentals)
+        return [rental.to_dict() for rental in rentals]
+
+    def _op_list_users(self, session, request):
+        users = list(self.shop.clients) + list(self.shop.admins)
+        return [{'user_id': user.user_id, 'name': user.name, 'type': self._role(user)} for user in users]
+
+    def _op_set_rental_limit(self, session, request):
+        if not self.shop.set_client_rental_limit(request['user_id'], request.get('rental_limit')):
+            raise ValueError(f"Unknown client {request['user_id']}")
+        return None
+
+    def _op_fleet_stats(self, session, request):
+        return self.shop.fleet_stats(by_vehicle=bool(request.get('by_vehicle', True)))
+
+    def _op_save(self, session, request):
+        self.shop.save_data(force=bool(request.get('force')))
+        return None
@@ -0,0 +1,96 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+class SessionStore:
+    """
+    Bounded store of login sessions with sliding expiry. Thread-safe.
+
+    Sessions are kept in an OrderedDict from least to most recently used.
+    Every session has the same time to live, refreshed on use, so that
+    order is also expiry order: expired sessions are always at the front,
+    and so is the least recently used one to evict when the store is full.
+    Validating a token is one dict lookup.
+    """
+
+    def __init__(self, ttl=1800.0, max_sessions=10000, clock=time.monotonic):
+        """
+        Initialize a session store.
+
+        Args:
+            ttl (float): Seconds a session lives after its last use
+            max_sessions (int): Sessions kept before the least recently used is evicted
+            clock (callable): Time source, in seconds
+        """
+        if ttl <= 0 or max_sessions <= 0:
+            raise ValueError("Session TTL and capacity must be positive")
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = OrderedDict()  # token -> (user, expiry)
+        self._by_user = {}              # user_id -> {token}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, user):
+        """
+        Open a session for an authenticated user.
+
+        Returns:
+            str: Session token
+        """
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            now = self._clock()
+            self._evict_expired(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+            self._sessions[token] = (user, now + self.ttl)
+            self._by_user.setdefault(user.user_id, set()).add(token)
+        return token
+
+    def get(self, token):
+        """Get the user of a live session and extend it, or None if unknown or expired."""
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            user, expiry = entry
+            now = self._clock()
+            if expiry <= now:
+                self._drop(token)
+                return None
+            self._sessions[token] = (user, now + self.ttl)
+            self._sessions.move_to_end(token)
+            return user
+
+    def revoke(self, token):
+        """End a session. Returns False if there was none."""
+        with self._lock:
+            if token not in self._sessions:
+                return False
+            self._drop(token)
+            return True
+
+    def revoke_user(self, user_id):
+        """End every session of a user."""
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+
+    def _evict_expired(self, now):
+        while self._sessions:
+            token = next(iter(self._sessions))
+            if self._sessions[token][1] > now:
+                break
+            self._drop(token)
+
+    def _drop(self, token):
+        user, _ = self._sessions.pop(token)
+        tokens = self._by_user[user.user_id]
+        tokens.discard(token)
+        if not tokens:
+            del self._by_user[user.user_id]
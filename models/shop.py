@@ -1,234 +1,1202 @@
-import os
-import csv
-from datetime import datetime
+import heapq
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import date, datetime
+from operator import attrgetter
 from .vehicle import Vehicle
-from .car import Car
-from .motorbike import Motorbike
-from .truck import Truck
 from .user import User
 from .client import Client
 from .admin import Admin
 from .rental import Rental
+from .reservation import Reservation
+from .reservation_calendar import ReservationCalendar
+from .due_date_index import DueDateIndex
+from .vehicle_index import VehicleIndex
+from .fleet_stats import FleetStats
+from .passwords import hash_password
+from .sessions import SessionStore
+from .csv_repository import CsvRepository
+from .locks import LockTable, SharedLock
+
+_start_date = attrgetter('start_date')
+
+
+def _as_datetime(value):
+    """Accept a date, a datetime or a YYYY-MM-DD string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.fromordinal(value.toordinal())
+    return datetime.strptime(value, "%Y-%m-%d")
+
 
 class Shop:
-    """Shop management class that handles the operations of the rental shop."""
+    """
+    Shop management class that handles the operations of the rental shop.
     
-    def __init__(self, name):
+    Shop is thread-safe. Mutations lock only the vehicles and users they
+    touch (vehicle locks first, then user locks), so unrelated rentals
+    proceed in parallel; they all hold a shared state lock that loading,
+    saving and archiving take exclusively. Queries do not lock.
+    """
+    
+    COLLECTIONS = {'vehicles', 'users', 'rentals', 'reservations'}
+    
+    def __init__(self, name, data_dir="data", journal=False, journal_fsync='always', repository=None,
+                 session_ttl=1800.0, max_sessions=10000):
         """
         Initialize a shop with the given name.
         
         Args:
             name (str): Shop name
+            data_dir (str): Directory holding the CSV data files
+            journal (bool): Append every mutation to a write-ahead journal
+                so it is durable without rewriting the CSV files
+            journal_fsync (str): Journal fsync policy ('always', 'interval' or 'never')
+            repository (Repository): Storage backend; defaults to a
+                CsvRepository built from the arguments above
+            session_ttl (float): Seconds a login session lives after its last use
+            max_sessions (int): Login sessions kept before the least recently used is evicted
         """
         self.name = name
         self.vehicles = []
         self.clients = []
         self.admins = []
         self.rentals = []
-        self.data_dir = "data"
-        os.makedirs(self.data_dir, exist_ok=True)
+        self.reservations = []
+        # Primary-key registries kept in sync with the lists above
+        self._vehicles_by_id = {}
+        self._clients_by_id = {}
+        self._admins_by_id = {}
+        self._rentals_by_id = {}
+        self._reservations_by_id = {}
+        # Open rentals: vehicle_id -> Rental, user_id -> {rental_id: Rental}
+        self._active_by_vehicle = {}
+        self._active_by_client = {}
+        # Rental history per client / per vehicle, ordered by start_date
+        self._rentals_by_client = {}
+        self._rentals_by_vehicle = {}
+        # Rental counters per vehicle and per type for fleet_stats
+        self._fleet_stats = FleetStats()
+        # Vehicles by type, brand and daily rate for search_vehicles
+        self._vehicle_index = VehicleIndex()
+        # Reserved day ranges per vehicle
+        self._calendar = ReservationCalendar()
+        # Vehicles ordered by next ITV / maintenance date
+        self._itv_index = DueDateIndex(lambda vehicle, as_of: vehicle.next_itv_date(as_of),
+                                       lambda vehicle, as_of: vehicle.next_itv_date_valid_until(as_of))
+        self._maintenance_index = DueDateIndex(lambda vehicle, as_of: vehicle.next_maintenance_date(as_of),
+                                               lambda vehicle, as_of: vehicle.next_maintenance_date_valid_until(as_of))
+        # Login sessions: token -> user
+        self.sessions = SessionStore(ttl=session_ttl, max_sessions=max_sessions)
+        self.data_dir = data_dir
+        self.repository = repository or CsvRepository(data_dir, journal=journal, journal_fsync=journal_fsync)
+        self._replaying = False
+        # Collections changed since the last save: 'vehicles', 'users', 'rentals', 'reservations'
+        self._dirty = set()
+        self._state_lock = SharedLock()
+        self._vehicle_locks = LockTable()
+        self._user_locks = LockTable()
+        self._save_lock = threading.Lock()
         self.load_data()
     
     def load_data(self):
-        """Load data from CSV files."""
-        try:
-            self._load_vehicles()
-            self._load_users()
-            self._load_rentals()
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            # Initialize with empty data if loading fails
-            self.vehicles = []
-            self.clients = []
-            self.admins = []
-            self.rentals = []
-    
-    def save_data(self):
-        """Save data to CSV files."""
-        os.makedirs(self.data_dir, exist_ok=True)
-        
-        self._save_vehicles()
-        self._save_users()
-        self._save_rentals()
+        """Load data from the repository, then replay any journaled mutations on top."""
+        with self._state_lock.exclusive():
+            try:
+                vehicles, users, rentals = self.repository.load()
+                self._load_vehicles(vehicles)
+                self._load_users(users)
+                self._load_rentals(rentals)
+                self._load_reservations(self.repository.load_reservations())
+                self._dirty = set()
+                self._replay_journal()
+            except Exception as e:
+                print(f"Error loading data: {e}")
+                # Initialize with empty data if loading fails
+                self.vehicles = []
+                self.clients = []
+                self.admins = []
+                self.rentals = []
+                self.reservations = []
+                self._rebuild_indexes()
+    
+    def save_data(self, force=False):
+        """
+        Save data through the repository.
+        
+        Only the collections changed since the last save are written. With
+        the CSV repository each file is rewritten atomically and the journal
+        is then compacted; a write-through repository has nothing left to do.
+        
+        Mutations are only paused while the state is copied; those made
+        while the files are written are kept by the repository's checkpoint.
+        
+        Args:
+            force (bool): Write every collection even if nothing changed
+        """
+        with self._save_lock:
+            with self._state_lock.exclusive():
+                if force:
+                    collections = self.COLLECTIONS
+                elif self.repository.writes_through:
+                    collections = set()
+                else:
+                    collections = self._dirty
+                self.repository.checkpoint()
+                vehicles, users, rentals = list(self.vehicles), self.clients + self.admins, list(self.rentals)
+                reservations = list(self.reservations)
+                self._dirty = set()
+            try:
+                if 'reservations' in collections:
+                    self.repository.save_reservations(reservations)
+                self.repository.save(vehicles, users, rentals, collections)
+            except Exception:
+                self._dirty.update(collections)
+                raise
+
+    def close(self):
+        """Release the repository's files or connections."""
+        self.repository.close()
     
     def add_vehicle(self, vehicle):
         """Add a vehicle to the shop."""
-        if any(v.vehicle_id == vehicle.vehicle_id for v in self.vehicles):
-            return False
-        self.vehicles.append(vehicle)
-        return True
+        with self._locked(vehicle_ids=[vehicle.vehicle_id]):
+            if vehicle.vehicle_id in self._vehicles_by_id:
+                return False
+            self._log('add_vehicle', vehicle.to_dict())
+            self._vehicles_by_id[vehicle.vehicle_id] = vehicle
+            self.vehicles.append(vehicle)
+            self._index_vehicle(vehicle)
+            self._dirty.add('vehicles')
+            return True
     
     def remove_vehicle(self, vehicle_id):
         """Remove a vehicle from the shop."""
-        vehicle = self.get_vehicle_by_id(vehicle_id)
-        if not vehicle or any(r.is_active() for r in self.rentals if r.vehicle_id == vehicle_id):
-            return False
-        self.vehicles.remove(vehicle)
-        return True
+        with self._locked(vehicle_ids=[vehicle_id]):
+            vehicle = self.get_vehicle_by_id(vehicle_id)
+            if not vehicle or vehicle_id in self._active_by_vehicle:
+                return False
+            if self._calendar.has_bookings(vehicle_id, from_date=datetime.now()):
+                return False
+            self._log('remove_vehicle', {'vehicle_id': vehicle_id})
+            del self._vehicles_by_id[vehicle_id]
+            self.vehicles.remove(vehicle)
+            self._unindex_vehicle(vehicle)
+            self._fleet_stats.remove_vehicle(vehicle_id)
+            self._dirty.add('vehicles')
+            return True
     
     def get_vehicle_by_id(self, vehicle_id):
         """Get a vehicle by ID."""
-        return next((v for v in self.vehicles if v.vehicle_id == vehicle_id), None)
+        return self._vehicles_by_id.get(vehicle_id)
     
     def add_client(self, client):
-        """Add a client to the shop."""
-        if any(c.user_id == client.user_id for c in self.clients):
-            return False
-        self.clients.append(client)
-        return True
+        """Add a client to the shop, storing a salted hash of a plain text password."""
+        with self._locked(user_ids=[client.user_id]):
+            if client.user_id in self._clients_by_id:
+                return False
+            self._hash_new_password(client)
+            self._log('add_user', client.to_dict())
+            client.active_rental_count = len(self._active_by_client.get(client.user_id, ()))
+            self._clients_by_id[client.user_id] = client
+            self.clients.append(client)
+            self._dirty.add('users')
+            return True
     
     def remove_client(self, user_id):
-        """Remove a client from the shop."""
+        """Remove a client from the shop, cancelling their reservations."""
+        while True:
+            vehicle_ids = {reservation.vehicle_id for reservation in self.get_client_reservations(user_id)}
+            with self._locked(vehicle_ids=vehicle_ids, user_ids=[user_id]):
+                reservations = self.get_client_reservations(user_id)
+                if {reservation.vehicle_id for reservation in reservations} <= vehicle_ids:
+                    return self._remove_client(user_id, reservations)
+            # A reservation was made meanwhile; lock its vehicle too
+
+    def _remove_client(self, user_id, reservations):
+        """Remove a client whose user lock and reserved vehicles' locks are held."""
         client = self.get_client_by_id(user_id)
-        if not client or any(r.is_active() for r in self.rentals if r.client_username == user_id):
+        if not client or self._active_by_client.get(user_id):
             return False
+        for reservation in reservations:
+            self._log('cancel_reservation', {'reservation_id': reservation.reservation_id})
+            self._remove_reservation(reservation)
+        self._log('remove_client', {'user_id': user_id})
+        del self._clients_by_id[user_id]
         self.clients.remove(client)
+        self.sessions.revoke_user(user_id)
+        self._dirty.add('users')
         return True
     
     def get_client_by_id(self, user_id):
         """Get a client by ID."""
-        return next((c for c in self.clients if c.user_id == user_id), None)
+        return self._clients_by_id.get(user_id)
+    
+    def set_client_rental_limit(self, user_id, rental_limit):
+        """
+        Set how many rentals a client may have open at once, e.g. for a corporate account.
+        
+        Rentals already open are kept when the limit is lowered below their number.
+        
+        Args:
+            user_id (str): Client ID
+            rental_limit (int): Maximum number of active rentals, or None for
+                the default Client.MAX_ACTIVE_RENTALS
+        
+        Returns:
+            bool: False if the client does not exist
+        """
+        with self._locked(user_ids=[user_id]):
+            client = self.get_client_by_id(user_id)
+            if not client:
+                return False
+            rental_limit = Client._validate_rental_limit(rental_limit)
+            self._log('set_rental_limit', {'user_id': user_id, 'rental_limit': rental_limit})
+            client.set_rental_limit(rental_limit)
+            self._dirty.add('users')
+            return True
     
     def add_admin(self, admin):
-        """Add an admin to the shop."""
-        if any(a.user_id == admin.user_id for a in self.admins):
-            return False
-        self.admins.append(admin)
-        return True
+        """Add an admin to the shop, storing a salted hash of a plain text password."""
+        with self._locked(user_ids=[admin.user_id]):
+            if admin.user_id in self._admins_by_id:
+                return False
+            self._hash_new_password(admin)
+            self._log('add_user', admin.to_dict())
+            self._admins_by_id[admin.user_id] = admin
+            self.admins.append(admin)
+            self._dirty.add('users')
+            return True
     
     def remove_admin(self, admin_id):
         """Remove an admin from the shop."""
-        for i, admin in enumerate(self.admins):
-            if admin.user_id == admin_id:
-                self.admins.pop(i)
-                return True
-        return False
+        with self._locked(user_ids=[admin_id]):
+            admin = self._admins_by_id.get(admin_id)
+            if admin is None:
+                return False
+            self._log('remove_admin', {'user_id': admin_id})
+            del self._admins_by_id[admin_id]
+            self.admins.remove(admin)
+            self.sessions.revoke_user(admin_id)
+            self._dirty.add('users')
+            return True
     
     def get_admin_by_id(self, user_id):
         """Get an admin by ID."""
-        return next((a for a in self.admins if a.user_id == user_id), None)
+        return self._admins_by_id.get(user_id)
     
-    def create_rental(self, vehicle_id, user_id, start_date=None):
-        """Create a new rental."""
-        vehicle = self.get_vehicle_by_id(vehicle_id)
-        client = self.get_client_by_id(user_id)
+    def login(self, user_id, password):
+        """
+        Authenticate a client or admin and open a session.
         
-        if not vehicle or not client:
-            return None
+        The user is found through the ID registries and the password
+        checked against its salted hash. A legacy plain text password is
+        replaced by its hash on the first successful login.
         
-        if any(r.is_active() for r in self.rentals if r.vehicle_id == vehicle_id):
-            return None
+        Args:
+            user_id (str): Client or admin ID
+            password (str): Plain text password
         
-        if not client.can_rent_vehicle(vehicle):
+        Returns:
+            str: Session token for session_user, or None if the credentials are wrong
+        """
+        user = self._clients_by_id.get(user_id) or self._admins_by_id.get(user_id)
+        if user is None or not user.authenticate(password):
             return None
+        if not user.has_password_hash():
+            self._set_password_hash(user_id, hash_password(password))
+        return self.sessions.create(user)
+    
+    def session_user(self, token):
+        """Get the user of a live session in O(1), with no password check, or None."""
+        return self.sessions.get(token)
+    
+    def logout(self, token):
+        """End a session. Returns False if it was unknown or had expired."""
+        return self.sessions.revoke(token)
+    
+    def set_user_password(self, user_id, password):
+        """
+        Change the password of a client or admin and end their sessions.
         
-        start_date = start_date or datetime.now()
-        rental = Rental.create(user_id, vehicle_id, start_date)
+        Returns:
+            bool: False if the user does not exist
+        """
+        if not self._set_password_hash(user_id, hash_password(password)):
+            return False
+        self.sessions.revoke_user(user_id)
+        return True
+    
+    @staticmethod
+    def _hash_new_password(user):
+        """Hash the password of a user being added, so plain text never reaches the repository."""
+        if not user.has_password_hash():
+            user.set_password(user.password)
+
+    def _set_password_hash(self, user_id, password_hash):
+        """Store a password hash for a user."""
+        with self._locked(user_ids=[user_id]):
+            user = self._clients_by_id.get(user_id) or self._admins_by_id.get(user_id)
+            if user is None:
+                return False
+            self._log('set_password', {'user_id': user_id, 'password': password_hash})
+            user.password = password_hash
+            self._dirty.add('users')
+            return True
+    
+    def create_rental(self, vehicle_id, user_id, start_date=None):
+        """Create a new rental, refused if another client has reserved the vehicle from its start on."""
+        return self._create_rental(vehicle_id, user_id, start_date)
+
+    def _create_rental(self, vehicle_id, user_id, start_date, expected_return=None):
+        """Create a rental, checking other clients' reservations up to expected_return (None: no end)."""
+        with self._locked(vehicle_ids=[vehicle_id], user_ids=[user_id]):
+            vehicle = self.get_vehicle_by_id(vehicle_id)
+            client = self.get_client_by_id(user_id)
+            
+            if not vehicle or not client:
+                return None
+            
+            start_date = start_date or datetime.now()
+            if not self.is_vehicle_available(vehicle_id):
+                return None
+            if self._reserved_by_other(vehicle_id, user_id, start_date, expected_return):
+                return None
+            
+            if not client.can_rent_vehicle(vehicle):
+                return None
+            
+            rental = Rental.create(user_id, vehicle_id, start_date)
+            rental.initial_mileage = vehicle.mileage
+            self._log('create_rental', rental.to_dict())
+            self._add_rental(rental)
+            return rental
+
+    def _add_rental(self, rental):
+        """Register a rental in the rental list and every rental index."""
+        self._rentals_by_id[rental.rental_id] = rental
         self.rentals.append(rental)
-        return rental
+        self._index_rental_history(rental)
+        self._index_active_rental(rental)
+        vehicle = self.get_vehicle_by_id(rental.vehicle_id)
+        if vehicle:
+            self._fleet_stats.open(rental, vehicle)
+        self._dirty.add('rentals')
     
     def end_rental(self, rental_id, final_mileage):
         """End a rental and update vehicle mileage."""
         rental = self.get_rental_by_id(rental_id)
-        if not rental or not rental.is_active():
+        if not rental:
             return False
         
-        vehicle = self.get_vehicle_by_id(rental.vehicle_id)
-        if not vehicle:
+        with self._locked(vehicle_ids=[rental.vehicle_id], user_ids=[rental.client_username]):
+            if not rental.is_active():
+                return False
+            
+            vehicle = self.get_vehicle_by_id(rental.vehicle_id)
+            if not vehicle:
+                return False
+            
+            previous_state = (rental.end_date, rental.final_mileage, rental.return_date)
+            if not rental.end_rental(final_mileage):
+                return False
+            try:
+                self._log('end_rental', {
+                    'rental_id': rental_id,
+                    'final_mileage': final_mileage,
+                    'return_date': rental.return_date.strftime("%Y-%m-%d")
+                })
+            except Exception:
+                rental.end_date, rental.final_mileage, rental.return_date = previous_state
+                raise
+            vehicle.mileage = final_mileage
+            self._unindex_active_rental(rental)
+            self._fleet_stats.close(rental, vehicle)
+            self._dirty.update(('rentals', 'vehicles'))
+            return True
+
+    def create_rentals_bulk(self, items, start_date=None):
+        """
+        Create several rentals at once, all or nothing.
+
+        The whole batch is validated first, then recorded to the repository
+        as a single mutation.
+
+        Args:
+            items (iterable): (vehicle_id, user_id) pairs
+            start_date (datetime or str): Start date of every rental, defaults to now
+
+        Returns:
+            tuple: (rentals, failures) where failures maps the position of
+                each rejected item to the reason. When any item is rejected
+                no rental is created and rentals is empty.
+        """
+        items = list(items)
+        with self._locked(vehicle_ids=[vehicle_id for vehicle_id, _ in items],
+                          user_ids=[user_id for _, user_id in items]):
+            failures = {}
+            taken = set()
+            pending = {}
+            start_date = start_date or datetime.now()
+            for i, (vehicle_id, user_id) in enumerate(items):
+                vehicle = self.get_vehicle_by_id(vehicle_id)
+                client = self.get_client_by_id(user_id)
+                if not vehicle:
+                    failures[i] = f"Unknown vehicle {vehicle_id}"
+                elif not client:
+                    failures[i] = f"Unknown client {user_id}"
+                elif vehicle_id in taken or not self.is_vehicle_available(vehicle_id):
+                    failures[i] = f"Vehicle {vehicle_id} is already rented"
+                elif self._reserved_by_other(vehicle_id, user_id, start_date):
+                    failures[i] = f"Vehicle {vehicle_id} is reserved"
+                elif not client.can_rent_vehicle(vehicle, pending=pending.get(user_id, 0)):
+                    failures[i] = f"Client {user_id} cannot rent vehicle {vehicle_id}"
+                taken.add(vehicle_id)
+                pending[user_id] = pending.get(user_id, 0) + 1
+            if failures or not items:
+                return [], failures
+
+            rentals = [Rental.create(user_id, vehicle_id, start_date) for vehicle_id, user_id in items]
+            for rental in rentals:
+                rental.initial_mileage = self._vehicles_by_id[rental.vehicle_id].mileage
+            self._log('create_rentals', {'rentals': [rental.to_dict() for rental in rentals]})
+            for rental in rentals:
+                self._add_rental(rental)
+            return rentals, {}
+
+    def end_rentals_bulk(self, items):
+        """
+        End several rentals at once, all or nothing.
+
+        The whole batch is validated first, then recorded to the repository
+        as a single mutation.
+
+        Args:
+            items (iterable): (rental_id, final_mileage) pairs
+
+        Returns:
+            tuple: (rentals, failures) where failures maps the position of
+                each rejected item to the reason. When any item is rejected
+                no rental is ended and rentals is empty.
+        """
+        items = list(items)
+        found = [self.get_rental_by_id(rental_id) for rental_id, _ in items]
+        rentals = [rental for rental in found if rental]
+        with self._locked(vehicle_ids=[rental.vehicle_id for rental in rentals],
+                          user_ids=[rental.client_username for rental in rentals]):
+            failures = {}
+            seen = set()
+            previous_states = [(rental.end_date, rental.final_mileage, rental.return_date) if rental else None
+                               for rental in found]
+
+            def restore():
+                for rental, state in zip(found, previous_states):
+                    if rental:
+                        rental.end_date, rental.final_mileage, rental.return_date = state
+
+            for i, ((rental_id, final_mileage), rental) in enumerate(zip(items, found)):
+                if not rental:
+                    failures[i] = f"Unknown rental {rental_id}"
+                elif rental_id in seen or not rental.is_active():
+                    failures[i] = f"Rental {rental_id} is not active"
+                elif not self.get_vehicle_by_id(rental.vehicle_id):
+                    failures[i] = f"Unknown vehicle {rental.vehicle_id}"
+                else:
+                    try:
+                        rental.end_rental(final_mileage)
+                    except ValueError as e:
+                        failures[i] = str(e)
+                seen.add(rental_id)
+            if failures or not items:
+                restore()
+                return [], failures
+            try:
+                self._log('end_rentals', {'returns': [{
+                    'rental_id': rental.rental_id,
+                    'final_mileage': rental.final_mileage,
+                    'return_date': rental.return_date.strftime("%Y-%m-%d")
+                } for rental in found]})
+            except Exception:
+                restore()
+                raise
+            for rental in found:
+                vehicle = self.get_vehicle_by_id(rental.vehicle_id)
+                vehicle.mileage = rental.final_mileage
+                self._unindex_active_rental(rental)
+                self._fleet_stats.close(rental, vehicle)
+            self._dirty.update(('rentals', 'vehicles'))
+            return found, {}
+
+    def reserve_vehicle(self, vehicle_id, user_id, start_date, end_date):
+        """
+        Book a vehicle for a client over a range of days, both ends included.
+        
+        Args:
+            vehicle_id (str): Vehicle ID
+            user_id (str): Client ID
+            start_date (date, datetime or str): First day of the reservation
+            end_date (date, datetime or str): Last day of the reservation
+        
+        Returns:
+            Reservation: The new reservation, or None if the vehicle or
+                client is unknown, or the vehicle is rented or reserved
+                on any of those days
+        
+        Raises:
+            ValueError: If start_date is in the past or end_date is before start_date
+        """
+        with self._locked(vehicle_ids=[vehicle_id], user_ids=[user_id]):
+            vehicle = self.get_vehicle_by_id(vehicle_id)
+            client = self.get_client_by_id(user_id)
+            if not vehicle or not client:
+                return None
+            
+            reservation = Reservation.create(user_id, vehicle_id, start_date, end_date)
+            if reservation.start_date.date() < date.today():
+                raise ValueError("Reservations cannot start in the past")
+            if not self._is_free(vehicle_id, reservation.start_date, reservation.end_date):
+                return None
+            self._log('create_reservation', reservation.to_dict())
+            self._add_reservation(reservation)
+            return reservation
+
+    def cancel_reservation(self, reservation_id):
+        """Cancel a reservation, freeing its days."""
+        reservation = self.get_reservation_by_id(reservation_id)
+        if not reservation:
             return False
         
-        if rental.end_rental(final_mileage):
-            vehicle.mileage = final_mileage
+        with self._locked(vehicle_ids=[reservation.vehicle_id], user_ids=[reservation.client_username]):
+            if reservation_id not in self._reservations_by_id:
+                return False
+            self._log('cancel_reservation', {'reservation_id': reservation_id})
+            self._remove_reservation(reservation)
             return True
-        return False
-    
+
+    def start_reservation(self, reservation_id, start_date=None):
+        """
+        Turn a reservation into a rental when the client picks the vehicle up.
+        
+        The rental is expected back by the reservation's last day, so only
+        other clients' reservations before that day stand in its way.
+        
+        Args:
+            reservation_id (str): Reservation ID
+            start_date (datetime or str): Start of the rental, defaults to now
+        
+        Returns:
+            Rental: The new rental, or None if the reservation is unknown or
+                the vehicle cannot be rented
+        """
+        reservation = self.get_reservation_by_id(reservation_id)
+        if not reservation:
+            return None
+        
+        with self._locked(vehicle_ids=[reservation.vehicle_id], user_ids=[reservation.client_username]):
+            if reservation_id not in self._reservations_by_id:
+                return None
+            rental = self._create_rental(reservation.vehicle_id, reservation.client_username, start_date,
+                                         expected_return=reservation.end_date)
+            if rental is not None:
+                self.cancel_reservation(reservation_id)
+            return rental
+
+    def get_reservation_by_id(self, reservation_id):
+        """Get a reservation by ID."""
+        return self._reservations_by_id.get(reservation_id)
+
+    def get_vehicle_reservations(self, vehicle_id):
+        """Get the reservations of a vehicle ordered by start date."""
+        return sorted((r for r in self.reservations if r.vehicle_id == vehicle_id), key=_start_date)
+
+    def get_client_reservations(self, user_id):
+        """Get the reservations of a client ordered by start date."""
+        return sorted((r for r in self.reservations if r.client_username == user_id), key=_start_date)
+
     def get_rental_by_id(self, rental_id):
         """Get a rental by ID."""
-        return next((r for r in self.rentals if r.rental_id == rental_id), None)
+        rental = self._rentals_by_id.get(rental_id)
+        if rental is None and not self.repository.history_in_memory:
+            rental = self.repository.get_rental(rental_id)
+        return rental
     
     def get_active_rentals(self):
         """Get all active rentals."""
-        return [r for r in self.rentals if r.is_active()]
+        return list(self._active_by_vehicle.values())
+
+    def get_client_active_rentals(self, user_id):
+        """Get the active rentals of a client."""
+        return list(self._active_by_client.get(user_id, {}).values())
+
+    def is_vehicle_available(self, vehicle_id, start_date=None, end_date=None):
+        """
+        Check whether a vehicle has no active rental, and no reservation in a range.
+        
+        Args:
+            vehicle_id (str): Vehicle ID
+            start_date (date, datetime or str): First day of the range; None only
+                checks for an active rental
+            end_date (date, datetime or str): Last day of the range, defaults to start_date
+        """
+        if start_date is None:
+            return vehicle_id not in self._active_by_vehicle
+        start_date = _as_datetime(start_date)
+        end_date = _as_datetime(end_date) if end_date else start_date
+        return self._is_free(vehicle_id, start_date, end_date)
     
     def get_client_rentals(self, user_id):
-        """Get all rentals for a client."""
-        return [r for r in self.rentals if r.client_username == user_id]
+        """Get all rentals for a client, archived ones included, ordered by start date."""
+        if not self.repository.history_in_memory:
+            return self._in_memory(self.repository.client_rentals(user_id))
+        archive = self.repository.archive
+        archived = archive.client_rentals(user_id) if archive else ()
+        return self._merge_archived(self._rentals_by_client.get(user_id, ()), archived)
     
     def get_vehicle_rentals(self, vehicle_id):
-        """Get all rentals for a vehicle."""
-        return [r for r in self.rentals if r.vehicle_id == vehicle_id]
+        """Get all rentals for a vehicle, archived ones included, ordered by start date."""
+        if not self.repository.history_in_memory:
+            return self._in_memory(self.repository.vehicle_rentals(vehicle_id))
+        archive = self.repository.archive
+        archived = archive.vehicle_rentals(vehicle_id) if archive else ()
+        return self._merge_archived(self._rentals_by_vehicle.get(vehicle_id, ()), archived)
+
+    def get_vehicle_rentals_between(self, vehicle_id, start_date, end_date):
+        """
+        Get the rentals of a vehicle that overlap the given period.
+        
+        Args:
+            vehicle_id (str): Vehicle ID
+            start_date (datetime or str): First day of the period (YYYY-MM-DD)
+            end_date (datetime or str): Last day of the period (YYYY-MM-DD)
+        
+        Returns:
+            list: Matching rentals ordered by start date
+        """
+        start_date = datetime.fromordinal(_as_datetime(start_date).toordinal())
+        end_date = _as_datetime(end_date)
+        if not self.repository.history_in_memory:
+            return self._in_memory(self.repository.vehicle_rentals_between(vehicle_id, start_date, end_date))
+        history = self._rentals_by_vehicle.get(vehicle_id, [])
+        # Rentals carry the time of day, so the last day ends at the next midnight
+        lo = bisect_left(history, start_date, key=_start_date)
+        hi = bisect_left(history, datetime.fromordinal(end_date.toordinal() + 1), key=_start_date)
+        result = history[lo:hi]
+        # A vehicle is rented once at a time, so only the rental starting
+        # right before the period can still be running into it.
+        if lo > 0:
+            previous = history[lo - 1]
+            if previous.end_date is None or previous.end_date >= start_date:
+                result.insert(0, previous)
+        archive = self.repository.archive
+        if archive:
+            result = self._merge_archived(result, archive.vehicle_rentals_between(vehicle_id, start_date, end_date))
+        return result
+
+    def archive_rentals(self, before):
+        """
+        Move the rentals that ended before a date out of memory into the archive.
+        
+        The rentals are written to the repository's compressed, monthly
+        partitioned archive, dropped from memory, and the shop is saved so
+        rentals.csv only keeps the hot set. History queries keep returning
+        archived rentals, reading the partitions they need on demand.
+        
+        Args:
+            before (datetime or str): Archive rentals that ended before this date (YYYY-MM-DD)
+        
+        Returns:
+            int: Number of rentals archived
+        """
+        archive = self.repository.archive
+        if archive is None:
+            raise ValueError("The repository does not support archiving rentals")
+        before = _as_datetime(before)
+        with self._state_lock.exclusive():
+            cold = [r for r in self.rentals if not r.is_active() and r.end_date < before]
+            if not cold:
+                return 0
+            archive.archive(cold)
+            
+            for rental in cold:
+                del self._rentals_by_id[rental.rental_id]
+            self._fleet_stats.discard(cold, self._vehicles_by_id)
+            self.rentals = [r for r in self.rentals if r.rental_id in self._rentals_by_id]
+            for history, key in ((self._rentals_by_client, 'client_username'),
+                                 (self._rentals_by_vehicle, 'vehicle_id')):
+                for owner in {getattr(rental, key) for rental in cold}:
+                    remaining = [r for r in history[owner] if r.rental_id in self._rentals_by_id]
+                    if remaining:
+                        history[owner] = remaining
+                    else:
+                        del history[owner]
+            self._dirty.add('rentals')
+        self.save_data()
+        return len(cold)
+
+    def iter_rental_history(self, client_id=None, vehicle_id=None, start_date=None, end_date=None):
+        """
+        Stream the stored rental history at constant memory.
+        
+        With the CSV repository this reads the archive and rentals.csv, so
+        changes not yet written by save_data are not included. Stop iterating at any time
+        to stop reading.
+        
+        Args:
+            client_id (str): Only rentals of this client
+            vehicle_id (str): Only rentals of this vehicle
+            start_date (datetime or str): Only rentals starting on or after this date
+            end_date (datetime or str): Only rentals starting on or before this date
+        
+        Yields:
+            Rental: Matching rentals in storage order
+        """
+        return self.repository.iter_rentals(
+            client_id=client_id,
+            vehicle_id=vehicle_id,
+            start_date=_as_datetime(start_date) if start_date else None,
+            end_date=_as_datetime(end_date) if end_date else None
+        )
     
-    def get_available_vehicles(self):
-        """Get all vehicles that are not currently rented."""
-        return [v for v in self.vehicles if not any(r.is_active() for r in self.rentals if r.vehicle_id == v.vehicle_id)]
+    def count_rentals_by_client(self, **filters):
+        """
+        Count the saved rentals of each client in a single streaming pass.
+        
+        Args:
+            **filters: Same filters as iter_rental_history
+        
+        Returns:
+            dict: client ID -> number of rentals
+        """
+        counts = {}
+        for rental in self.iter_rental_history(**filters):
+            counts[rental.client_username] = counts.get(rental.client_username, 0) + 1
+        return counts
+    
+    def revenue_by_month(self, **filters):
+        """
+        Sum the revenue of saved, closed rentals by start month in a single streaming pass.
+        
+        Args:
+            **filters: Same filters as iter_rental_history
+        
+        Returns:
+            dict: 'YYYY-MM' -> revenue
+        """
+        revenue = {}
+        for rental in self.iter_rental_history(**filters):
+            vehicle = self.get_vehicle_by_id(rental.vehicle_id)
+            if rental.is_active() or vehicle is None:
+                continue
+            month = rental.start_date.strftime("%Y-%m")
+            revenue[month] = revenue.get(month, 0) + vehicle.calculate_rental_cost(rental.calculate_duration())
+        return revenue
+    
+    def get_available_vehicles(self, start_date=None, end_date=None):
+        """
+        Get the vehicles that are not currently rented, or free over a range of days.
+        
+        With a range, each vehicle is checked against its reservation
+        calendar by bisection, in O(V log k) for V vehicles holding at most
+        k reservations each.
+        
+        Args:
+            start_date (date, datetime or str): First day of the range; None for
+                the vehicles not currently rented
+            end_date (date, datetime or str): Last day of the range, defaults to start_date
+        """
+        if start_date is None:
+            return [v for v in self.vehicles if v.vehicle_id not in self._active_by_vehicle]
+        start_date = _as_datetime(start_date)
+        end_date = _as_datetime(end_date) if end_date else start_date
+        return [v for v in self.vehicles if self._is_free(v.vehicle_id, start_date, end_date)]
     
     def get_vehicles_by_type(self, vehicle_type):
         """Get all vehicles of a specific type."""
-        if vehicle_type == 'Car':
-            return [v for v in self.vehicles if isinstance(v, Car)]
-        elif vehicle_type == 'Motorbike':
-            return [v for v in self.vehicles if isinstance(v, Motorbike)]
-        elif vehicle_type == 'Truck':
-            return [v for v in self.vehicles if isinstance(v, Truck)]
-        else:
-            return []
+        return self._vehicle_index.of_type(vehicle_type)
     
-    def get_vehicles_needing_itv(self, days_threshold=30):
-        """Get all vehicles that need ITV within the given days threshold."""
-        today = datetime.now()
-        vehicles_needing_itv = []
+    def search_vehicles(self, vehicle_type=None, brand=None, min_rate=None, max_rate=None, min_year=None,
+                        max_year=None, available=None, start_date=None, end_date=None, sort_by='daily_rate',
+                        descending=False, limit=None):
+        """
+        Search the fleet by several attributes at once.
         
-        for vehicle in self.vehicles:
-            next_itv_date = datetime.strptime(vehicle.calculate_next_itv(), "%Y-%m-%d")
-            days_until_itv = (next_itv_date - today).days
-            
-            if 0 <= days_until_itv <= days_threshold:
-                vehicles_needing_itv.append((vehicle, days_until_itv))
+        The query is answered from the type, brand and daily rate indexes,
+        so it costs roughly the size of the smallest matching index entry
+        rather than the size of the fleet.
+        
+        Args:
+            vehicle_type (str): 'Car', 'Motorbike' or 'Truck'
+            brand (str): Brand, compared case-insensitively
+            min_rate (float): Lowest daily rate
+            max_rate (float): Highest daily rate
+            min_year (int): Oldest year
+            max_year (int): Newest year
+            available (bool): True for vehicles that can be rented, False
+                for those that cannot, None for both
+            start_date (datetime or str): With available, check
+                availability over this range instead of right now
+            end_date (datetime or str): Last day of that range, defaults to start_date
+            sort_by (str): 'daily_rate', 'year', 'brand' or 'vehicle_id'
+            descending (bool): Sort in descending order
+            limit (int): Maximum number of vehicles to return
+        
+        Returns:
+            list: Matching vehicles
+        """
+        predicate = None
+        if available is not None:
+            def predicate(vehicle):
+                return self.is_vehicle_available(vehicle.vehicle_id, start_date, end_date) == available
+        return self._vehicle_index.query(vehicle_type=vehicle_type, brand=brand, min_rate=min_rate,
+                                         max_rate=max_rate, min_year=min_year, max_year=max_year,
+                                         predicate=predicate, sort_by=sort_by, descending=descending,
+                                         limit=limit)
+    
+    def get_vehicles_needing_itv(self, days_threshold=30, as_of=None):
+        """
+        Get all vehicles that need ITV within the given days threshold.
         
-        return vehicles_needing_itv
+        Returns:
+            list: (vehicle, days_until_itv) tuples ordered by ITV date
+        """
+        return self._itv_index.due_within(days_threshold, as_of)
     
-    def get_vehicles_needing_maintenance(self, days_threshold=30):
-        """Get all vehicles that need maintenance within the given days threshold."""
-        today = datetime.now()
-        vehicles_needing_maintenance = []
+    def get_vehicles_needing_maintenance(self, days_threshold=30, as_of=None):
+        """
+        Get all vehicles that need maintenance within the given days threshold.
         
+        Returns:
+            list: (vehicle, days_until_maintenance) tuples ordered by maintenance date
+        """
+        return self._maintenance_index.due_within(days_threshold, as_of)
+
+    def compute_itv_schedule(self, as_of=None):
+        """
+        Compute the next ITV date of the whole fleet in one vectorized pass.
+        
+        Requires NumPy.
+        
+        Returns:
+            dict: vehicle_id -> next ITV date, as of the given date (default today)
+        """
+        from .fleet_schedule import compute_itv_schedule
+        return compute_itv_schedule(self.vehicles, as_of)
+    
+    def compute_maintenance_schedule(self, as_of=None):
+        """
+        Compute the next maintenance date of the whole fleet in one vectorized pass.
+        
+        Requires NumPy.
+        
+        Returns:
+            dict: vehicle_id -> next maintenance date, as of the given date (default today)
+        """
+        from .fleet_schedule import compute_maintenance_schedule
+        return compute_maintenance_schedule(self.vehicles, as_of)
+
+    def fleet_stats(self, by_vehicle=True):
+        """
+        Get rental counters of the fleet without reading the rental history.
+        
+        The counters are kept up to date as rentals are created, returned,
+        archived and loaded, so this only copies them. Closed rentals count
+        their days and revenue at the vehicle's daily rate; mileage only
+        covers rentals with a recorded initial mileage. Archived rentals
+        are not counted.
+        
+        Args:
+            by_vehicle (bool): Include the per-vehicle counters, not only
+                the per-type and fleet totals
+        
+        Returns:
+            dict: {'fleet': counters, 'types': {type: counters},
+                'vehicles': {vehicle_id: counters}} where counters holds
+                rentals, active, rented_days, mileage and revenue
+        """
+        return self._fleet_stats.snapshot(by_vehicle)
+
+    def rental_analytics(self, as_of=None):
+        """
+        Build columnar analytics over the whole rental history, archived rentals included.
+        
+        Requires NumPy.
+        
+        Args:
+            as_of (date): Day open rentals are measured up to, defaults to today
+        
+        Returns:
+            RentalAnalytics: Call report(group_by=...) for revenue, duration
+                and utilization per type, brand, client, vehicle or month
+        """
+        from .analytics import RentalAnalytics
+        if self.repository.history_in_memory:
+            rentals = list(self.rentals)
+            archive = self.repository.archive
+            if archive:
+                rentals.extend(archive.iter_rentals(lambda rental: rental.rental_id not in self._rentals_by_id))
+        else:
+            rentals = self.iter_rental_history()
+        return RentalAnalytics(rentals, list(self.vehicles), as_of)
+
+    def _load_vehicles(self, vehicles):
+        """Install loaded vehicles and rebuild their indexes."""
+        self._vehicles_by_id = self._build_registry(vehicles, 'vehicle_id')
+        self.vehicles = list(self._vehicles_by_id.values())
+        self._rebuild_vehicle_indexes()
+
+    def _load_users(self, users):
+        """Install loaded clients and admins and rebuild their registries."""
+        self._clients_by_id = self._build_registry(
+            (u for u in users if isinstance(u, Client)), 'user_id')
+        self._admins_by_id = self._build_registry(
+            (u for u in users if isinstance(u, Admin)), 'user_id')
+        self.clients = list(self._clients_by_id.values())
+        self.admins = list(self._admins_by_id.values())
+
+    def _load_rentals(self, rentals):
+        """Install loaded rentals and rebuild the rental indexes."""
+        self._rentals_by_id = self._build_registry(rentals, 'rental_id')
+        self.rentals = list(self._rentals_by_id.values())
+        self._rebuild_rental_indexes()
+
+    def _load_reservations(self, reservations):
+        """Install loaded reservations and rebuild the calendar."""
+        self._reservations_by_id = self._build_registry(reservations, 'reservation_id')
+        self.reservations = list(self._reservations_by_id.values())
+        self._calendar.reset(self.reservations)
+
+    def _rebuild_indexes(self):
+        """Rebuild every index from the current lists."""
+        self._vehicles_by_id = self._build_registry(self.vehicles, 'vehicle_id')
+        self._clients_by_id = self._build_registry(self.clients, 'user_id')
+        self._admins_by_id = self._build_registry(self.admins, 'user_id')
+        self._rentals_by_id = self._build_registry(self.rentals, 'rental_id')
+        self._reservations_by_id = self._build_registry(self.reservations, 'reservation_id')
+        self.vehicles = list(self._vehicles_by_id.values())
+        self.clients = list(self._clients_by_id.values())
+        self.admins = list(self._admins_by_id.values())
+        self.rentals = list(self._rentals_by_id.values())
+        self.reservations = list(self._reservations_by_id.values())
+        self._rebuild_vehicle_indexes()
+        self._rebuild_rental_indexes()
+        self._calendar.reset(self.reservations)
+
+    def _rebuild_vehicle_indexes(self):
+        """Rebuild the secondary vehicle indexes from self.vehicles."""
+        self._itv_index.reset(self.vehicles)
+        self._maintenance_index.reset(self.vehicles)
+        self._vehicle_index.reset(self.vehicles)
         for vehicle in self.vehicles:
-            next_maintenance_date = datetime.strptime(vehicle.calculate_next_maintenance(), "%Y-%m-%d")
-            days_until_maintenance = (next_maintenance_date - today).days
-            
-            if 0 <= days_until_maintenance <= days_threshold:
-                vehicles_needing_maintenance.append((vehicle, days_until_maintenance))
-        
-        return vehicles_needing_maintenance
-
-    def _save_vehicles(self):
-        """Save vehicles to CSV file."""
-        filename = os.path.join(self.data_dir, "vehicles.csv")
-        Vehicle.save_vehicles_to_csv(self.vehicles, filename)
-
-    def _save_users(self):
-        """Save users to CSV file."""
-        filename = os.path.join(self.data_dir, "users.csv")
-        User.save_users_to_csv(self.clients + self.admins, filename)
-
-    def _save_rentals(self):
-        """Save rentals to CSV file."""
-        filename = os.path.join(self.data_dir, "rentals.csv")
-        Rental.save_rentals_to_csv(self.rentals, filename)
-
-    def _load_vehicles(self):
-        """Load vehicles from CSV file."""
-        filename = os.path.join(self.data_dir, "vehicles.csv")
-        self.vehicles = Vehicle.load_vehicles_from_csv(filename)
-
-    def _load_users(self):
-        """Load users from CSV file."""
-        filename = os.path.join(self.data_dir, "users.csv")
-        users = User.load_users_from_csv(filename)
-        self.clients = [u for u in users if isinstance(u, Client)]
-        self.admins = [u for u in users if isinstance(u, Admin)]
-
-    def _load_rentals(self):
-        """Load rentals from CSV file."""
-        filename = os.path.join(self.data_dir, "rentals.csv")
-        self.rentals = Rental.load_rentals_from_csv(filename) 
\ No newline at end of file
+            vehicle.add_update_listener(self._on_vehicle_updated)
+
+    def _index_vehicle(self, vehicle):
+        """Add a vehicle to the secondary vehicle indexes."""
+        self._itv_index.add(vehicle)
+        self._maintenance_index.add(vehicle)
+        self._vehicle_index.add(vehicle)
+        vehicle.add_update_listener(self._on_vehicle_updated)
+
+    def _unindex_vehicle(self, vehicle):
+        """Remove a vehicle from the secondary vehicle indexes."""
+        self._itv_index.remove(vehicle.vehicle_id)
+        self._maintenance_index.remove(vehicle.vehicle_id)
+        self._vehicle_index.remove(vehicle.vehicle_id)
+        vehicle.remove_update_listener(self._on_vehicle_updated)
+
+    @contextmanager
+    def _on_vehicle_updated(self, vehicle, changes):
+        """Record a Vehicle.update_info before it is applied, then bring the vehicle indexes in sync."""
+        with self._locked(vehicle_ids=[vehicle.vehicle_id]):
+            self._log('update_vehicle', {'vehicle_id': vehicle.vehicle_id, **changes})
+            yield
+            changed = changes.keys()
+            if changed & {'matriculation_date', 'mileage'}:
+                self._itv_index.invalidate(vehicle.vehicle_id)
+                self._maintenance_index.invalidate(vehicle.vehicle_id)
+            if changed & {'brand', 'daily_rate'}:
+                self._vehicle_index.refresh(vehicle)
+            if 'daily_rate' in changed:
+                self._fleet_stats.reprice(vehicle)
+            self._dirty.add('vehicles')
+
+    @contextmanager
+    def _locked(self, vehicle_ids=(), user_ids=()):
+        """Hold the state lock shared, then the given vehicle locks, then the given user locks."""
+        with self._state_lock.shared(), self._vehicle_locks.hold(vehicle_ids), self._user_locks.hold(user_ids):
+            yield
+
+    def _log(self, op, data):
+        """Report a mutation to the repository before it is applied in memory."""
+        if not self._replaying:
+            self.repository.record(op, data)
+
+    def _merge_archived(self, hot, archived):
+        """Merge archived rentals not also held in memory into an ordered history."""
+        archived = [r for r in archived if r.rental_id not in self._rentals_by_id]
+        if not archived:
+            return list(hot)
+        return list(heapq.merge(archived, hot, key=_start_date))
+
+    def _in_memory(self, rentals):
+        """Swap repository results for the in-memory objects of rentals that are loaded."""
+        return [self._rentals_by_id.get(rental.rental_id, rental) for rental in rentals]
+
+    def _add_reservation(self, reservation):
+        """Register a reservation in the reservation list and the calendar."""
+        if not self._calendar.add(reservation):
+            raise ValueError(f"Reservation {reservation.reservation_id} overlaps another one")
+        self._reservations_by_id[reservation.reservation_id] = reservation
+        self.reservations.append(reservation)
+        self._dirty.add('reservations')
+
+    def _remove_reservation(self, reservation):
+        """Drop a reservation from the reservation list and the calendar."""
+        del self._reservations_by_id[reservation.reservation_id]
+        self.reservations.remove(reservation)
+        self._calendar.remove(reservation)
+        self._dirty.add('reservations')
+
+    def _is_free(self, vehicle_id, start_date, end_date):
+        """
+        Check whether a vehicle can be booked over a range of days.
+        
+        Rentals have no planned return date, so a vehicle out on an active
+        rental is not offered for any range until it is returned.
+        """
+        return vehicle_id not in self._active_by_vehicle and self._calendar.is_free(vehicle_id, start_date, end_date)
+
+    def _reserved_by_other(self, vehicle_id, user_id, start_date, end_date=None):
+        """
+        Check whether another client holds a reservation of the vehicle over a range of days.
+        
+        A rental has no planned return date, so by default the range has no
+        end: a vehicle reserved by someone else from any later day cannot
+        be taken out now.
+        """
+        start_date = _as_datetime(start_date)
+        end_date = end_date if end_date is None else _as_datetime(end_date)
+        return any(self._reservations_by_id[reservation_id].client_username != user_id
+                   for reservation_id in self._calendar.booked_between(vehicle_id, start_date, end_date))
+
+    def _replay_journal(self):
+        """Apply the mutations journaled since the last snapshot."""
+        self._replaying = True
+        try:
+            for op, data in self.repository.pending_records():
+                self._apply_journal_record(op, data)
+        finally:
+            self._replaying = False
+
+    def _apply_journal_record(self, op, data):
+        """Apply one journal record. Records already reflected in the snapshot are no-ops."""
+        if op == 'add_vehicle':
+            self.add_vehicle(Vehicle.from_record(data))
+        elif op == 'remove_vehicle':
+            self.remove_vehicle(data['vehicle_id'])
+        elif op == 'update_vehicle':
+            vehicle = self.get_vehicle_by_id(data['vehicle_id'])
+            if vehicle:
+                vehicle.update_info(**{k: v for k, v in data.items() if k != 'vehicle_id'})
+        elif op == 'add_user':
+            user = User.from_record(data)
+            if isinstance(user, Admin):
+                self.add_admin(user)
+            else:
+                self.add_client(user)
+        elif op == 'remove_client':
+            self.remove_client(data['user_id'])
+        elif op == 'remove_admin':
+            self.remove_admin(data['user_id'])
+        elif op == 'set_password':
+            self._set_password_hash(data['user_id'], data['password'])
+        elif op == 'set_rental_limit':
+            self.set_client_rental_limit(data['user_id'], data['rental_limit'])
+        elif op == 'create_rental':
+            if data['rental_id'] not in self._rentals_by_id:
+                self._add_rental(Rental.from_dict(data))
+        elif op == 'create_reservation':
+            if data['reservation_id'] not in self._reservations_by_id:
+                self._add_reservation(Reservation.from_dict(data))
+        elif op == 'cancel_reservation':
+            reservation = self.get_reservation_by_id(data['reservation_id'])
+            if reservation:
+                self._remove_reservation(reservation)
+        elif op == 'create_rentals':
+            for rental_data in data['rentals']:
+                self._apply_journal_record('create_rental', rental_data)
+        elif op == 'end_rentals':
+            for return_data in data['returns']:
+                self._apply_journal_record('end_rental', return_data)
+        elif op == 'end_rental':
+            rental = self.get_rental_by_id(data['rental_id'])
+            if rental:
+                vehicle = self.get_vehicle_by_id(rental.vehicle_id)
+                if rental.is_active():
+                    rental.final_mileage = data['final_mileage']
+                    rental.return_date = datetime.strptime(data['return_date'], "%Y-%m-%d")
+                    rental.end_date = rental.return_date
+                    self._unindex_active_rental(rental)
+                    if vehicle:
+                        self._fleet_stats.close(rental, vehicle)
+                # The vehicle row of the snapshot may predate the rental row
+                # when the save overlapped the return, so always apply the mileage.
+                if vehicle:
+                    vehicle.mileage = data['final_mileage']
+                self._dirty.update(('rentals', 'vehicles'))
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def _rebuild_rental_indexes(self):
+        """Rebuild the secondary rental indexes from self.rentals."""
+        self._active_by_vehicle = {}
+        self._active_by_client = {}
+        self._rentals_by_client = {}
+        self._rentals_by_vehicle = {}
+        for client in self.clients:
+            client.active_rental_count = 0
+        for rental in sorted(self.rentals, key=_start_date):
+            self._rentals_by_client.setdefault(rental.client_username, []).append(rental)
+            self._rentals_by_vehicle.setdefault(rental.vehicle_id, []).append(rental)
+            self._index_active_rental(rental)
+        # Count the whole stored history when only open rentals are loaded
+        history = self.rentals if self.repository.history_in_memory else self.repository.iter_rentals()
+        self._fleet_stats.reset(history, self._vehicles_by_id)
+
+    def _index_rental_history(self, rental):
+        """Insert a rental into the per-client and per-vehicle histories."""
+        insort(self._rentals_by_client.setdefault(rental.client_username, []), rental, key=_start_date)
+        insort(self._rentals_by_vehicle.setdefault(rental.vehicle_id, []), rental, key=_start_date)
+
+    def _index_active_rental(self, rental):
+        """Record a rental in the active-rental maps if it is still open."""
+        if not rental.is_active():
+            return
+        self._active_by_vehicle[rental.vehicle_id] = rental
+        client_rentals = self._active_by_client.setdefault(rental.client_username, {})
+        if rental.rental_id not in client_rentals:
+            client_rentals[rental.rental_id] = rental
+            client = self._clients_by_id.get(rental.client_username)
+            if client:
+                client.active_rental_count += 1
+
+    def _unindex_active_rental(self, rental):
+        """Drop a closed rental from the active-rental maps."""
+        if self._active_by_vehicle.get(rental.vehicle_id) is rental:
+            del self._active_by_vehicle[rental.vehicle_id]
+        client_rentals = self._active_by_client.get(rental.client_username)
+        if client_rentals is not None and client_rentals.pop(rental.rental_id, None) is not None:
+            client = self._clients_by_id.get(rental.client_username)
+            if client:
+                client.active_rental_count -= 1
+            if not client_rentals:
+                del self._active_by_client[rental.client_username]
+
+    @staticmethod
+    def _build_registry(items, key):
+        """Map each item by its primary key, keeping the first of any duplicates."""
+        registry = {}
+        for item in items:
+            registry.setdefault(getattr(item, key), item)
+        return registry 
\ No newline at end of file
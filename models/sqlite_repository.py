@@ -0,0 +1,264 @@
+import sqlite3
+import threading
+from .repository import HistoryRepository
+from .vehicle import Vehicle
+from .user import User
+from .rental import Rental
+from .reservation import Reservation
+from .csv_utils import format_day
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (
+    vehicle_id TEXT PRIMARY KEY,
+    brand TEXT,
+    model TEXT,
+    year,
+    daily_rate,
+    is_available INTEGER,
+    license_plate TEXT,
+    matriculation_date TEXT,
+    mileage,
+    type TEXT NOT NULL,
+    color TEXT,
+    num_doors,
+    engine_size,
+    cargo_capacity
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    name TEXT,
+    birth_date TEXT,
+    password TEXT,
+    role TEXT,
+    rental_limit INTEGER
+);
+CREATE TABLE IF NOT EXISTS rentals (
+    rental_id TEXT PRIMARY KEY,
+    client_username TEXT NOT NULL,
+    vehicle_id TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT,
+    initial_mileage INTEGER,
+    final_mileage INTEGER,
+    return_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rentals_client ON rentals (client_username, start_date);
+CREATE INDEX IF NOT EXISTS idx_rentals_vehicle ON rentals (vehicle_id, start_date);
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT PRIMARY KEY,
+    client_username TEXT NOT NULL,
+    vehicle_id TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservations_vehicle ON reservations (vehicle_id, start_date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rentals_active_vehicle ON rentals (vehicle_id) WHERE end_date IS NULL;
+CREATE INDEX IF NOT EXISTS idx_rentals_active_client ON rentals (client_username) WHERE end_date IS NULL;
+"""
+
+RENTAL_COLUMNS = [field for field in Rental.CSV_FIELDS if field != 'is_active']
+FETCH_SIZE = 1000
+
+
+def _day(value):
+    """Format a datetime as the YYYY-MM-DD text stored in the database."""
+    return format_day(value)
+
+
+class SqliteRepository(HistoryRepository):
+    """
+    Stores the shop in an SQLite database.
+
+    Every mutation is written through in its own transaction, and only
+    open rentals are loaded into memory: rental history queries run
+    against the indexed rentals table instead.
+    """
+
+    writes_through = True
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) an SQLite database.
+
+        Args:
+            path (str): Database file, or ':memory:'
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def load(self):
+        """Load vehicles, users and the open rentals."""
+        with self._lock:
+            vehicles = [Vehicle.from_record(dict(row)) for row in self._conn.execute("SELECT * FROM vehicles")]
+            users = [User.from_record(dict(row)) for row in self._conn.execute("SELECT * FROM users")]
+            rentals = [Rental.from_dict(dict(row))
+                       for row in self._conn.execute("SELECT * FROM rentals WHERE end_date IS NULL")]
+        return vehicles, users, rentals
+
+    def save(self, vehicles, users, rentals, collections):
+        """
+        Replace the stored vehicles and users, and upsert the given rentals, in one transaction.
+
+        Rentals are never deleted since memory only holds part of the history.
+        """
+        with self._lock, self._conn:
+            if 'vehicles' in collections:
+                self._conn.execute("DELETE FROM vehicles")
+                self._insert_rows('vehicles', Vehicle.CSV_FIELDS, (v.to_csv_row() for v in vehicles))
+            if 'users' in collections:
+                self._conn.execute("DELETE FROM users")
+                self._insert_rows('users', User.CSV_FIELDS, (u.to_csv_row() for u in users))
+            if 'rentals' in collections:
+                active_column = Rental.CSV_FIELDS.index('is_active')
+                self._insert_rows('rentals', RENTAL_COLUMNS,
+                                  (row[:active_column] + row[active_column + 1:]
+                                   for row in (r.to_csv_row() for r in rentals)),
+                                  replace=True)
+
+    def load_reservations(self):
+        """Load every reservation."""
+        with self._lock:
+            return [Reservation.from_dict(dict(row)) for row in self._conn.execute("SELECT * FROM reservations")]
+
+    def save_reservations(self, reservations):
+        """Replace the stored reservations in one transaction."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reservations")
+            self._insert_rows('reservations', Reservation.CSV_FIELDS, (r.to_csv_row() for r in reservations))
+
+    def record(self, op, data):
+        """Apply one mutation in its own transaction."""
+        with self._lock, self._conn:
+            self._apply(op, data)
+
+    def _apply(self, op, data):
+        """Apply one mutation inside the current transaction."""
+        if op == 'add_vehicle':
+            self._insert('vehicles', Vehicle.CSV_FIELDS, data)
+        elif op == 'remove_vehicle':
+            self._conn.execute("DELETE FROM vehicles WHERE vehicle_id = ?", (data['vehicle_id'],))
+        elif op == 'update_vehicle':
+            fields = [field for field in data if field in Vehicle.CSV_FIELDS and field != 'vehicle_id']
+            if fields:
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                self._conn.execute(f"UPDATE vehicles SET {assignments} WHERE vehicle_id = ?",
+                                   [data[field] for field in fields] + [data['vehicle_id']])
+        elif op == 'add_user':
+            self._insert('users', User.CSV_FIELDS, data)
+        elif op in ('remove_client', 'remove_admin'):
+            self._conn.execute("DELETE FROM users WHERE user_id = ?", (data['user_id'],))
+        elif op == 'set_password':
+            self._conn.execute("UPDATE users SET password = ? WHERE user_id = ?",
+                               (data['password'], data['user_id']))
+        elif op == 'set_rental_limit':
+            self._conn.execute("UPDATE users SET rental_limit = ? WHERE user_id = ?",
+                               (data['rental_limit'], data['user_id']))
+        elif op == 'create_rental':
+            self._insert('rentals', RENTAL_COLUMNS, data)
+        elif op == 'create_reservation':
+            self._insert('reservations', Reservation.CSV_FIELDS, data)
+        elif op == 'cancel_reservation':
+            self._conn.execute("DELETE FROM reservations WHERE reservation_id = ?", (data['reservation_id'],))
+        elif op == 'create_rentals':
+            for rental_data in data['rentals']:
+                self._apply('create_rental', rental_data)
+        elif op == 'end_rentals':
+            for return_data in data['returns']:
+                self._apply('end_rental', return_data)
+        elif op == 'end_rental':
+            cursor = self._conn.execute(
+                "UPDATE rentals SET end_date = ?, return_date = ?, final_mileage = ? "
+                "WHERE rental_id = ? AND end_date IS NULL",
+                (data['return_date'], data['return_date'], data['final_mileage'], data['rental_id']))
+            if cursor.rowcount != 1:
+                raise ValueError(f"Rental {data['rental_id']} is not active")
+            self._conn.execute(
+                "UPDATE vehicles SET mileage = ? "
+                "WHERE vehicle_id = (SELECT vehicle_id FROM rentals WHERE rental_id = ?)",
+                (data['final_mileage'], data['rental_id']))
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+
+    def iter_rentals(self, client_id=None, vehicle_id=None, start_date=None, end_date=None):
+        """Stream matching rentals ordered by start date, fetching them in batches."""
+        conditions, params = [], []
+        if client_id is not None:
+            conditions.append("client_username = ?")
+            params.append(client_id)
+        if vehicle_id is not None:
+            conditions.append("vehicle_id = ?")
+            params.append(vehicle_id)
+        if start_date is not None:
+            conditions.append("start_date >= ?")
+            params.append(_day(start_date))
+        if end_date is not None:
+            conditions.append("start_date <= ?")
+            params.append(_day(end_date))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._iter_query(f"SELECT * FROM rentals{where} ORDER BY start_date", params)
+
+    def get_rental(self, rental_id):
+        """Get a rental by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM rentals WHERE rental_id = ?", (rental_id,)).fetchone()
+        return Rental.from_dict(dict(row)) if row else None
+
+    def client_rentals(self, user_id):
+        """Get a client's rentals ordered by start date."""
+        return list(self.iter_rentals(client_id=user_id))
+
+    def vehicle_rentals(self, vehicle_id):
+        """Get a vehicle's rentals ordered by start date."""
+        return list(self.iter_rentals(vehicle_id=vehicle_id))
+
+    def vehicle_rentals_between(self, vehicle_id, start_date, end_date):
+        """Get a vehicle's rentals overlapping a period, ordered by start date."""
+        return list(self._iter_query(
+            "SELECT * FROM rentals WHERE vehicle_id = ? AND start_date <= ? "
+            "AND (end_date IS NULL OR end_date >= ?) ORDER BY start_date",
+            (vehicle_id, _day(end_date), _day(start_date))))
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _iter_query(self, sql, params):
+        cursor = self._conn.cursor()
+        with self._lock:
+            cursor.execute(sql, params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                for row in rows:
+                    yield Rental.from_dict(dict(row))
+        finally:
+            cursor.close()
+
+    def _migrate(self):
+        """Add the columns introduced after a database was created."""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(users)")}
+        if 'rental_limit' not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE users ADD COLUMN rental_limit INTEGER")
+
+    def _insert(self, table, columns, data):
+        present = [column for column in columns if column in data]
+        placeholders = ", ".join("?" for _ in present)
+        self._conn.execute(f"INSERT INTO {table} ({', '.join(present)}) VALUES ({placeholders})",
+                           [data[column] for column in present])
+
+    def _insert_rows(self, table, columns, rows, replace=False):
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        placeholders = ", ".join("?" for _ in columns)
+        self._conn.executemany(f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
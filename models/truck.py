@@ -1,15 +1,17 @@
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from .vehicle import Vehicle
 
 class Truck(Vehicle):
+    __slots__ = ('cargo_capacity',)
+    
     def __init__(self, vehicle_id, brand, model, year, daily_rate, cargo_capacity):
         super().__init__(vehicle_id, brand, model, year, daily_rate)
         self.cargo_capacity = cargo_capacity
         self.type = "Truck"
     
-    def calculate_next_itv(self):
-        matriculation_date = datetime.strptime(self.matriculation_date, "%Y-%m-%d")
-        current_date = datetime.now()
+    def next_itv_date(self, as_of=None):
+        matriculation_date = self._matriculation()
+        current_date = as_of or date.today()
         years_since_matriculation = current_date.year - matriculation_date.year
         
         if years_since_matriculation < 10:
@@ -35,12 +37,25 @@ class Truck(Vehicle):
                     day=matriculation_date.day
                 )
         
-        return next_itv_date.strftime("%Y-%m-%d")
+        return next_itv_date
+    
+    def next_itv_date_valid_until(self, as_of=None):
+        matriculation_date = self._matriculation()
+        current_date = as_of or date.today()
+        if current_date.year - matriculation_date.year < 10:
+            # A year after as_of, so it moves every day
+            return current_date + timedelta(days=1)
+        # Counted from the 1st so 29 February falls on 1 March in common
+        # years, the first day next_itv_date compares as not before it
+        anniversary = date(current_date.year, matriculation_date.month, 1) + timedelta(days=matriculation_date.day - 1)
+        return anniversary if current_date < anniversary else date(current_date.year + 1, 1, 1)
+    
+    def next_maintenance_date(self, as_of=None):
+        current_date = as_of or date.today()
+        return current_date + timedelta(days=60)
     
-    def calculate_next_maintenance(self):
-        current_date = datetime.now()
-        next_maintenance_date = current_date + timedelta(days=60)
-        return next_maintenance_date.strftime("%Y-%m-%d")
+    def next_maintenance_date_valid_until(self, as_of=None):
+        return (as_of or date.today()) + timedelta(days=1)
     
     def needs_maintenance_by_km(self, km_since_last_maintenance):
         return km_since_last_maintenance >= 1000
@@ -3,10 +3,17 @@ import csv
 import os
 from datetime import datetime
 from .base_user import BaseUser
+from .csv_utils import atomic_csv_writer, column_positions
+from .interning import intern_key
+from .passwords import hash_password, is_password_hash, verify_password
 
 class User(BaseUser):
     """Base class for all users."""
     
+    __slots__ = ('password',)
+    
+    CSV_FIELDS = ['type', 'name', 'birth_date', 'user_id', 'password', 'role', 'rental_limit']
+    
     def __init__(self, name, birth_date, user_id, password):
         """
         Initialize a user.
@@ -15,11 +22,16 @@ class User(BaseUser):
             name (str): User name
             birth_date (str): Date of birth (YYYY-MM-DD)
             user_id (str): Unique identifier
-            password (str): User password
+            password (str): Password hash from hash_password, or a plain
+                text password as stored by older versions
         """
         super().__init__(name, birth_date, user_id)
         self.password = password
     
+    def set_password(self, password):
+        """Store a salted hash of a new plain text password."""
+        self.password = hash_password(password)
+    
     def update_info(self, name=None, birth_date=None, user_id=None):
         """Update user information."""
         if name is not None:
@@ -29,7 +41,7 @@ class User(BaseUser):
         if user_id is not None:
             if not user_id.startswith(('C', 'A')):
                 raise ValueError("User ID must start with 'C' for clients or 'A' for admins")
-            self.user_id = user_id
+            self.user_id = intern_key(user_id)
     
     def to_dict(self):
         """Convert user to dictionary for saving to CSV."""
@@ -40,20 +52,17 @@ class User(BaseUser):
             'password': self.password
         }
     
+    def to_csv_row(self):
+        """Serialize the user as a row matching CSV_FIELDS."""
+        return [self.__class__.__name__, self.name, self.birth_date, self.user_id, self.password,
+                getattr(self, 'role', None), getattr(self, 'rental_limit', None)]
+    
     @classmethod
     def save_users_to_csv(cls, users, filename):
         """Save a list of users to a CSV file."""
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        fieldnames = ['type', 'name', 'birth_date', 'user_id', 'password', 'role']
-        
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for user in users:
-                data = user.to_dict()
-                data['type'] = user.__class__.__name__
-                writer.writerow(data)
+        with atomic_csv_writer(filename) as writer:
+            writer.writerow(cls.CSV_FIELDS)
+            writer.writerows(user.to_csv_row() for user in users)
     
     @classmethod
     def load_users_from_csv(cls, filename):
@@ -67,16 +76,24 @@ class User(BaseUser):
             return users
         
         with open(filename, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return users
+            columns = column_positions(header, ['type', 'name', 'birth_date', 'user_id', 'password'],
+                                       ['role', 'rental_limit'])
+            user_type, name, birth_date = columns['type'], columns['name'], columns['birth_date']
+            user_id, password, role = columns['user_id'], columns['password'], columns['role']
+            rental_limit = columns['rental_limit']
             for row in reader:
-                user_type = row.pop('type')
-                
-                if user_type == 'Client':
-                    if 'role' in row:
-                        row.pop('role')
-                    user = Client(**row)
-                elif user_type == 'Admin':
-                    user = Admin(**row)
+                if row[user_type] == 'Client':
+                    user = Client(row[name], row[birth_date], row[user_id], row[password],
+                                  None if rental_limit is None else row[rental_limit])
+                elif row[user_type] == 'Admin':
+                    if role is None:
+                        user = Admin(row[name], row[birth_date], row[user_id], row[password])
+                    else:
+                        user = Admin(row[name], row[birth_date], row[user_id], row[password], row[role])
                 else:
                     continue
                 
@@ -84,6 +101,23 @@ class User(BaseUser):
         
         return users
 
+    @classmethod
+    def from_record(cls, data):
+        """
+        Rebuild a user of any type.
+        
+        Args:
+            data (dict): Output of to_dict() or a row read from users.csv
+        """
+        from .client import Client
+        from .admin import Admin
+        
+        user_classes = {'Client': Client, 'Admin': Admin}
+        user_class = user_classes.get(data.get('type'))
+        if user_class is None:
+            raise ValueError(f"Unknown user type: {data.get('type')}")
+        return user_class.from_dict(data)
+
     @classmethod
     def from_dict(cls, data):
         return cls(
@@ -94,9 +128,15 @@ class User(BaseUser):
         )
 
     def authenticate(self, password):
-        """Authenticate the user with a password."""
+        """Authenticate the user with a password, against its hash or a legacy plain text one."""
+        if is_password_hash(self.password):
+            return verify_password(password, self.password)
         return self.password == password
     
+    def has_password_hash(self):
+        """Check whether the stored password is hashed rather than legacy plain text."""
+        return is_password_hash(self.password)
+    
     @abstractmethod
     def can_rent_vehicle(self, vehicle):
         """Check if the user can rent a specific vehicle."""
@@ -1,26 +1,61 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime
 import csv
 import os
+from contextlib import ExitStack
 from .base_vehicle import BaseVehicle
+from .csv_utils import atomic_csv_writer, column_positions, parse_day
+from .interning import intern_key
+
+def _number(value):
+    """Convert a numeric CSV string back to int or float, leaving other values untouched."""
+    if not isinstance(value, str) or value == '':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
 
 class Vehicle(BaseVehicle):
+    # Vehicles carry no per-instance __dict__; subclasses add slots for
+    # their own columns.
+    __slots__ = ('vehicle_id', 'brand', 'model', 'year', 'daily_rate', 'is_available', '_rentals',
+                 'matriculation_date', 'license_plate', 'mileage', 'color', 'type', '_update_listeners')
+    NUMERIC_FIELDS = ('year', 'daily_rate', 'mileage', 'num_doors', 'engine_size', 'cargo_capacity')
+    CSV_FIELDS = ['vehicle_id', 'brand', 'model', 'year', 'daily_rate', 'is_available', 'license_plate', 'matriculation_date', 'mileage', 'type', 'color', 'num_doors', 'engine_size', 'cargo_capacity']
+    
+
     def __init__(self, vehicle_id, brand, model, year, daily_rate):
-        self.vehicle_id = vehicle_id
-        self.brand = brand
-        self.model = model
+        self.vehicle_id = intern_key(vehicle_id)
+        self.brand = intern_key(brand)
+        self.model = intern_key(model)
         self.year = year
         self.daily_rate = daily_rate
         self.is_available = True
-        self.rentals = []
-        self.matriculation_date = datetime.now().strftime("%Y-%m-%d")
+        self._rentals = None
+        self.matriculation_date = intern_key(datetime.now().strftime("%Y-%m-%d"))
         self.license_plate = None
         self.mileage = 0
         self.color = None
+        self._update_listeners = []
     
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year})"
     
+    @property
+    def rentals(self):
+        """Rentals attached to this vehicle; the list is only created on first use."""
+        if self._rentals is None:
+            self._rentals = []
+        return self._rentals
+    
+    @rentals.setter
+    def rentals(self, rentals):
+        self._rentals = rentals
+    
     def calculate_rental_cost(self, days):
         return self.daily_rate * days
     
@@ -35,33 +70,73 @@ class Vehicle(BaseVehicle):
             return False
         return True
     
-    @abstractmethod
+    def _matriculation(self):
+        """Return the matriculation date as a date object."""
+        return parse_day(self.matriculation_date).date()
+    
     def calculate_next_itv(self):
+        return self.next_itv_date().strftime("%Y-%m-%d")
+    
+    def calculate_next_maintenance(self):
+        return self.next_maintenance_date().strftime("%Y-%m-%d")
+    
+    @abstractmethod
+    def next_itv_date(self, as_of=None):
         pass
     
     @abstractmethod
-    def calculate_next_maintenance(self):
+    def next_maintenance_date(self, as_of=None):
         pass
     
+    def next_itv_date_valid_until(self, as_of=None):
+        """
+        First day after as_of on which next_itv_date may give another answer.
+        
+        The default holds for schedules that depend only on the year of as_of.
+        """
+        return date((as_of or date.today()).year + 1, 1, 1)
+    
+    def next_maintenance_date_valid_until(self, as_of=None):
+        """First day after as_of on which next_maintenance_date may give another answer."""
+        return date((as_of or date.today()).year + 1, 1, 1)
+    
     @abstractmethod
     def needs_maintenance_by_km(self, km_since_last_maintenance):
         pass
     
-    def update_info(self, brand=None, color=None, license_plate=None, model=None, matriculation_date=None, mileage=None):
-        if brand is not None:
-            self.brand = brand
-        if color is not None:
-            self.color = color
-        if license_plate is not None:
-            if not self._validate_license_plate(license_plate):
-                raise ValueError("Invalid license plate format")
-            self.license_plate = license_plate
-        if model is not None:
-            self.model = model
-        if matriculation_date is not None:
-            self.matriculation_date = matriculation_date
-        if mileage is not None:
-            self.mileage = mileage
+    def add_update_listener(self, callback):
+        """
+        Register a listener of update_info.
+        
+        callback(vehicle, changes) is called with the validated
+        {field: new value} changes before any of them is applied, and
+        returns a context manager held while they are applied. A listener
+        raising on entry leaves the vehicle unchanged.
+        """
+        if callback not in self._update_listeners:
+            self._update_listeners.append(callback)
+    
+    def remove_update_listener(self, callback):
+        if callback in self._update_listeners:
+            self._update_listeners.remove(callback)
+    
+    def update_info(self, brand=None, color=None, license_plate=None, model=None, matriculation_date=None, mileage=None,
+                    daily_rate=None):
+        if license_plate is not None and not self._validate_license_plate(license_plate):
+            raise ValueError("Invalid license plate format")
+        if daily_rate is not None and (not isinstance(daily_rate, (int, float)) or daily_rate < 0):
+            raise ValueError("Daily rate must be a non-negative number")
+        changes = {field: value for field, value in (
+            ('brand', brand), ('color', color), ('license_plate', license_plate), ('model', model),
+            ('matriculation_date', matriculation_date), ('mileage', mileage), ('daily_rate', daily_rate),
+        ) if value is not None}
+        if not changes:
+            return
+        with ExitStack() as listeners:
+            for callback in list(self._update_listeners):
+                listeners.enter_context(callback(self, changes))
+            for field, value in changes.items():
+                setattr(self, field, value)
     
     def to_dict(self):
         return {
@@ -77,52 +152,134 @@ class Vehicle(BaseVehicle):
             'color': self.color
         }
     
+    def to_csv_row(self):
+        """Serialize the vehicle as a row matching CSV_FIELDS."""
+        return [
+            self.vehicle_id, self.brand, self.model, self.year, self.daily_rate,
+            self.is_available, self.license_plate, self.matriculation_date, self.mileage,
+            self.type, self.color,
+            getattr(self, 'num_doors', None),
+            getattr(self, 'engine_size', None),
+            getattr(self, 'cargo_capacity', None)
+        ]
+    
     @classmethod
     def save_vehicles_to_csv(cls, vehicles, filename):
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        fieldnames = ['vehicle_id', 'brand', 'model', 'year', 'daily_rate', 'is_available', 'license_plate', 'matriculation_date', 'mileage', 'type', 'color']
-        
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for vehicle in vehicles:
-                writer.writerow(vehicle.to_dict())
+        with atomic_csv_writer(filename) as writer:
+            writer.writerow(cls.CSV_FIELDS)
+            writer.writerows(vehicle.to_csv_row() for vehicle in vehicles)
     
     @classmethod
     def load_vehicles_from_csv(cls, filename):
-        from .car import Car
-        from .motorbike import Motorbike
-        from .truck import Truck
-        
         vehicles = []
         
         if not os.path.exists(filename):
             return vehicles
         
         with open(filename, 'r', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
+            reader = csv.reader(csvfile)
+            header = next(reader, None)
+            if header is None:
+                return vehicles
+            try:
+                decode = cls.csv_row_decoder(header)
+            except ValueError as e:
+                print(f"Error loading vehicles: {e}")
+                return vehicles
             for row in reader:
-                vehicle_type = row.pop('type')
-                
-                if 'mileage' in row:
-                    row['mileage'] = int(row['mileage'])
-                
                 try:
-                    if vehicle_type == 'Car':
-                        vehicle = Car(**row)
-                    elif vehicle_type == 'Motorbike':
-                        vehicle = Motorbike(**row)
-                    elif vehicle_type == 'Truck':
-                        vehicle = Truck(**row)
-                    else:
-                        continue
-                    
-                    vehicles.append(vehicle)
+                    vehicle = decode(row)
                 except Exception as e:
                     print(f"Error loading vehicle: {e}")
+                    continue
+                if vehicle is not None:
+                    vehicles.append(vehicle)
         
         return vehicles
+    
+    @classmethod
+    def csv_row_decoder(cls, header):
+        """
+        Compile a decoder for the rows of a vehicles CSV file.
+        
+        Column positions are resolved once from the header; rows are then
+        decoded the same way as from_record, without building a dict.
+        
+        Args:
+            header (list): Header row of the file
+        
+        Returns:
+            callable: row -> vehicle, or None for rows of an unknown type
+        
+        Raises:
+            ValueError: If a column is missing
+        """
+        from .car import Car
+        from .motorbike import Motorbike
+        from .truck import Truck
+        
+        columns = column_positions(
+            header,
+            ['vehicle_id', 'brand', 'model', 'year', 'daily_rate', 'type'],
+            ['is_available', 'license_plate', 'matriculation_date', 'mileage', 'color',
+             'num_doors', 'engine_size', 'cargo_capacity'])
+        vehicle_classes = {
+            'Car': (Car, columns['num_doors']),
+            'Motorbike': (Motorbike, columns['engine_size']),
+            'Truck': (Truck, columns['cargo_capacity'])
+        }
+        vehicle_id, brand, model = columns['vehicle_id'], columns['brand'], columns['model']
+        year, daily_rate, vehicle_type = columns['year'], columns['daily_rate'], columns['type']
+        is_available, license_plate = columns['is_available'], columns['license_plate']
+        matriculation_date, mileage, color = columns['matriculation_date'], columns['mileage'], columns['color']
+        
+        def cell(row, position):
+            return row[position] if position is not None else ''
+        
+        def decode(row):
+            vehicle_class, extra = vehicle_classes.get(row[vehicle_type], (None, None))
+            if vehicle_class is None:
+                return None
+            vehicle = vehicle_class(row[vehicle_id], row[brand], row[model], _number(row[year]),
+                                    _number(row[daily_rate]), _number(cell(row, extra)))
+            vehicle.is_available = cell(row, is_available) != 'False'
+            vehicle.license_plate = cell(row, license_plate) or None
+            vehicle.color = cell(row, color) or None
+            if cell(row, matriculation_date):
+                vehicle.matriculation_date = row[matriculation_date]
+            if cell(row, mileage):
+                vehicle.mileage = _number(row[mileage])
+            return vehicle
+        
+        return decode
+    
+    @classmethod
+    def from_record(cls, data):
+        """
+        Rebuild a vehicle of any type, including its mutable state.
+        
+        Args:
+            data (dict): Output of to_dict() or a row read from vehicles.csv
+        """
+        from .car import Car
+        from .motorbike import Motorbike
+        from .truck import Truck
+        
+        vehicle_classes = {'Car': Car, 'Motorbike': Motorbike, 'Truck': Truck}
+        vehicle_class = vehicle_classes.get(data.get('type'))
+        if vehicle_class is None:
+            raise ValueError(f"Unknown vehicle type: {data.get('type')}")
+        
+        data = {key: _number(value) if key in cls.NUMERIC_FIELDS else value for key, value in data.items()}
+        vehicle = vehicle_class.from_dict(data)
+        vehicle.is_available = data.get('is_available') not in (False, 'False')
+        vehicle.license_plate = data.get('license_plate') or None
+        vehicle.color = data.get('color') or None
+        if data.get('matriculation_date'):
+            vehicle.matriculation_date = data['matriculation_date']
+        if data.get('mileage') not in (None, ''):
+            vehicle.mileage = data['mileage']
+        return vehicle
 
     @classmethod
     def from_dict(cls, data):
@@ -0,0 +1,157 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from operator import attrgetter
+
+def _brand_key(brand):
+    return brand.casefold() if isinstance(brand, str) else brand
+
+class VehicleIndex:
+    """
+    Secondary indexes over the fleet for multi-attribute search. Thread-safe.
+
+    Vehicles are partitioned by type, hashed by brand (case-insensitive) and
+    kept in a list sorted by daily rate. A query starts from the smallest
+    candidate set among the indexed criteria and filters the rest, so its
+    cost follows the size of that set rather than the fleet.
+    """
+
+    SORT_KEYS = {'daily_rate', 'year', 'brand', 'vehicle_id'}
+
+    def __init__(self):
+        self._vehicles = {}  # vehicle_id -> Vehicle, in insertion order
+        self._by_type = {}   # type -> {vehicle_id: Vehicle}
+        self._by_brand = {}  # brand key -> {vehicle_id: Vehicle}
+        self._by_rate = []   # sorted (daily_rate, vehicle_id)
+        self._keys = {}      # vehicle_id -> (type, brand key, daily_rate) it is indexed under
+        self._lock = threading.Lock()
+
+    def reset(self, vehicles):
+        """Replace the indexed vehicles."""
+        with self._lock:
+            self._vehicles = {}
+            self._by_type = {}
+            self._by_brand = {}
+            self._keys = {}
+            for vehicle in vehicles:
+                self._vehicles[vehicle.vehicle_id] = vehicle
+                self._insert(vehicle, sort=False)
+            self._by_rate = sorted((rate, vehicle_id) for vehicle_id, (_, _, rate) in self._keys.items())
+
+    def add(self, vehicle):
+        """Index a vehicle."""
+        with self._lock:
+            self._vehicles[vehicle.vehicle_id] = vehicle
+            self._insert(vehicle)
+
+    def remove(self, vehicle_id):
+        """Drop a vehicle from the indexes."""
+        with self._lock:
+            if self._vehicles.pop(vehicle_id, None) is not None:
+                self._delete(vehicle_id)
+
+    def refresh(self, vehicle):
+        """Re-index a vehicle whose brand, type or daily rate may have changed."""
+        with self._lock:
+            if vehicle.vehicle_id not in self._vehicles:
+                return
+            if self._keys[vehicle.vehicle_id] != self._key(vehicle):
+                self._delete(vehicle.vehicle_id)
+                self._insert(vehicle)
+
+    def of_type(self, vehicle_type):
+        """Get the vehicles of a type, in the order they were added."""
+        with self._lock:
+            return list(self._by_type.get(vehicle_type, {}).values())
+
+    def query(self, vehicle_type=None, brand=None, min_rate=None, max_rate=None, min_year=None, max_year=None,
+              predicate=None, sort_by='daily_rate', descending=False, limit=None):
+        """
+        Find vehicles matching every given criterion.
+
+        Args:
+            vehicle_type (str): 'Car', 'Motorbike' or 'Truck'
+            brand (str): Brand, compared case-insensitively
+            min_rate, max_rate (float): Inclusive daily rate bounds
+            min_year, max_year (int): Inclusive year bounds
+            predicate (callable): Extra filter, e.g. availability
+            sort_by (str): One of SORT_KEYS
+            descending (bool): Reverse the sort order
+            limit (int): Maximum number of vehicles to return
+
+        Returns:
+            list: Matching vehicles, sorted
+        """
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(f"Sort key must be one of {', '.join(sorted(self.SORT_KEYS))}")
+        if limit is not None and limit <= 0:
+            return []
+
+        def matches(vehicle):
+            return ((vehicle_type is None or vehicle.type == vehicle_type)
+                    and (brand is None or _brand_key(vehicle.brand) == _brand_key(brand))
+                    and (min_rate is None or vehicle.daily_rate >= min_rate)
+                    and (max_rate is None or vehicle.daily_rate <= max_rate)
+                    and (min_year is None or vehicle.year >= min_year)
+                    and (max_year is None or vehicle.year <= max_year))
+
+        with self._lock:
+            lo = 0 if min_rate is None else bisect_left(self._by_rate, (min_rate,))
+            hi = len(self._by_rate) if max_rate is None else bisect_right(self._by_rate, (max_rate, chr(0x10FFFF)))
+            candidates = [(hi - lo, None)]
+            if vehicle_type is not None:
+                partition = self._by_type.get(vehicle_type, {})
+                candidates.append((len(partition), partition))
+            if brand is not None:
+                partition = self._by_brand.get(_brand_key(brand), {})
+                candidates.append((len(partition), partition))
+            size, partition = min(candidates, key=lambda candidate: candidate[0])
+
+            if partition is None and sort_by == 'daily_rate':
+                # Walk the price index in the requested order, stopping at the limit
+                entries = self._by_rate[lo:hi]
+                if descending:
+                    entries.reverse()
+                found = []
+                for _, vehicle_id in entries:
+                    vehicle = self._vehicles[vehicle_id]
+                    if matches(vehicle) and (predicate is None or predicate(vehicle)):
+                        found.append(vehicle)
+                        if limit is not None and len(found) >= limit:
+                            break
+                return found
+
+            if partition is None:
+                pool = [self._vehicles[vehicle_id] for _, vehicle_id in self._by_rate[lo:hi]]
+            else:
+                pool = list(partition.values())
+        found = [vehicle for vehicle in pool if matches(vehicle) and (predicate is None or predicate(vehicle))]
+        key = attrgetter(sort_by) if sort_by != 'brand' else (lambda vehicle: _brand_key(vehicle.brand))
+        if limit is not None and limit < len(found):
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(limit, found, key=key)
+        found.sort(key=key, reverse=descending)
+        return found
+
+    @staticmethod
+    def _key(vehicle):
+        return (vehicle.type, _brand_key(vehicle.brand), vehicle.daily_rate)
+
+    def _insert(self, vehicle, sort=True):
+        vehicle_type, brand, rate = key = self._key(vehicle)
+        self._keys[vehicle.vehicle_id] = key
+        self._by_type.setdefault(vehicle_type, {})[vehicle.vehicle_id] = vehicle
+        self._by_brand.setdefault(brand, {})[vehicle.vehicle_id] = vehicle
+        if sort:
+            insort(self._by_rate, (rate, vehicle.vehicle_id))
+
+    def _delete(self, vehicle_id):
+        vehicle_type, brand, rate = self._keys.pop(vehicle_id)
+        for index, key in ((self._by_type, vehicle_type), (self._by_brand, brand)):
+            partition = index[key]
+            del partition[vehicle_id]
+            if not partition:
+                del index[key]
+        i = bisect_left(self._by_rate, (rate, vehicle_id))
+        if i < len(self._by_rate) and self._by_rate[i] == (rate, vehicle_id):
+            del self._by_rate[i]
@@ -0,0 +1,126 @@
+import unittest
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.rental import Rental
+from models.shop import Shop
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy is required for rental analytics")
+class TestRentalAnalytics(unittest.TestCase):
+    AS_OF = date(2024, 7, 1)
+
+    def setUp(self):
+        from models.analytics import RentalAnalytics
+        self.RentalAnalytics = RentalAnalytics
+        rng = random.Random(11)
+        self.vehicles = [(Car, Motorbike, Truck)[i % 3](f"V{i}", rng.choice(["Seat", "BMW", "Volvo"]), "Model",
+                                                        2015, float(rng.randint(20, 120)), 4)
+                         for i in range(30)]
+        self.rentals = []
+        for i in range(2000):
+            start = datetime(2023, 1, 1) + timedelta(days=rng.randrange(540))
+            end = start + timedelta(days=rng.randint(0, 20)) if rng.random() < 0.9 else None
+            self.rentals.append(Rental(f"R{i}", f"C{rng.randrange(40)}", f"V{rng.randrange(31)}", start, end))
+
+    def _expected(self, key, first=None, last=None):
+        vehicles = {v.vehicle_id: v for v in self.vehicles}
+        groups = {}
+        for rental in self.rentals:
+            vehicle = vehicles.get(rental.vehicle_id)
+            if vehicle is None:
+                continue
+            if first and rental.start_date < first or last and rental.start_date > last:
+                continue
+            group = groups.setdefault(key(rental, vehicle), {'rentals': 0, 'revenue': 0.0, 'durations': []})
+            group['rentals'] += 1
+            if not rental.is_active():
+                duration = rental.calculate_duration()
+                group['revenue'] += vehicle.calculate_rental_cost(duration)
+                group['durations'].append(duration)
+        return groups
+
+    def _check(self, report, expected):
+        for name, group in expected.items():
+            self.assertEqual(report[name]['rentals'], group['rentals'], name)
+            self.assertAlmostEqual(report[name]['revenue'], group['revenue'], places=6)
+            durations = group['durations']
+            if durations:
+                self.assertAlmostEqual(report[name]['average_duration'], sum(durations) / len(durations))
+        self.assertEqual(sum(g['rentals'] for g in report.values()), sum(g['rentals'] for g in expected.values()))
+
+    def test_reports_match_per_object_computation(self):
+        analytics = self.RentalAnalytics(self.rentals, self.vehicles, as_of=self.AS_OF)
+        # Rentals of the unknown vehicle V30 are left out
+        self.assertEqual(len(analytics), sum(r.vehicle_id != "V30" for r in self.rentals))
+        self._check(analytics.report('type'), self._expected(lambda r, v: v.type))
+        self._check(analytics.report('brand'), self._expected(lambda r, v: v.brand))
+        self._check(analytics.report('client'), self._expected(lambda r, v: r.client_username))
+        self._check(analytics.report('vehicle'), self._expected(lambda r, v: v.vehicle_id))
+        self._check(analytics.report('month', start_date="2023-03-01", end_date="2023-08-31"),
+                    self._expected(lambda r, v: r.start_date.strftime("%Y-%m"),
+                                   datetime(2023, 3, 1), datetime(2023, 8, 31)))
+        self.assertEqual(list(analytics.report('month', "2023-03-15", "2023-05-02")), ["2023-03", "2023-04", "2023-05"])
+        with self.assertRaises(ValueError):
+            analytics.report('color')
+
+    def test_utilization(self):
+        vehicles = [Car("V1", "Seat", "Ibiza", 2020, 30.0, 5), Car("V2", "Seat", "Leon", 2020, 40.0, 5),
+                    Truck("V3", "Volvo", "FH16", 2015, 100.0, 18)]
+        rentals = [
+            Rental("R1", "C1", "V1", "2024-01-01", "2024-01-11"),  # 10 days
+            Rental("R2", "C2", "V2", "2024-01-25", "2024-02-04"),  # 7 days in January, 3 in February
+            Rental("R3", "C1", "V3", "2024-02-20"),                # open, 10 days up to as_of
+        ]
+        analytics = self.RentalAnalytics(rentals, vehicles, as_of=date(2024, 3, 1))
+        by_type = analytics.report('type', "2024-01-01", "2024-01-31")
+        self.assertAlmostEqual(by_type['Car']['utilization'], 17 / (2 * 31))
+        self.assertEqual(by_type['Truck']['utilization'], 0)
+        self.assertEqual(by_type['Car']['revenue'], 10 * 30.0 + 10 * 40.0)
+
+        by_month = analytics.report('month', "2024-01-01", "2024-02-29")
+        self.assertAlmostEqual(by_month['2024-01']['utilization'], 17 / (3 * 31))
+        self.assertAlmostEqual(by_month['2024-02']['utilization'], 13 / (3 * 29))
+        self.assertIsNone(analytics.report('vehicle')['V3']['average_duration'])
+        self.assertAlmostEqual(analytics.report('client', "2024-01-01", "2024-02-29")['C1']['utilization'],
+                               20 / (3 * 60))
+
+    def test_timed_rentals_count_calendar_days(self):
+        vehicles = [Car("V1", "Seat", "Ibiza", 2020, 30.0, 5)]
+        rental = Rental("R1", "C1", "V1", "2024-01-01", "2024-01-03")
+        rental.start_date, rental.end_date = datetime(2024, 1, 1, 18, 0), datetime(2024, 1, 3, 9, 0)
+        self.assertEqual(rental.calculate_duration(), 1)
+
+        report = self.RentalAnalytics([rental], vehicles, as_of=date(2024, 2, 1)).report('vehicle')
+        self.assertEqual(report['V1']['average_duration'], 2)
+        self.assertEqual(report['V1']['revenue'], vehicles[0].calculate_rental_cost(2))
+
+    def test_shop_includes_archived_rentals(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            shop = Shop("Test Shop", data_dir=data_dir)
+            shop.add_vehicle(Car("V1", "Seat", "Ibiza", 2020, 30.0, 5))
+            shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+            first = shop.create_rental("V1", "C1", start_date="2024-01-01")
+            shop.end_rental(first.rental_id, 100)
+            first.end_date = first.return_date = datetime(2024, 1, 5)
+            shop.archive_rentals("2024-02-01")
+            shop.create_rental("V1", "C1", start_date="2024-03-01")
+
+            report = shop.rental_analytics(as_of=date(2024, 3, 11)).report('vehicle')
+            self.assertEqual(report['V1']['rentals'], 2)
+            self.assertEqual(report['V1']['revenue'], 4 * 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import bench_shop, data_generator, load_test
+from models.client import Client
+from models.shop import Shop
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generator_is_deterministic_and_consistent(self):
+        first = data_generator.generate(vehicles=50, clients=10, rentals=300, admins=2, seed=3)
+        second = data_generator.generate(vehicles=50, clients=10, rentals=300, admins=2, seed=3)
+        rows = lambda dataset: [r.to_csv_row() for r in dataset.rentals] + [v.to_csv_row() for v in dataset.vehicles]
+        self.assertEqual(rows(first), rows(second))
+        self.assertNotEqual(rows(first), rows(data_generator.generate(50, 10, 300, admins=2, seed=4)))
+        self.assertEqual(first.counts(), {'vehicles': 50, 'clients': 10, 'admins': 2, 'rentals': 300,
+                                          'active_rentals': 5})
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            data_generator.write(first, data_dir)
+            shop = Shop("Benchmark Shop", data_dir=data_dir)
+            self.assertEqual(len(shop.rentals), 300)
+            self.assertEqual(len(shop.get_active_rentals()), 5)
+            self.assertTrue(all(c.active_rental_count <= Client.MAX_ACTIVE_RENTALS for c in shop.clients))
+            self.assertIsNotNone(shop.login("C0", data_generator.PASSWORD))
+
+    def test_report_and_comparison(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "results.json")
+            self.assertEqual(bench_shop.main(["--scales", "500", "--ops", "20", "--repeat", "2",
+                                              "--output", output]), 0)
+            with open(output) as f:
+                report = json.load(f)
+        result, = report['results']
+        self.assertEqual(result['entities']['rentals'], 500)
+        self.assertEqual(set(result['operations']), {
+            'load_data', 'create_rental', 'end_rental', 'get_client_rentals', 'get_available_vehicles',
+            'get_vehicles_needing_itv', 'get_vehicles_needing_maintenance', 'save_data'})
+        self.assertEqual(result['operations']['create_rental']['calls'], 20)
+
+        slower = json.loads(json.dumps(report))
+        slower['results'][0]['operations']['save_data']['p50_us'] *= 2
+        self.assertEqual(bench_shop.compare(report, report), [])
+        self.assertEqual([name for _, name, _, _ in bench_shop.compare(report, slower)], ['save_data'])
+
+    def test_load_test(self):
+        options = dict(ops=300, mix=load_test.parse_mix(["rent=2", "return=2", "browse", "history"]),
+                       vehicles=100, clients=40, rentals=500, seed=5)
+        report = load_test.run(workers=4, **options)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(report['operations_total'], 300)
+        self.assertEqual(set(report['operations']), {'rent', 'return', 'browse', 'history'})
+        for stats in report['operations'].values():
+            self.assertLessEqual(stats['p50_us'], stats['p95_us'])
+            self.assertLessEqual(stats['p95_us'], stats['p99_us'])
+            self.assertEqual(sum(stats['histogram'].values()), stats['count'])
+
+        # One worker replays the same operations for the same seed
+        counts = lambda report: {name: (stats['count'], stats['rejected'])
+                                 for name, stats in report['operations'].items()}
+        self.assertEqual(counts(load_test.run(workers=1, **options)), counts(load_test.run(workers=1, **options)))
+        with self.assertRaises(ValueError):
+            load_test.parse_mix(["teleport=1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
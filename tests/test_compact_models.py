@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.admin import Admin
+from models.rental import Rental
+
+class TestCompactModels(unittest.TestCase):
+    def test_models_have_no_instance_dict(self):
+        objects = [
+            Car("V1", "Toyota", "Corolla", 2018, 40.0, 5),
+            Motorbike("V2", "Honda", "CBR", 2020, 25.0, 600),
+            Truck("V3", "Volvo", "FH16", 2015, 120.0, 18),
+            Client("John Doe", "1990-01-15", "C1", "secret"),
+            Admin("Admin User", "1980-05-30", "A1", "admin"),
+            Rental("R1", "C1", "V1", "2024-01-01")
+        ]
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj).__name__)
+        with self.assertRaises(AttributeError):
+            objects[0].undeclared = True
+
+    def test_collections_are_created_on_first_use(self):
+        client = Client("John Doe", "1990-01-15", "C1", "secret")
+        car = Car("V1", "Toyota", "Corolla", 2018, 40.0, 5)
+        self.assertIsNone(client._rentals)
+        self.assertIsNone(client._registered_vehicles)
+        self.assertEqual(client.get_active_rentals(), [])
+        self.assertIsNone(client.get_vehicle_by_license_plate("1234ABC"))
+        self.assertIsNone(client._rentals)
+
+        car.update_info(license_plate="1234ABC")
+        self.assertTrue(client.register_vehicle(car))
+        self.assertIs(client.get_vehicle_by_license_plate("1234ABC"), car)
+        rental = Rental("R1", "C1", "V1", "2024-01-01")
+        client.add_rental(rental)
+        self.assertTrue(client.can_return_vehicle(rental))
+        self.assertIsNone(car._rentals)
+        self.assertEqual(car.rentals, [])
+
+    def test_ids_are_interned(self):
+        # Build the ids at runtime, as the CSV reader does
+        first = Rental("R1", "".join(["C", "42"]), "".join(["V", "7"]), "2024-01-01")
+        second = Rental("R2", "".join(["C", "42"]), "".join(["V", "7"]), "2024-02-01")
+        self.assertIs(first.client_username, second.client_username)
+        self.assertIs(first.vehicle_id, second.vehicle_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
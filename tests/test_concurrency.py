@@ -0,0 +1,141 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.client import Client
+from models.locks import SharedLock
+from models.shop import Shop
+
+class TestConcurrency(unittest.TestCase):
+    NUM_VEHICLES = 4
+    NUM_CLIENTS = 12
+    NUM_THREADS = 8
+    OPERATIONS = 300
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.switch_interval = sys.getswitchinterval()
+        # Switch threads as often as possible to expose races
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+        self.tmpdir.cleanup()
+
+    def _build_shop(self):
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name, journal=True, journal_fsync='never')
+        for i in range(self.NUM_VEHICLES):
+            shop.add_vehicle(Car(f"V{i}", "Toyota", "Corolla", 2018, 40.0, 5))
+        for i in range(self.NUM_CLIENTS):
+            shop.add_client(Client(f"Client {i}", "1990-01-15", f"C{i}", "secret"))
+        return shop
+
+    def _run_threads(self, target):
+        errors = []
+
+        def run(seed):
+            try:
+                target(random.Random(seed))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(seed,)) for seed in range(self.NUM_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_rentals_never_double_book(self):
+        shop = self._build_shop()
+        holders = {f"V{i}": 0 for i in range(self.NUM_VEHICLES)}
+        overlaps = []
+        holders_lock = threading.Lock()
+
+        def worker(rnd):
+            for _ in range(self.OPERATIONS):
+                vehicle_id = f"V{rnd.randrange(self.NUM_VEHICLES)}"
+                rental = shop.create_rental(vehicle_id, f"C{rnd.randrange(self.NUM_CLIENTS)}",
+                                            start_date="2024-01-01")
+                if rental is None:
+                    continue
+                with holders_lock:
+                    holders[vehicle_id] += 1
+                    if holders[vehicle_id] > 1:
+                        overlaps.append(vehicle_id)
+                time.sleep(0)
+                with holders_lock:
+                    holders[vehicle_id] -= 1
+                self.assertTrue(shop.end_rental(rental.rental_id, rental.initial_mileage + rnd.randrange(1000)))
+                if rnd.random() < 0.02:
+                    shop.save_data()
+
+        self._run_threads(worker)
+
+        self.assertEqual(overlaps, [])
+        self.assertEqual(shop.get_active_rentals(), [])
+        self.assertEqual(len({r.rental_id for r in shop.rentals}), len(shop.rentals))
+        for vehicle_id in holders:
+            history = shop.get_vehicle_rentals(vehicle_id)
+            self.assertTrue(all(not r.is_active() for r in history))
+
+        # Journal and snapshots written concurrently still rebuild the same state
+        shop.close()
+        reloaded = Shop("Test Shop", data_dir=self.tmpdir.name, journal=True)
+        self.assertEqual(sorted(r.rental_id for r in reloaded.rentals), sorted(r.rental_id for r in shop.rentals))
+        self.assertEqual(reloaded.get_active_rentals(), [])
+
+    def test_at_most_one_active_rental_per_vehicle(self):
+        shop = self._build_shop()
+
+        def worker(rnd):
+            for _ in range(self.OPERATIONS):
+                vehicle_id = f"V{rnd.randrange(self.NUM_VEHICLES)}"
+                if rnd.random() < 0.5:
+                    shop.create_rental(vehicle_id, f"C{rnd.randrange(self.NUM_CLIENTS)}", start_date="2024-01-01")
+                else:
+                    active = [r for r in shop.get_active_rentals() if r.vehicle_id == vehicle_id]
+                    for rental in active:
+                        shop.end_rental(rental.rental_id, 100)
+
+        self._run_threads(worker)
+
+        active_by_vehicle = {}
+        for rental in shop.rentals:
+            if rental.is_active():
+                active_by_vehicle.setdefault(rental.vehicle_id, []).append(rental)
+        self.assertTrue(all(len(rentals) == 1 for rentals in active_by_vehicle.values()))
+        self.assertEqual(sorted(r.rental_id for r in shop.get_active_rentals()),
+                         sorted(r.rental_id for rentals in active_by_vehicle.values() for r in rentals))
+        for i in range(self.NUM_CLIENTS):
+            self.assertLessEqual(len(shop.get_client_active_rentals(f"C{i}")), 3)
+
+    def test_shared_lock_waits_for_exclusive_holder(self):
+        lock = SharedLock()
+        events = []
+
+        def read():
+            with lock.shared():
+                events.append("shared")
+
+        with lock.exclusive():
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(0.05)
+            events.append("exclusive released")
+            # Re-entrant for the exclusive holder
+            with lock.shared():
+                pass
+        reader.join()
+        self.assertEqual(events, ["exclusive released", "shared"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.admin import Admin
+from models.user import User
+from models.vehicle import Vehicle
+from models.rental import Rental
+from models.csv_utils import format_day, parse_day
+
+class TestCsvCodecs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def _read(self, name):
+        with open(self._path(name), newline='') as f:
+            return f.read()
+
+    def test_rentals_round_trip_byte_for_byte(self):
+        closed = Rental("R1", "C1", "V1", datetime(2024, 1, 1, 9, 30), "2024-01-05")
+        closed.initial_mileage = 15000
+        closed.final_mileage = 15200.5
+        closed.return_date = closed.end_date
+        rentals = [closed, Rental("R2", "C1", "V2", "2024-02-01")]
+
+        Rental.save_rentals_to_csv(rentals, self._path("a.csv"))
+        loaded = Rental.load_rentals_from_csv(self._path("a.csv"))
+        self.assertEqual([r.to_dict() for r in loaded], [r.to_dict() for r in rentals])
+        Rental.save_rentals_to_csv(loaded, self._path("b.csv"))
+        self.assertEqual(self._read("a.csv"), self._read("b.csv"))
+        # Parsed days are shared between rows
+        self.assertIs(loaded[0].end_date, loaded[0].return_date)
+
+    def test_rental_columns_are_matched_by_name(self):
+        with open(self._path("rentals.csv"), 'w', newline='') as f:
+            f.write("return_date,final_mileage,initial_mileage,end_date,vehicle_id,client_username,start_date,rental_id\n")
+            f.write(",,100,,V1,C1,2024-03-01,R1\n")
+            f.write(",,100,,V1,C1,not-a-date,R2\n")
+        rentals = Rental.load_rentals_from_csv(self._path("rentals.csv"))
+        self.assertEqual([(r.rental_id, r.client_username, r.start_date, r.initial_mileage) for r in rentals],
+                         [("R1", "C1", datetime(2024, 3, 1), 100)])
+
+        with open(self._path("legacy.csv"), 'w', newline='') as f:
+            f.write("rental_id,client_id,start_date\nR1,C1,2024-03-01\n")
+        self.assertEqual(Rental.load_rentals_from_csv(self._path("legacy.csv")), [])
+
+    def test_vehicles_and_users_round_trip(self):
+        car = Car("V1", "Toyota", "Corolla", 2018, 40.0, 5)
+        car.update_info(color="Blue", license_plate="1234ABC", matriculation_date="2018-05-15", mileage=15000)
+        car.is_available = False
+        vehicles = [car, Motorbike("V2", "Honda", "CBR", 2020, 25.5, 600), Truck("V3", "Volvo", "FH16", 2015, 120, 18)]
+        Vehicle.save_vehicles_to_csv(vehicles, self._path("vehicles.csv"))
+        loaded = Vehicle.load_vehicles_from_csv(self._path("vehicles.csv"))
+        self.assertEqual([type(v) for v in loaded], [Car, Motorbike, Truck])
+        self.assertEqual([v.to_csv_row() for v in loaded], [v.to_csv_row() for v in vehicles])
+
+        users = [Client("John Doe", "1990-01-15", "C1", "secret"),
+                 Admin("Admin User", "1980-05-30", "A1", "admin", role="mechanic")]
+        User.save_users_to_csv(users, self._path("users.csv"))
+        self.assertEqual([u.to_csv_row() for u in User.load_users_from_csv(self._path("users.csv"))],
+                         [u.to_csv_row() for u in users])
+
+    def test_day_helpers(self):
+        self.assertIs(parse_day("2024-02-29"), parse_day("2024-02-29"))
+        self.assertEqual(format_day(datetime(2024, 2, 29, 23, 59)), "2024-02-29")
+        with self.assertRaises(ValueError):
+            parse_day("2024-02-30")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import importlib.util
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy is required for fleet schedules")
+class TestFleetSchedule(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.vehicles = []
+        for i in range(600):
+            vehicle_class = (Car, Motorbike, Truck)[i % 3]
+            vehicle = vehicle_class(f"V{i}", "Brand", "Model", 2010, 50.0, 4)
+            matriculation = date(1995, 1, 1) + timedelta(days=rng.randrange(365 * 32))
+            vehicle.update_info(matriculation_date=matriculation.strftime("%Y-%m-%d"))
+            self.vehicles.append(vehicle)
+        self.as_of_dates = [date(2025, 1, 1) + timedelta(days=d) for d in range(0, 366, 7)]
+        self.as_of_dates.append(date(2024, 2, 29))
+
+    def _expected(self, method, as_of):
+        expected = {}
+        for vehicle in self.vehicles:
+            try:
+                expected[vehicle.vehicle_id] = getattr(vehicle, method)(as_of)
+            except ValueError:
+                pass
+        return expected
+
+    def _check(self, compute, method):
+        for as_of in self.as_of_dates:
+            expected = self._expected(method, as_of)
+            valid_vehicles = [v for v in self.vehicles if v.vehicle_id in expected]
+            self.assertEqual(compute(valid_vehicles, as_of), expected, as_of)
+
+    def test_itv_schedule_matches_per_vehicle_rules(self):
+        from models.fleet_schedule import compute_itv_schedule
+        self._check(compute_itv_schedule, "next_itv_date")
+
+    def test_maintenance_schedule_matches_per_vehicle_rules(self):
+        from models.fleet_schedule import compute_maintenance_schedule
+        self._check(compute_maintenance_schedule, "next_maintenance_date")
+
+    def test_invalid_dates_raise_like_per_vehicle_rules(self):
+        from models.fleet_schedule import compute_itv_schedule
+        truck = Truck("T1", "Volvo", "FH16", 2000, 100.0, 18)
+        truck.update_info(matriculation_date="2005-08-31")
+        with self.assertRaises(ValueError):
+            truck.next_itv_date(date(2025, 9, 15))
+        with self.assertRaises(ValueError):
+            compute_itv_schedule([truck], date(2025, 9, 15))
+
+if __name__ == "__main__":
+    unittest.main()
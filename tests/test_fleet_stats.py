@@ -0,0 +1,132 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.shop import Shop
+from models.sqlite_repository import SqliteRepository
+
+class TestFleetStats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _populate(self, shop):
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_vehicle(Car("V2", "Seat", "Ibiza", 2020, 30.0, 5))
+        shop.add_vehicle(Motorbike("V3", "Honda", "CBR", 2020, 25.0, 600))
+        shop.add_vehicle(Truck("V4", "Volvo", "FH16", 2015, 100.0, 18))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        shop.add_client(Client("Jane Doe", "1992-03-10", "C2", "secret"))
+
+    def _recount(self, shop):
+        """Compute the counters from the rental list, as a dashboard used to."""
+        types = {}
+        for rental in shop.rentals:
+            vehicle = shop.get_vehicle_by_id(rental.vehicle_id)
+            if vehicle is None:
+                continue
+            counters = types.setdefault(vehicle.type, {'rentals': 0, 'active': 0, 'rented_days': 0,
+                                                       'mileage': 0, 'revenue': 0.0})
+            counters['rentals'] += 1
+            if rental.is_active():
+                counters['active'] += 1
+            else:
+                days = (rental.end_date.date() - rental.start_date.date()).days
+                counters['rented_days'] += days
+                counters['revenue'] += vehicle.calculate_rental_cost(days)
+                if rental.initial_mileage is not None:
+                    counters['mileage'] += rental.final_mileage - rental.initial_mileage
+        return types
+
+    def _rent_and_return(self, shop):
+        first = shop.create_rental("V1", "C1", start_date="2024-01-01")
+        shop.end_rental(first.rental_id, 1250)
+        shop.create_rental("V1", "C1")
+        rentals, _ = shop.create_rentals_bulk([("V3", "C2"), ("V4", "C2")], start_date="2024-02-01")
+        shop.end_rentals_bulk([(rentals[0].rental_id, 50), (rentals[1].rental_id, 80)])
+        shop.create_rental("V2", "C2", start_date="2024-03-01")
+        return first
+
+    def test_counters_follow_rentals(self):
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name, journal=True)
+        self._populate(shop)
+        first = self._rent_and_return(shop)
+
+        stats = shop.fleet_stats()
+        self.assertEqual(stats['types'], self._recount(shop))
+        self.assertEqual(stats['vehicles']['V1']['rentals'], 2)
+        self.assertEqual(stats['vehicles']['V1']['active'], 1)
+        self.assertEqual(stats['vehicles']['V1']['revenue'], (first.end_date.date() - first.start_date.date()).days * 40.0)
+        self.assertEqual(stats['fleet']['rentals'], 5)
+        self.assertEqual(stats['fleet']['active'], 2)
+        self.assertNotIn('vehicles', shop.fleet_stats(by_vehicle=False))
+
+        # Replaying the journal and loading the saved files give the same counters
+        self.assertEqual(Shop("Test Shop", data_dir=self.tmpdir.name, journal=True).fleet_stats(), stats)
+        shop.save_data()
+        self.assertEqual(Shop("Test Shop", data_dir=self.tmpdir.name).fleet_stats(), stats)
+
+    def test_live_counters_match_a_reload(self):
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name, journal=True)
+        self._populate(shop)
+        shop.get_vehicle_by_id("V3").update_info(mileage=1000)
+        # Rentals carry the time of day they start and end at, the files only the day
+        rental = shop.create_rental("V3", "C1", start_date=datetime(2024, 1, 1, 18, 30))
+        self.assertEqual(rental.initial_mileage, 1000)
+        shop.end_rental(rental.rental_id, 1250)
+        rental = shop.create_rental("V3", "C1")
+        rental.start_date = rental.start_date.replace(hour=23)
+        shop.end_rental(rental.rental_id, 1300)
+        shop.get_vehicle_by_id("V3").update_info(daily_rate=99.0)
+
+        stats = shop.fleet_stats()
+        days = (date.today() - date(2024, 1, 1)).days
+        self.assertEqual(stats['vehicles']['V3'], {'rentals': 2, 'active': 0, 'rented_days': days,
+                                                   'mileage': 300, 'revenue': days * 99.0})
+        self.assertEqual(stats['types']['Motorbike']['revenue'], days * 99.0)
+        self.assertEqual(Shop("Test Shop", data_dir=self.tmpdir.name, journal=True).fleet_stats(), stats)
+        shop.save_data()
+        self.assertEqual(Shop("Test Shop", data_dir=self.tmpdir.name).fleet_stats(), stats)
+
+    def test_archive_and_vehicle_removal(self):
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self._populate(shop)
+        self._rent_and_return(shop)
+
+        self.assertTrue(shop.remove_vehicle("V4"))
+        self.assertNotIn("V4", shop.fleet_stats()['vehicles'])
+        types = shop.fleet_stats()['types']
+        self.assertEqual(types.pop('Truck'), {'rentals': 0, 'active': 0, 'rented_days': 0, 'mileage': 0, 'revenue': 0.0})
+        self.assertEqual(types, self._recount(shop))
+
+        shop.archive_rentals("2100-01-01")
+        stats = shop.fleet_stats()
+        self.assertEqual(stats['fleet']['rentals'], 2)
+        self.assertEqual(stats['fleet']['revenue'], 0)
+        self.assertEqual(Shop("Test Shop", data_dir=self.tmpdir.name).fleet_stats()['fleet'], stats['fleet'])
+
+    def test_sqlite_counts_closed_rentals_not_loaded(self):
+        db_path = os.path.join(self.tmpdir.name, "shop.db")
+        shop = Shop("Test Shop", repository=SqliteRepository(db_path))
+        self._populate(shop)
+        self._rent_and_return(shop)
+        stats = shop.fleet_stats()
+        shop.close()
+
+        reopened = Shop("Test Shop", repository=SqliteRepository(db_path))
+        self.assertEqual(reopened.fleet_stats(), stats)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.truck import Truck
+from models.client import Client
+from models.admin import Admin
+from models.journal import Journal
+from models.shop import Shop
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmpdir.name
+        self.journal_path = os.path.join(self.data_dir, "journal.log")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _open_shop(self):
+        return Shop("Test Shop", data_dir=self.data_dir, journal=True)
+
+    def test_mutations_survive_restart_without_save(self):
+        shop = self._open_shop()
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_vehicle(Truck("V2", "Volvo", "FH16", 2015, 120.0, 18))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        shop.add_admin(Admin("Admin User", "1980-05-30", "A1", "admin", role="mechanic"))
+        first = shop.create_rental("V1", "C1", start_date="2024-01-01")
+        shop.end_rental(first.rental_id, 15200)
+        second = shop.create_rental("V2", "C1", start_date="2024-02-01")
+        shop.get_vehicle_by_id("V2").update_info(color="White", matriculation_date="2015-08-22")
+        shop.remove_admin("A1")
+        shop.set_client_rental_limit("C1", 10)
+        shop.close()
+
+        reloaded = self._open_shop()
+        self.assertEqual([v.vehicle_id for v in reloaded.vehicles], ["V1", "V2"])
+        self.assertEqual(reloaded.get_vehicle_by_id("V1").mileage, 15200)
+        self.assertEqual(reloaded.get_vehicle_by_id("V2").color, "White")
+        self.assertEqual(reloaded.get_vehicle_by_id("V2").matriculation_date, "2015-08-22")
+        self.assertEqual(reloaded.get_client_by_id("C1").rental_limit, 10)
+        self.assertEqual(reloaded.get_client_by_id("C1").active_rental_count, 1)
+        self.assertIsNone(reloaded.get_admin_by_id("A1"))
+        self.assertFalse(reloaded.get_rental_by_id(first.rental_id).is_active())
+        self.assertEqual(reloaded.get_rental_by_id(first.rental_id).final_mileage, 15200)
+        self.assertEqual([r.rental_id for r in reloaded.get_active_rentals()], [second.rental_id])
+
+    def test_vehicle_update_is_recorded_before_it_is_applied(self):
+        shop = self._open_shop()
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        vehicle = shop.get_vehicle_by_id("V1")
+
+        def fail(op, data):
+            raise OSError("disk full")
+        shop.repository.record = fail
+        with self.assertRaises(OSError):
+            vehicle.update_info(color="Red", daily_rate=55.0)
+        self.assertEqual((vehicle.color, vehicle.daily_rate), (None, 40.0))
+        self.assertEqual(shop.search_vehicles(max_rate=50.0), [vehicle])
+        with self.assertRaises(ValueError):
+            vehicle.update_info(color="Red", daily_rate=-1)
+        self.assertIsNone(vehicle.color)
+        shop.close()
+
+    def test_save_compacts_journal_into_snapshot(self):
+        shop = self._open_shop()
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        rental = shop.create_rental("V1", "C1")
+        self.assertGreater(os.path.getsize(self.journal_path), 0)
+
+        shop.save_data()
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+
+        shop.end_rental(rental.rental_id, 100)
+        shop.close()
+        reloaded = self._open_shop()
+        car = reloaded.get_vehicle_by_id("V1")
+        self.assertIsInstance(car, Car)
+        self.assertEqual((car.year, car.daily_rate, car.num_doors, car.mileage), (2018, 40.0, 5, 100))
+        self.assertTrue(reloaded.is_vehicle_available("V1"))
+
+    def test_bulk_operations_are_one_record(self):
+        shop = self._open_shop()
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_vehicle(Truck("V2", "Volvo", "FH16", 2015, 120.0, 18))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        shop.save_data()
+        rentals, _ = shop.create_rentals_bulk([("V1", "C1"), ("V2", "C1")])
+        shop.end_rentals_bulk([(rentals[0].rental_id, 250)])
+        shop.close()
+        with open(self.journal_path) as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 2)
+
+        reloaded = self._open_shop()
+        self.assertEqual(reloaded.get_vehicle_by_id("V1").mileage, 250)
+        self.assertEqual([r.rental_id for r in reloaded.get_active_rentals()], [rentals[1].rental_id])
+
+    def test_torn_last_record_is_ignored(self):
+        journal = Journal(self.journal_path)
+        journal.append('remove_vehicle', {'vehicle_id': 'V1'})
+        journal.close()
+        with open(self.journal_path, 'a') as journal_file:
+            journal_file.write('{"op": "remove_veh')
+
+        self.assertEqual(list(journal.replay()), [('remove_vehicle', {'vehicle_id': 'V1'})])
+
+    def test_invalid_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            Journal(self.journal_path, fsync='sometimes')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.truck import Truck
+from models.client import Client
+from models.rental import Rental
+from models.rental_archive import RentalArchive
+from models.shop import Shop
+
+class TestRentalArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive_dir = os.path.join(self.tmpdir.name, "archive")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _rental(self, rental_id, client, vehicle, start, end):
+        rental = Rental(rental_id, client, vehicle, start, end)
+        rental.final_mileage = 1000
+        rental.return_date = rental.end_date
+        return rental
+
+    def test_partitions_by_end_month_and_pages_in_on_demand(self):
+        archive = RentalArchive(self.archive_dir, compression='lzma')
+        archive.archive([
+            self._rental("R1", "C1", "V1", "2023-01-05", "2023-01-10"),
+            self._rental("R2", "C2", "V2", "2023-01-20", "2023-02-02"),
+            self._rental("R3", "C1", "V2", "2023-02-10", "2023-02-12")
+        ])
+        self.assertEqual(archive.partitions, ["2023-01", "2023-02"])
+        self.assertTrue(os.path.exists(os.path.join(self.archive_dir, "rentals-2023-02.csv.xz")))
+
+        reopened = RentalArchive(self.archive_dir)
+        self.assertEqual([r.rental_id for r in reopened.vehicle_rentals("V1")], ["R1"])
+        # Only the January partition lists V1, so February was never read
+        self.assertEqual(list(reopened._cache), ["2023-01"])
+        self.assertEqual([r.rental_id for r in reopened.client_rentals("C1")], ["R1", "R3"])
+
+    def test_vehicle_rentals_between_reads_overlapping_months_only(self):
+        archive = RentalArchive(self.archive_dir)
+        archive.archive([
+            self._rental("R1", "C1", "V1", "2023-01-05", "2023-01-10"),
+            self._rental("R2", "C1", "V1", "2023-02-20", "2023-03-02"),
+            self._rental("R3", "C1", "V1", "2023-04-10", "2023-04-12"),
+            self._rental("R4", "C1", "V1", "2023-05-10", "2023-05-12")
+        ])
+
+        reopened = RentalArchive(self.archive_dir)
+        rentals = reopened.vehicle_rentals_between("V1", datetime(2023, 2, 1), datetime(2023, 3, 15))
+        self.assertEqual([r.rental_id for r in rentals], ["R2"])
+        # January ended before the period and April and May start after it
+        self.assertEqual(list(reopened._cache), ["2023-03"])
+        rentals = reopened.vehicle_rentals_between("V1", datetime(2023, 3, 1), datetime(2023, 4, 10))
+        self.assertEqual([r.rental_id for r in rentals], ["R2", "R3"])
+        # Partitions store whole days, so a period given with a time of day
+        # still matches the rentals of its first and last days
+        archive.archive([self._rental("R5", "C1", "V1", datetime(2023, 6, 1, 15, 30), datetime(2023, 6, 3, 9, 0))])
+        for day in (datetime(2023, 6, 1, 10, 0), datetime(2023, 6, 3, 10, 0)):
+            self.assertEqual([r.rental_id for r in archive.vehicle_rentals_between("V1", day, day)], ["R5"])
+
+    def test_archiving_twice_does_not_duplicate(self):
+        archive = RentalArchive(self.archive_dir)
+        rental = self._rental("R1", "C1", "V1", "2023-01-05", "2023-01-10")
+        self.assertEqual(archive.archive([rental]), 1)
+        self.assertEqual(archive.archive([rental]), 0)
+        self.assertEqual(len(list(archive.iter_rentals())), 1)
+
+        with self.assertRaises(ValueError):
+            archive.archive([Rental("R2", "C1", "V1", "2023-01-05")])
+        with self.assertRaises(ValueError):
+            RentalArchive(self.archive_dir, compression='zip')
+
+    def test_shop_keeps_archived_rentals_in_history(self):
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name)
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_vehicle(Truck("V2", "Volvo", "FH16", 2015, 120.0, 18))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        closed = shop.create_rental("V1", "C1", start_date="2024-01-01")
+        shop.end_rental(closed.rental_id, 15200)
+        active = shop.create_rental("V2", "C1", start_date="2024-03-01")
+
+        tomorrow = datetime.now() + timedelta(days=1)
+        self.assertEqual(shop.archive_rentals(tomorrow), 1)
+        self.assertEqual([r.rental_id for r in shop.rentals], [active.rental_id])
+        self.assertEqual([r.rental_id for r in shop.get_client_rentals("C1")],
+                         [closed.rental_id, active.rental_id])
+
+        reloaded = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self.assertEqual(len(reloaded.rentals), 1)
+        self.assertEqual([r.rental_id for r in reloaded.get_vehicle_rentals("V1")], [closed.rental_id])
+        self.assertEqual([r.rental_id for r in reloaded.get_vehicle_rentals_between("V1", "2024-01-01", tomorrow)],
+                         [closed.rental_id])
+        self.assertEqual(reloaded.count_rentals_by_client(), {"C1": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
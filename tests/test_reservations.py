@@ -0,0 +1,166 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.client import Client
+from models.reservation import Reservation
+from models.reservation_calendar import ReservationCalendar
+from models.shop import Shop
+from models.sqlite_repository import SqliteRepository
+
+class TestReservations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.shop = self._open_shop()
+        for i in range(1, 4):
+            self.shop.add_vehicle(Car(f"V{i}", "Toyota", "Corolla", 2018, 40.0, 5))
+        self.shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        self.shop.add_client(Client("Jane Roe", "1985-03-10", "C2", "secret"))
+
+    def tearDown(self):
+        self.shop.close()
+        self.tmpdir.cleanup()
+
+    def _open_shop(self):
+        return Shop("Test Shop", data_dir=self.tmpdir.name, journal=True, journal_fsync='never')
+
+    def _available(self, start_date, end_date=None):
+        return [v.vehicle_id for v in self.shop.get_available_vehicles(start_date, end_date)]
+
+    def test_calendar_detects_overlaps(self):
+        calendar = ReservationCalendar()
+        self.assertTrue(calendar.add(Reservation("R1", "C1", "V1", "2099-05-10", "2099-05-12")))
+        self.assertTrue(calendar.add(Reservation("R2", "C1", "V1", "2099-05-01", "2099-05-03")))
+        self.assertTrue(calendar.add(Reservation("R3", "C1", "V1", "2099-05-13", "2099-05-13")))
+        self.assertFalse(calendar.add(Reservation("R4", "C2", "V1", "2099-05-03", "2099-05-04")))
+        self.assertFalse(calendar.add(Reservation("R5", "C2", "V1", "2099-04-01", "2099-06-01")))
+
+        day = lambda text: datetime.strptime(text, "%Y-%m-%d")
+        self.assertTrue(calendar.is_free("V1", day("2099-05-04"), day("2099-05-09")))
+        self.assertEqual(calendar.booked_between("V1", day("2099-05-11"), day("2099-05-12")), ["R1"])
+        self.assertEqual(calendar.booked_between("V1", day("2099-05-13"), day("2099-05-13")), ["R3"])
+        self.assertTrue(calendar.is_free("V2", day("2099-05-01"), day("2099-05-31")))
+        self.assertEqual(calendar.booked_between("V1", day("2099-05-03"), day("2099-05-11")), ["R2", "R1"])
+        self.assertEqual(calendar.booked_between("V1", day("2099-05-11")), ["R1", "R3"])
+        self.assertEqual(calendar.booked_between("V1", day("2099-05-14")), [])
+
+        calendar.remove(Reservation("R1", "C1", "V1", "2099-05-10", "2099-05-12"))
+        self.assertTrue(calendar.is_free("V1", day("2099-05-04"), day("2099-05-12")))
+
+        with self.assertRaises(ValueError):
+            Reservation("R6", "C1", "V1", "2099-05-10", "2099-05-09")
+
+    def test_reservations_drive_range_availability(self):
+        first = self.shop.reserve_vehicle("V1", "C1", "2099-07-01", "2099-07-10")
+        self.assertIsNotNone(first)
+        self.assertIsNone(self.shop.reserve_vehicle("V1", "C2", "2099-07-10", "2099-07-12"))
+        self.assertIsNotNone(self.shop.reserve_vehicle("V1", "C2", "2099-07-11", "2099-07-12"))
+        self.assertIsNone(self.shop.reserve_vehicle("V9", "C2", "2099-07-11", "2099-07-12"))
+
+        self.assertEqual(self._available("2099-07-05", "2099-07-20"), ["V2", "V3"])
+        self.assertEqual(self._available("2099-07-13"), ["V1", "V2", "V3"])
+        self.assertFalse(self.shop.is_vehicle_available("V1", "2099-06-25", "2099-07-01"))
+        self.assertTrue(self.shop.is_vehicle_available("V1"))
+
+        # A vehicle out on an open-ended rental is not offered for any range
+        self.shop.create_rental("V2", "C2")
+        self.assertEqual(self._available("2099-08-01", "2099-08-02"), ["V1", "V3"])
+        self.assertEqual(self._available(None), ["V1", "V3"])
+
+        self.assertEqual([r.reservation_id for r in self.shop.get_client_reservations("C1")], [first.reservation_id])
+        self.assertTrue(self.shop.cancel_reservation(first.reservation_id))
+        self.assertFalse(self.shop.cancel_reservation(first.reservation_id))
+        self.assertEqual(self._available("2099-07-05"), ["V1", "V3"])
+
+    def test_dates_are_accepted_like_strings(self):
+        reservation = self.shop.reserve_vehicle("V1", "C1", date(2099, 5, 10), date(2099, 5, 12))
+        self.assertIsNotNone(reservation)
+        self.assertEqual(reservation.start_date, datetime(2099, 5, 10))
+        self.assertFalse(self.shop.is_vehicle_available("V1", date(2099, 5, 12)))
+        self.assertTrue(self.shop.is_vehicle_available("V1", date(2099, 5, 13), date(2099, 5, 20)))
+        self.assertEqual(self._available(date(2099, 5, 9), date(2099, 5, 10)), ["V2", "V3"])
+        self.assertEqual(self._available(date(2099, 5, 9), date(2099, 5, 10)), self._available("2099-05-09", "2099-05-10"))
+        with self.assertRaises(ValueError):
+            self.shop.reserve_vehicle("V2", "C1", date(2000, 1, 1), date(2000, 1, 2))
+
+    def test_rentals_respect_reservations(self):
+        reservation = self.shop.reserve_vehicle("V1", "C1", "2099-07-01", "2099-07-10")
+        self.assertIsNone(self.shop.create_rental("V1", "C2", start_date="2099-07-03"))
+        self.assertFalse(self.shop.remove_vehicle("V1"))
+        _, failures = self.shop.create_rentals_bulk([("V1", "C2")], start_date="2099-07-03")
+        self.assertEqual(failures, {0: "Vehicle V1 is reserved"})
+
+        # A walk-in rental has no planned return, so it cannot start before someone else's reservation
+        self.assertIsNone(self.shop.create_rental("V1", "C2"))
+        _, failures = self.shop.create_rentals_bulk([("V1", "C2")])
+        self.assertEqual(failures, {0: "Vehicle V1 is reserved"})
+
+        rental = self.shop.start_reservation(reservation.reservation_id, start_date="2099-07-01")
+        self.assertEqual((rental.vehicle_id, rental.client_username), ("V1", "C1"))
+        self.assertIsNone(self.shop.get_reservation_by_id(reservation.reservation_id))
+        self.assertIsNone(self.shop.start_reservation(reservation.reservation_id))
+
+    def test_pick_up_is_checked_up_to_the_reservation_end(self):
+        other = self.shop.reserve_vehicle("V2", "C2", "2099-07-02", "2099-07-03")
+        later = self.shop.reserve_vehicle("V2", "C2", "2099-07-20", "2099-07-21")
+        mine = self.shop.reserve_vehicle("V2", "C1", "2099-07-05", "2099-07-06")
+        # Picked up early, it would run into the other client's days before it
+        self.assertIsNone(self.shop.start_reservation(mine.reservation_id, start_date="2099-07-01"))
+        self.assertIsNotNone(self.shop.start_reservation(mine.reservation_id, start_date="2099-07-05"))
+        self.assertEqual({r.reservation_id for r in self.shop.reservations},
+                         {other.reservation_id, later.reservation_id})
+
+    def test_reservations_cannot_start_in_the_past(self):
+        with self.assertRaises(ValueError):
+            self.shop.reserve_vehicle("V1", "C1", "2000-01-01", "2099-01-02")
+        self.assertIsNotNone(self.shop.reserve_vehicle("V1", "C1", datetime.now(), datetime.now()))
+
+    def test_removing_a_client_cancels_their_reservations(self):
+        kept = self.shop.reserve_vehicle("V1", "C1", "2099-07-01", "2099-07-10")
+        self.shop.reserve_vehicle("V2", "C2", "2099-07-01", "2099-07-10")
+        self.shop.reserve_vehicle("V3", "C2", "2099-08-01", "2099-08-10")
+        self.assertTrue(self.shop.remove_client("C2"))
+        self.assertEqual([r.reservation_id for r in self.shop.reservations], [kept.reservation_id])
+        self.assertEqual(self._available("2099-07-05", "2099-08-05"), ["V2", "V3"])
+        self.assertTrue(self.shop.remove_vehicle("V2"))
+        self.shop.close()
+
+        self.shop = self._open_shop()
+        self.assertEqual([r.reservation_id for r in self.shop.reservations], [kept.reservation_id])
+        self.assertIsNone(self.shop.get_client_by_id("C2"))
+
+    def test_reservations_are_persisted(self):
+        kept = self.shop.reserve_vehicle("V1", "C1", "2099-07-01", "2099-07-10")
+        self.shop.save_data()
+        cancelled = self.shop.reserve_vehicle("V2", "C2", "2099-07-01", "2099-07-10")
+        journaled = self.shop.reserve_vehicle("V3", "C2", "2099-07-05", "2099-07-06")
+        self.shop.cancel_reservation(cancelled.reservation_id)
+        self.shop.close()
+
+        self.shop = self._open_shop()
+        self.assertEqual(sorted(r.reservation_id for r in self.shop.reservations),
+                         sorted([kept.reservation_id, journaled.reservation_id]))
+        self.assertEqual(self._available("2099-07-05"), ["V2"])
+
+        repository = SqliteRepository(os.path.join(self.tmpdir.name, "shop.db"))
+        shop = Shop("Test Shop", repository=repository)
+        shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        reservation = shop.reserve_vehicle("V1", "C1", "2099-07-01", "2099-07-10")
+        shop.close()
+        shop = Shop("Test Shop", repository=SqliteRepository(repository.path))
+        self.assertEqual([r.to_dict() for r in shop.reservations], [reservation.to_dict()])
+        self.assertTrue(shop.cancel_reservation(reservation.reservation_id))
+        shop.close()
+        shop = Shop("Test Shop", repository=SqliteRepository(repository.path))
+        self.assertEqual(shop.reservations, [])
+        shop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
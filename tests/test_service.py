@@ -0,0 +1,179 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.admin import Admin
+from models.car import Car
+from models.client import Client
+from models.service import ShopService
+from models.shop import Shop
+
+class TestShopService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.shop = Shop("Test Shop", data_dir=self.tmpdir.name, journal=True, journal_fsync='never')
+        for i in range(3):
+            self.shop.add_vehicle(Car(f"V{i}", "Toyota", "Corolla", 2018, 40.0, 5))
+        for i in range(5):
+            self.shop.add_client(Client(f"Client {i}", "1990-01-15", f"C{i}", "secret"))
+        self.shop.add_admin(Admin("Admin User", "1980-05-30", "A1", "admin"))
+
+    def tearDown(self):
+        self.shop.close()
+        self.tmpdir.cleanup()
+
+    def _serve(self, scenario):
+        async def run():
+            service = ShopService(self.shop, port=0, save_interval=None)
+            await service.start()
+            try:
+                return await scenario(service)
+            finally:
+                await service.stop()
+        return asyncio.run(run())
+
+    async def _connect(self, service, user_id=None, password="secret"):
+        reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+
+        async def call(op, **args):
+            writer.write(json.dumps(dict(args, op=op)).encode() + b'\n')
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        if user_id is not None:
+            reply = await call('login', user_id=user_id, password=password)
+            self.assertTrue(reply['ok'], reply)
+        return call, writer
+
+    def test_client_rent_and_return(self):
+        async def scenario(service):
+            call, writer = await self._connect(service, "C0")
+            self.assertEqual(len((await call('list_available'))['result']), 3)
+            rental = (await call('rent', vehicle_id="V1", start_date="2024-01-01"))['result']
+            self.assertEqual((rental['client_username'], rental['vehicle_id']), ("C0", "V1"))
+            self.assertNotIn("V1", [v['vehicle_id'] for v in (await call('list_available'))['result']])
+            self.assertFalse((await call('rent', vehicle_id="V1"))['ok'])
+
+            # Another client cannot return it
+            other, other_writer = await self._connect(service, "C1")
+            reply = await other('return', rental_id=rental['rental_id'], final_mileage=100)
+            self.assertFalse(reply['ok'])
+            other_writer.close()
+
+            returned = await call('return', rental_id=rental['rental_id'], final_mileage=100)
+            self.assertFalse(returned['result']['is_active'])
+            mine = (await call('my_rentals'))['result']
+            self.assertEqual([r['rental_id'] for r in mine], [rental['rental_id']])
+            writer.close()
+
+        self._serve(scenario)
+        # Persisted by stop()
+        reloaded = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self.assertEqual(len(reloaded.rentals), 1)
+        self.assertFalse(reloaded.rentals[0].is_active())
+
+    def test_errors_and_permissions(self):
+        async def scenario(service):
+            call, writer = await self._connect(service)
+            self.assertEqual((await call('ping'))['result'], 'pong')
+            self.assertIn("requires a logged-in client", (await call('rent', vehicle_id="V0"))['error'])
+            self.assertFalse((await call('login', user_id="C0", password="wrong"))['ok'])
+            self.assertIn("Operation must be one of", (await call('fly'))['error'])
+            self.assertTrue((await call('login', user_id="C0", password="secret"))['ok'])
+            self.assertIn("Missing parameter: vehicle_id", (await call('rent'))['error'])
+            self.assertFalse((await call('list_users'))['ok'])
+            writer.close()
+
+            # The session token also works from another connection, until logout
+            call, writer = await self._connect(service)
+            token = (await call('login', user_id="C1", password="secret"))['result']['token']
+            other, other_writer = await self._connect(service)
+            self.assertTrue((await other('my_rentals', token=token))['ok'])
+            self.assertTrue((await call('logout'))['ok'])
+            self.assertFalse((await other('my_rentals', token=token))['ok'])
+            self.assertFalse((await call('my_rentals'))['ok'])
+            writer.close()
+            other_writer.close()
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+            writer.write(b'not json\n{"op": "ping", "id": 7}\n')
+            self.assertEqual(json.loads(await reader.readline()), {'ok': False, 'error': "Invalid JSON"})
+            self.assertEqual(json.loads(await reader.readline()), {'id': 7, 'ok': True, 'result': 'pong'})
+            writer.close()
+
+            # Unexpected errors of the shop get a reply and leave the connection open
+            def fail(*args):
+                raise OSError("disk full")
+            self.shop.get_available_vehicles = fail
+            call, writer = await self._connect(service)
+            with self.assertLogs('models.service', 'ERROR'):
+                reply = await call('list_available', id=8)
+            self.assertEqual(reply, {'id': 8, 'ok': False, 'error': "Internal error"})
+            self.assertEqual((await call('ping'))['result'], 'pong')
+            writer.close()
+
+        self._serve(scenario)
+
+    def test_admin_operations(self):
+        async def scenario(service):
+            call, writer = await self._connect(service, "A1", "admin")
+            vehicle = {'type': 'Car', 'vehicle_id': 'V9', 'brand': 'Seat', 'model': 'Ibiza',
+                       'year': 2020, 'daily_rate': 30.0, 'num_doors': 5}
+            self.assertTrue((await call('add_vehicle', vehicle=vehicle))['ok'])
+            self.assertFalse((await call('add_vehicle', vehicle=vehicle))['ok'])
+            self.assertEqual(len((await call('list_vehicles'))['result']), 4)
+            users = (await call('list_users'))['result']
+            self.assertEqual(len(users), 6)
+            self.assertTrue(all('password' not in user for user in users))
+            stats = (await call('fleet_stats', by_vehicle=False))['result']
+            self.assertEqual((stats['fleet']['rentals'], stats['types']), (0, {}))
+            self.assertTrue((await call('remove_vehicle', vehicle_id="V9"))['ok'])
+            client_call, client_writer = await self._connect(service)
+            self.assertTrue((await client_call('register', name="New", birth_date="2000-01-01", user_id="C9",
+                                               password="pw"))['ok'])
+            self.assertTrue((await client_call('login', user_id="C9", password="pw"))['ok'])
+            client_writer.close()
+            self.assertFalse((await call('rent', vehicle_id="V0"))['ok'])
+            self.assertTrue((await call('save', force=True))['ok'])
+            writer.close()
+
+        self._serve(scenario)
+        self.assertEqual(len(Shop("Test Shop", data_dir=self.tmpdir.name).vehicles), 3)
+
+    def test_concurrent_clients(self):
+        async def scenario(service):
+            async def client(i):
+                call, writer = await self._connect(service, f"C{i}")
+                rented = []
+                for vehicle_id in ("V0", "V1", "V2"):
+                    reply = await call('rent', vehicle_id=vehicle_id, start_date="2024-01-01")
+                    if reply['ok']:
+                        rented.append(reply['result']['rental_id'])
+                for rental_id in rented:
+                    self.assertTrue((await call('return', rental_id=rental_id, final_mileage=10))['ok'])
+                writer.close()
+                return len(rented)
+
+            # Saves run on the thread pool while clients keep being served
+            admins = [await self._connect(service, "A1", "admin") for _ in range(2)]
+            results = await asyncio.gather(admins[0][0]('save', force=True),
+                                           *(client(i) for i in range(5)),
+                                           admins[1][0]('save', force=True))
+            for _, admin_writer in admins:
+                admin_writer.close()
+            return results[1:-1]
+
+        rented = self._serve(scenario)
+        self.assertEqual(sum(rented), len(self.shop.rentals))
+        self.assertEqual(self.shop.get_active_rentals(), [])
+        self.assertEqual(self.shop.fleet_stats()['fleet']['rentals'], sum(rented))
+        self.assertEqual(self.shop.fleet_stats()['fleet']['active'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.client import Client
+from models.admin import Admin
+from models.shop import Shop
+from models.csv_repository import CsvRepository
+from models.passwords import hash_password, is_password_hash, verify_password
+from models.sessions import SessionStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPasswords(unittest.TestCase):
+    def test_salted_hashes(self):
+        first, second = hash_password("secret"), hash_password("secret")
+        self.assertNotEqual(first, second)
+        self.assertTrue(is_password_hash(first))
+        self.assertTrue(verify_password("secret", first))
+        self.assertTrue(verify_password("secret", second))
+        self.assertFalse(verify_password("Secret", first))
+        self.assertFalse(verify_password("secret", "secret"))
+        # Malformed hashes, or legacy passwords that look like one, fail instead of raising
+        self.assertFalse(verify_password("secret", "pbkdf2_sha256$many$salt$hash"))
+        self.assertFalse(verify_password("secret", "pbkdf2_sha256$1000$not-hex$hash"))
+
+    def test_users_accept_hashed_and_legacy_passwords(self):
+        client = Client("John Doe", "1990-01-15", "C1", "plain")
+        self.assertTrue(client.authenticate("plain"))
+        self.assertFalse(client.has_password_hash())
+        client.set_password("better")
+        self.assertTrue(client.has_password_hash())
+        self.assertTrue(client.authenticate("better"))
+        self.assertFalse(client.authenticate("plain"))
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = SessionStore(ttl=60, max_sessions=3, clock=self.clock)
+        self.users = [Client(f"Client {i}", "1990-01-15", f"C{i}", "secret") for i in range(4)]
+
+    def test_sliding_expiry(self):
+        token = self.store.create(self.users[0])
+        self.clock.now = 50
+        self.assertIs(self.store.get(token), self.users[0])
+        self.clock.now = 100
+        self.assertIs(self.store.get(token), self.users[0])
+        self.clock.now = 161
+        self.assertIsNone(self.store.get(token))
+        self.assertEqual(len(self.store), 0)
+
+    def test_evicts_expired_then_least_recently_used(self):
+        tokens = [self.store.create(user) for user in self.users[:3]]
+        self.clock.now = 10
+        self.store.get(tokens[0])
+        # Full: the least recently used session (C1) makes room
+        fourth = self.store.create(self.users[3])
+        self.assertIsNone(self.store.get(tokens[1]))
+        self.assertEqual([self.store.get(t).user_id for t in (tokens[0], tokens[2], fourth)], ["C0", "C2", "C3"])
+
+        self.clock.now = 200
+        self.store.create(self.users[1])
+        self.assertEqual(len(self.store), 1)
+
+    def test_revoke(self):
+        first, second = self.store.create(self.users[0]), self.store.create(self.users[0])
+        other = self.store.create(self.users[1])
+        self.assertTrue(self.store.revoke(first))
+        self.assertFalse(self.store.revoke(first))
+        self.store.revoke_user("C0")
+        self.assertIsNone(self.store.get(second))
+        self.assertIs(self.store.get(other), self.users[1])
+
+
+class TestShopLogin(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _open_shop(self):
+        return Shop("Test Shop", data_dir=self.tmpdir.name, journal=True)
+
+    def test_login_upgrades_legacy_passwords(self):
+        # Users files written by older versions hold plain text passwords
+        CsvRepository(self.tmpdir.name).save([], [Client("John Doe", "1990-01-15", "C1", "secret")], [], {'users'})
+        shop = self._open_shop()
+        self.assertFalse(shop.get_client_by_id("C1").has_password_hash())
+        shop.add_admin(Admin("Admin User", "1980-05-30", "A1", hash_password("admin")))
+        self.assertIsNone(shop.login("C1", "wrong"))
+        self.assertIsNone(shop.login("C9", "secret"))
+
+        token = shop.login("C1", "secret")
+        self.assertEqual(shop.session_user(token).user_id, "C1")
+        self.assertTrue(shop.get_client_by_id("C1").has_password_hash())
+        self.assertEqual(shop.session_user(shop.login("A1", "admin")).user_id, "A1")
+        shop.close()
+
+        reloaded = self._open_shop()
+        self.assertTrue(reloaded.get_client_by_id("C1").has_password_hash())
+        self.assertIsNotNone(reloaded.login("C1", "secret"))
+        reloaded.save_data()
+        self.assertTrue(Shop("Test Shop", data_dir=self.tmpdir.name).get_client_by_id("C1").has_password_hash())
+
+    def test_added_users_never_store_plain_text(self):
+        shop = self._open_shop()
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", "plain-secret"))
+        shop.add_admin(Admin("Admin User", "1980-05-30", "A1", "plain-admin"))
+        self.assertTrue(shop.get_client_by_id("C1").has_password_hash())
+        self.assertIsNotNone(shop.login("A1", "plain-admin"))
+        shop.close()
+        for name in os.listdir(self.tmpdir.name):
+            with open(os.path.join(self.tmpdir.name, name), 'rb') as f:
+                content = f.read()
+            self.assertNotIn(b"plain-secret", content)
+            self.assertNotIn(b"plain-admin", content)
+        self.assertIsNotNone(self._open_shop().login("C1", "plain-secret"))
+
+    def test_password_change_and_removal_end_sessions(self):
+        shop = self._open_shop()
+        shop.add_client(Client("John Doe", "1990-01-15", "C1", hash_password("secret")))
+        token = shop.login("C1", "secret")
+        self.assertTrue(shop.set_user_password("C1", "new"))
+        self.assertIsNone(shop.session_user(token))
+        self.assertIsNone(shop.login("C1", "secret"))
+
+        token = shop.login("C1", "new")
+        self.assertTrue(shop.logout(token))
+        self.assertIsNone(shop.session_user(token))
+        token = shop.login("C1", "new")
+        shop.remove_client("C1")
+        self.assertIsNone(shop.session_user(token))
+        self.assertFalse(shop.set_user_password("C1", "other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,351 @@
+import unittest
+import os
+import sys
+import tempfile
+import csv
+from unittest import mock
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.admin import Admin
+from models.rental import Rental
+from models.shop import Shop
+from models.sqlite_repository import SqliteRepository
+from models.due_date_index import DueDateIndex
+
+class TestShop(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.shop = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self.car = Car("V1", "Toyota", "Corolla", 2018, 40.0, 5)
+        self.motorbike = Motorbike("V2", "Honda", "CBR", 2020, 25.0, 600)
+        self.truck = Truck("V3", "Volvo", "FH16", 2015, 120.0, 18)
+        for vehicle in (self.car, self.motorbike, self.truck):
+            self.shop.add_vehicle(vehicle)
+        self.client = Client("John Doe", "1990-01-15", "C1", "secret")
+        self.shop.add_client(self.client)
+        self.admin = Admin("Admin User", "1980-05-30", "A1", "admin")
+        self.shop.add_admin(self.admin)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_registry_lookups(self):
+        self.assertIs(self.shop.get_vehicle_by_id("V2"), self.motorbike)
+        self.assertIs(self.shop.get_client_by_id("C1"), self.client)
+        self.assertIs(self.shop.get_admin_by_id("A1"), self.admin)
+        self.assertIsNone(self.shop.get_vehicle_by_id("missing"))
+
+        rental = self.shop.create_rental("V1", "C1")
+        self.assertIs(self.shop.get_rental_by_id(rental.rental_id), rental)
+
+    def test_duplicate_ids_rejected(self):
+        self.assertFalse(self.shop.add_vehicle(Car("V1", "Seat", "Ibiza", 2019, 30.0, 3)))
+        self.assertFalse(self.shop.add_client(Client("Other", "1991-01-01", "C1", "pw")))
+        self.assertFalse(self.shop.add_admin(Admin("Other", "1981-01-01", "A1", "pw")))
+        self.assertEqual(len(self.shop.vehicles), 3)
+        self.assertEqual(len(self.shop.clients), 1)
+        self.assertEqual(len(self.shop.admins), 1)
+
+    def test_remove_keeps_registry_in_sync(self):
+        self.assertTrue(self.shop.remove_vehicle("V3"))
+        self.assertIsNone(self.shop.get_vehicle_by_id("V3"))
+        self.assertNotIn(self.truck, self.shop.vehicles)
+        self.assertTrue(self.shop.add_vehicle(self.truck))
+
+        self.assertTrue(self.shop.remove_admin("A1"))
+        self.assertIsNone(self.shop.get_admin_by_id("A1"))
+        self.assertFalse(self.shop.remove_admin("A1"))
+
+        self.assertTrue(self.shop.remove_client("C1"))
+        self.assertIsNone(self.shop.get_client_by_id("C1"))
+        self.assertEqual(self.shop.clients, [])
+
+    def test_active_rental_index(self):
+        rental = self.shop.create_rental("V1", "C1")
+        self.assertFalse(self.shop.is_vehicle_available("V1"))
+        self.assertIsNone(self.shop.create_rental("V1", "C1"))
+        self.assertEqual(self.shop.get_available_vehicles(), [self.motorbike, self.truck])
+        self.assertEqual(self.shop.get_client_active_rentals("C1"), [rental])
+        self.assertFalse(self.shop.remove_vehicle("V1"))
+        self.assertFalse(self.shop.remove_client("C1"))
+
+        self.assertTrue(self.shop.end_rental(rental.rental_id, 15200))
+        self.assertTrue(self.shop.is_vehicle_available("V1"))
+        self.assertEqual(self.shop.get_active_rentals(), [])
+        self.assertEqual(self.shop.get_client_active_rentals("C1"), [])
+        self.assertEqual(len(self.shop.get_available_vehicles()), 3)
+
+    def test_active_index_rebuilt_on_load(self):
+        open_rental = self.shop.create_rental("V1", "C1")
+        closed_rental = self.shop.create_rental("V2", "C1")
+        self.shop.end_rental(closed_rental.rental_id, 100)
+        Rental.save_rentals_to_csv(self.shop.rentals, os.path.join(self.tmpdir.name, "rentals.csv"))
+
+        reloaded = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self.assertEqual([r.rental_id for r in reloaded.get_active_rentals()], [open_rental.rental_id])
+        self.assertFalse(reloaded.is_vehicle_available("V1"))
+        self.assertTrue(reloaded.is_vehicle_available("V2"))
+
+    def test_rental_history_ordered_by_start_date(self):
+        late = self.shop.create_rental("V1", "C1", start_date="2024-03-01")
+        self.shop.end_rental(late.rental_id, 100)
+        early = self.shop.create_rental("V1", "C1", start_date="2024-01-01")
+        other = self.shop.create_rental("V2", "C1", start_date="2024-02-01")
+
+        self.assertEqual(self.shop.get_vehicle_rentals("V1"), [early, late])
+        self.assertEqual(self.shop.get_client_rentals("C1"), [early, other, late])
+        self.assertEqual(self.shop.get_client_rentals("C404"), [])
+
+    def test_vehicle_rentals_between(self):
+        rentals = [
+            Rental("R1", "C1", "V1", "2024-01-01", "2024-01-05"),
+            Rental("R2", "C1", "V1", "2024-01-10", "2024-01-20"),
+            Rental("R3", "C1", "V1", "2024-02-01", "2024-02-03"),
+            Rental("R4", "C1", "V2", "2024-01-12", "2024-01-14"),
+        ]
+        Rental.save_rentals_to_csv(rentals, os.path.join(self.tmpdir.name, "rentals.csv"))
+        shop = Shop("Test Shop", data_dir=self.tmpdir.name)
+
+        ids = lambda result: [r.rental_id for r in result]
+        self.assertEqual(ids(shop.get_vehicle_rentals_between("V1", "2024-01-15", "2024-02-01")), ["R2", "R3"])
+        self.assertEqual(ids(shop.get_vehicle_rentals_between("V1", "2024-01-06", "2024-01-09")), [])
+        self.assertEqual(ids(shop.get_vehicle_rentals_between("V1", "2023-12-01", "2024-01-01")), ["R1"])
+        self.assertEqual(ids(shop.get_vehicle_rentals_between("V2", "2024-01-01", "2024-12-31")), ["R4"])
+
+    def test_vehicle_rentals_between_includes_the_last_day(self):
+        sqlite_shop = Shop("Test Shop", repository=SqliteRepository(os.path.join(self.tmpdir.name, "shop.db")))
+        self.addCleanup(sqlite_shop.close)
+        for shop in (self.shop, sqlite_shop):
+            if shop is sqlite_shop:
+                shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+                shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+            timed = shop.create_rental("V1", "C1", start_date=datetime(2024, 1, 10, 15, 30))
+            self.assertEqual([r.rental_id for r in shop.get_vehicle_rentals_between("V1", "2024-01-10", "2024-01-10")],
+                             [timed.rental_id])
+            self.assertEqual([r.rental_id for r in shop.get_vehicle_rentals_between("V1", "2024-01-01", "2024-01-09")],
+                             [])
+            shop.end_rental(timed.rental_id, timed.initial_mileage + 10)
+
+            today = datetime.now().strftime("%Y-%m-%d")
+            current = shop.create_rental("V1", "C1")
+            self.assertIn(current.rental_id, [r.rental_id for r in shop.get_vehicle_rentals_between("V1", today, today)])
+
+    def test_vehicles_needing_itv(self):
+        as_of = date(2025, 12, 20)
+        self.car.update_info(matriculation_date="2022-01-05")        # first ITV after 4 years
+        self.motorbike.update_info(matriculation_date="2021-01-10")  # first ITV after 5 years
+        self.truck.update_info(matriculation_date="2010-03-01")      # half-yearly, already past
+
+        due = self.shop.get_vehicles_needing_itv(30, as_of=as_of)
+        self.assertEqual(due, [(self.car, 16), (self.motorbike, 21)])
+        for vehicle, days in due:
+            self.assertEqual((vehicle.next_itv_date(as_of) - as_of).days, days)
+
+        self.car.update_info(matriculation_date="2023-01-05")
+        self.assertEqual(self.shop.get_vehicles_needing_itv(30, as_of=as_of), [(self.motorbike, 21)])
+
+        self.shop.remove_vehicle("V2")
+        self.assertEqual(self.shop.get_vehicles_needing_itv(30, as_of=as_of), [])
+
+    def test_due_date_index_recomputes_only_expired_entries(self):
+        vehicles = []
+        for i in range(30):
+            vehicle = (Car, Motorbike, Truck)[i % 3](f"X{i}", "Brand", "Model", 2010, 50.0, 5)
+            vehicle.matriculation_date = f"{2005 + i % 15}-{1 + i % 12:02d}-{1 + i % 28:02d}"
+            vehicles.append(vehicle)
+        calls = []
+
+        def next_itv(vehicle, as_of):
+            calls.append(vehicle.vehicle_id)
+            return vehicle.next_itv_date(as_of)
+
+        index = DueDateIndex(next_itv, lambda vehicle, as_of: vehicle.next_itv_date_valid_until(as_of))
+        index.reset(vehicles)
+        days = [date(2025, 3, 1) + timedelta(days=n) for n in (0, 0, 1, 40, 200, 320, 400, 10)]
+        for as_of in days:
+            expected = sorted(((v.next_itv_date(as_of) - as_of).days, v.vehicle_id) for v in vehicles
+                              if 0 <= (v.next_itv_date(as_of) - as_of).days <= 90)
+            self.assertEqual([(days_left, v.vehicle_id) for v, days_left in index.due_within(90, as_of)], expected)
+
+        # Repeating a day costs nothing, and later in the year only trucks are recomputed
+        calls.clear()
+        index.due_within(90, days[-1])
+        self.assertEqual(calls, [])
+        index.due_within(90, days[-1] + timedelta(days=1))
+        self.assertTrue(calls)
+        self.assertEqual({type(v) for v in vehicles if v.vehicle_id in calls}, {Truck})
+
+    def test_due_date_index_handles_leap_day_trucks(self):
+        self.truck.update_info(matriculation_date="2012-02-29")
+        as_of = date(2025, 3, 1)
+        self.assertEqual(self.truck.next_itv_date_valid_until(as_of), date(2026, 1, 1))
+        self.assertEqual(self.truck.next_itv_date_valid_until(date(2025, 2, 10)), date(2025, 3, 1))
+        self.assertEqual(self.truck.next_itv_date_valid_until(date(2024, 2, 10)), date(2024, 2, 29))
+
+        index = DueDateIndex(lambda v, day: v.next_itv_date(day), lambda v, day: v.next_itv_date_valid_until(day))
+        index.reset([self.truck])
+        self.assertEqual(index.due_within(200, as_of), [(self.truck, (date(2025, 8, 29) - as_of).days)])
+        self.assertEqual(self.shop.get_vehicles_needing_itv(200, as_of=as_of),
+                         [(self.truck, (date(2025, 8, 29) - as_of).days)])
+
+    def test_vehicles_needing_maintenance(self):
+        as_of = date(2025, 5, 1)
+        self.car.update_info(matriculation_date="2021-05-10")
+        self.motorbike.update_info(matriculation_date="2020-05-20")
+
+        self.assertEqual(self.shop.get_vehicles_needing_maintenance(60, as_of=as_of), [(self.truck, 60)])
+        self.assertEqual(self.shop.get_vehicles_needing_maintenance(59, as_of=as_of), [])
+
+    def _data_file(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_save_rewrites_only_dirty_files(self):
+        self.shop.save_data(force=True)
+        for name in ("vehicles.csv", "users.csv", "rentals.csv"):
+            self.assertTrue(os.path.exists(self._data_file(name)))
+        os.remove(self._data_file("vehicles.csv"))
+        os.remove(self._data_file("users.csv"))
+
+        self.shop.create_rental("V1", "C1")
+        self.shop.save_data()
+        self.assertFalse(os.path.exists(self._data_file("vehicles.csv")))
+        self.assertFalse(os.path.exists(self._data_file("users.csv")))
+        with open(self._data_file("rentals.csv"), newline='') as csvfile:
+            self.assertEqual(len(list(csv.DictReader(csvfile))), 1)
+
+        self.car.update_info(color="Blue")
+        self.shop.save_data()
+        self.assertTrue(os.path.exists(self._data_file("vehicles.csv")))
+        self.assertFalse(os.path.exists(self._data_file("users.csv")))
+
+    def test_csv_rows_match_to_dict(self):
+        rental = self.shop.create_rental("V1", "C1", start_date="2024-01-01")
+        self.shop.end_rental(rental.rental_id, 100)
+        self.shop.create_rental("V2", "C1", start_date="2024-02-01")
+        self.shop.save_data()
+
+        expected = {
+            "vehicles.csv": [v.to_dict() for v in self.shop.vehicles],
+            "users.csv": [dict(u.to_dict(), type=type(u).__name__) for u in self.shop.clients + self.shop.admins],
+            "rentals.csv": [r.to_dict() for r in self.shop.rentals],
+        }
+        for name, records in expected.items():
+            with open(self._data_file(name), newline='') as csvfile:
+                rows = list(csv.DictReader(csvfile))
+            self.assertEqual(len(rows), len(records))
+            for row, record in zip(rows, records):
+                for field, value in record.items():
+                    self.assertEqual(row[field], "" if value is None else str(value), (name, field))
+
+    def test_failed_save_keeps_previous_file(self):
+        self.shop.save_data(force=True)
+        with open(self._data_file("rentals.csv")) as csvfile:
+            before = csvfile.read()
+
+        self.shop.create_rental("V1", "C1")
+        with mock.patch.object(Rental, "to_csv_row", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.shop.save_data()
+        with open(self._data_file("rentals.csv")) as csvfile:
+            self.assertEqual(csvfile.read(), before)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)),
+                         ["rentals.csv", "reservations.csv", "users.csv", "vehicles.csv"])
+
+    def test_streaming_history_queries(self):
+        rentals = [
+            Rental("R1", "C1", "V1", "2024-01-01", "2024-01-05"),
+            Rental("R2", "C2", "V2", "2024-01-10", "2024-01-12"),
+            Rental("R3", "C1", "V1", "2024-02-01", "2024-02-03"),
+            Rental("R4", "C1", "V3", "2024-02-10"),
+        ]
+        Rental.save_rentals_to_csv(rentals, self._data_file("rentals.csv"))
+
+        history = self.shop.iter_rental_history(client_id="C1")
+        self.assertEqual(next(history).rental_id, "R1")
+        history.close()
+
+        ids = [r.rental_id for r in self.shop.iter_rental_history(vehicle_id="V1", start_date="2024-01-15")]
+        self.assertEqual(ids, ["R3"])
+        self.assertEqual(self.shop.count_rentals_by_client(), {"C1": 3, "C2": 1})
+        self.assertEqual(self.shop.revenue_by_month(), {"2024-01": 4 * 40.0 + 2 * 25.0, "2024-02": 2 * 40.0})
+
+        only_short = Rental.iter_rentals_from_csv(self._data_file("rentals.csv"),
+                                                  filter=lambda r: r.calculate_duration() <= 2)
+        self.assertEqual([r.rental_id for r in only_short], ["R2", "R3"])
+
+    def test_bulk_rentals_are_all_or_nothing(self):
+        self.shop.add_client(Client("Jane Roe", "1985-03-10", "C2", "secret"))
+        self.shop.create_rental("V3", "C2", start_date="2024-01-01")
+
+        rentals, failures = self.shop.create_rentals_bulk(
+            [("V1", "C1"), ("V1", "C2"), ("V3", "C1"), ("V9", "C1"), ("V2", "C9")])
+        self.assertEqual(rentals, [])
+        self.assertEqual(sorted(failures), [1, 2, 3, 4])
+        self.assertTrue(self.shop.is_vehicle_available("V1"))
+        self.assertEqual(len(self.shop.rentals), 1)
+
+        rentals, failures = self.shop.create_rentals_bulk([("V1", "C1"), ("V2", "C2")], start_date="2024-02-01")
+        self.assertEqual(failures, {})
+        self.assertEqual([(r.vehicle_id, r.client_username) for r in rentals], [("V1", "C1"), ("V2", "C2")])
+        self.assertEqual(len(self.shop.get_active_rentals()), 3)
+        self.assertEqual([r.rental_id for r in self.shop.get_client_rentals("C2")][-1], rentals[1].rental_id)
+
+        first, second = rentals
+        returned, failures = self.shop.end_rentals_bulk(
+            [(first.rental_id, 500), (second.rental_id, -1), (first.rental_id, 600), ("missing", 1)])
+        self.assertEqual(returned, [])
+        self.assertEqual(sorted(failures), [1, 2, 3])
+        self.assertTrue(first.is_active())
+        self.assertIsNone(first.final_mileage)
+
+        returned, failures = self.shop.end_rentals_bulk([(first.rental_id, 500), (second.rental_id, 700)])
+        self.assertEqual((returned, failures), ([first, second], {}))
+        self.assertEqual((self.car.mileage, self.motorbike.mileage), (500, 700))
+        self.assertTrue(self.shop.is_vehicle_available("V1"))
+        self.assertEqual([r.vehicle_id for r in self.shop.get_active_rentals()], ["V3"])
+
+    def test_returns_free_the_rental_limit(self):
+        for _ in range(Client.MAX_ACTIVE_RENTALS + 2):
+            rental = self.shop.create_rental("V1", "C1")
+            self.assertIsNotNone(rental)
+            self.assertEqual(self.client.active_rental_count, 1)
+            self.assertTrue(self.shop.end_rental(rental.rental_id, 100))
+            self.assertEqual(self.client.active_rental_count, 0)
+        self.assertIsNotNone(self.shop.create_rental("V2", "C1"))
+
+    def test_client_rental_limit(self):
+        for i in range(4, 9):
+            self.shop.add_vehicle(Car(f"V{i}", "Seat", "Ibiza", 2020, 30.0, 5))
+        rentals = [self.shop.create_rental(f"V{i}", "C1") for i in range(1, 4)]
+        self.assertEqual(self.client.active_rental_count, 3)
+        self.assertIsNone(self.shop.create_rental("V4", "C1"))
+
+        self.shop.end_rental(rentals[0].rental_id, 100)
+        self.assertEqual(self.client.active_rental_count, 2)
+        # The batch counts its own rentals against the limit
+        rentals, failures = self.shop.create_rentals_bulk([("V4", "C1"), ("V5", "C1")])
+        self.assertEqual((rentals, list(failures)), ([], [1]))
+
+        # A corporate account with a higher limit, kept across saves
+        self.assertTrue(self.shop.set_client_rental_limit("C1", 5))
+        rentals, failures = self.shop.create_rentals_bulk([("V4", "C1"), ("V5", "C1"), ("V6", "C1")])
+        self.assertEqual((len(rentals), failures), (3, {}))
+        self.assertIsNone(self.shop.create_rental("V7", "C1"))
+        self.shop.save_data()
+        reloaded = Shop("Test Shop", data_dir=self.tmpdir.name).get_client_by_id("C1")
+        self.assertEqual((reloaded.rental_limit, reloaded.active_rental_count), (5, 5))
+
+        with self.assertRaises(ValueError):
+            self.shop.set_client_rental_limit("C1", -1)
+        self.assertFalse(self.shop.set_client_rental_limit("C9", 5))
+        self.assertTrue(self.shop.set_client_rental_limit("C1", None))
+        self.assertEqual(self.client.max_active_rentals, Client.MAX_ACTIVE_RENTALS)
+
+if __name__ == "__main__":
+    unittest.main()
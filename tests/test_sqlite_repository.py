@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.client import Client
+from models.admin import Admin
+from models.shop import Shop
+from models.sqlite_repository import SqliteRepository
+
+class TestSqliteRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "shop.db")
+        self.shop = self._open_shop()
+        self.shop.add_vehicle(Car("V1", "Toyota", "Corolla", 2018, 40.0, 5))
+        self.shop.add_vehicle(Motorbike("V2", "Honda", "CBR", 2020, 25.0, 600))
+        self.shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        self.shop.add_admin(Admin("Admin User", "1980-05-30", "A1", "admin"))
+
+    def tearDown(self):
+        self.shop.close()
+        self.tmpdir.cleanup()
+
+    def _open_shop(self):
+        return Shop("Test Shop", repository=SqliteRepository(self.db_path))
+
+    def _reopen(self):
+        self.shop.close()
+        self.shop = self._open_shop()
+        return self.shop
+
+    def test_mutations_are_written_through(self):
+        first = self.shop.create_rental("V1", "C1", start_date="2024-01-01")
+        self.shop.end_rental(first.rental_id, 15200)
+        second = self.shop.create_rental("V2", "C1", start_date="2024-02-01")
+        self.shop.get_vehicle_by_id("V2").update_info(color="Red")
+        self.shop.remove_admin("A1")
+        self.shop.set_client_rental_limit("C1", 10)
+
+        shop = self._reopen()
+        self.assertEqual(sorted(v.vehicle_id for v in shop.vehicles), ["V1", "V2"])
+        self.assertEqual(shop.get_vehicle_by_id("V1").mileage, 15200)
+        self.assertEqual(shop.get_vehicle_by_id("V2").color, "Red")
+        self.assertIsNone(shop.get_admin_by_id("A1"))
+        self.assertEqual(shop.get_client_by_id("C1").rental_limit, 10)
+        # Only the open rental is loaded into memory
+        self.assertEqual([r.rental_id for r in shop.rentals], [second.rental_id])
+        self.assertFalse(shop.is_vehicle_available("V2"))
+        self.assertEqual(shop.get_rental_by_id(first.rental_id).final_mileage, 15200)
+
+    def test_history_queries_run_in_database(self):
+        first = self.shop.create_rental("V1", "C1", start_date="2024-01-01")
+        self.shop.end_rental(first.rental_id, 100)
+        second = self.shop.create_rental("V2", "C1", start_date="2024-02-01")
+
+        shop = self._reopen()
+        ids = lambda rentals: [r.rental_id for r in rentals]
+        self.assertEqual(ids(shop.get_client_rentals("C1")), [first.rental_id, second.rental_id])
+        self.assertEqual(ids(shop.get_vehicle_rentals("V1")), [first.rental_id])
+        self.assertIs(shop.get_client_rentals("C1")[1], shop.get_rental_by_id(second.rental_id))
+        self.assertEqual(ids(shop.get_vehicle_rentals_between("V2", "2024-03-01", "2024-03-31")), [second.rental_id])
+        self.assertEqual(ids(shop.iter_rental_history(start_date="2024-01-15")), [second.rental_id])
+
+    def test_database_rejects_double_booking(self):
+        self.shop.create_rental("V1", "C1")
+        repository = self.shop.repository
+        with self.assertRaises(sqlite3.IntegrityError):
+            repository.record('create_rental', {'rental_id': 'R-dup', 'client_username': 'C1',
+                                                'vehicle_id': 'V1', 'start_date': '2024-01-01'})
+
+    def test_failed_write_leaves_memory_unchanged(self):
+        rental = self.shop.create_rental("V1", "C1")
+        self.shop.repository.record('end_rental', {'rental_id': rental.rental_id, 'final_mileage': 10,
+                                                   'return_date': '2024-01-02'})
+        with self.assertRaises(ValueError):
+            self.shop.end_rental(rental.rental_id, 20)
+        self.assertTrue(rental.is_active())
+        self.assertIsNone(rental.final_mileage)
+        self.assertFalse(self.shop.is_vehicle_available("V1"))
+
+    def test_bulk_operations_are_one_transaction(self):
+        rentals, _ = self.shop.create_rentals_bulk([("V1", "C1"), ("V2", "C1")], start_date="2024-01-01")
+        self.shop.repository.record('end_rental', {'rental_id': rentals[1].rental_id, 'final_mileage': 10,
+                                                   'return_date': '2024-01-02'})
+        with self.assertRaises(ValueError):
+            self.shop.end_rentals_bulk([(rentals[0].rental_id, 20), (rentals[1].rental_id, 20)])
+        self.assertTrue(all(r.is_active() for r in rentals))
+
+        shop = self._reopen()
+        self.assertEqual(shop.get_vehicle_by_id("V1").mileage, 0)
+        self.assertEqual([r.rental_id for r in shop.get_active_rentals()], [rentals[0].rental_id])
+
+    def test_adds_columns_to_older_databases(self):
+        self.shop.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("ALTER TABLE users DROP COLUMN rental_limit")
+        conn.commit()
+        conn.close()
+
+        shop = self._reopen()
+        self.assertIsNone(shop.get_client_by_id("C1").rental_limit)
+        self.assertTrue(shop.set_client_rental_limit("C1", 4))
+        self.assertEqual(self._reopen().get_client_by_id("C1").rental_limit, 4)
+
+if __name__ == "__main__":
+    unittest.main()
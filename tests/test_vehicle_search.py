@@ -0,0 +1,90 @@
+import unittest
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.car import Car
+from models.motorbike import Motorbike
+from models.truck import Truck
+from models.client import Client
+from models.shop import Shop
+
+class TestVehicleSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.shop = Shop("Test Shop", data_dir=self.tmpdir.name)
+        self.shop.add_client(Client("John Doe", "1990-01-15", "C1", "secret"))
+        rnd = random.Random(7)
+        brands = {Car: ["Toyota", "Seat", "BMW"], Motorbike: ["Honda", "BMW"], Truck: ["Volvo", "MAN"]}
+        extra = {Car: 5, Motorbike: 600, Truck: 18}
+        for i in range(60):
+            vehicle_class = rnd.choice([Car, Motorbike, Truck])
+            self.shop.add_vehicle(vehicle_class(f"V{i}", rnd.choice(brands[vehicle_class]), "Model",
+                                                rnd.randint(2005, 2024), float(rnd.randint(20, 150)),
+                                                extra[vehicle_class]))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _scan(self, vehicle_type=None, brand=None, min_rate=None, max_rate=None, min_year=None, max_year=None,
+              available=None):
+        return [v for v in self.shop.vehicles
+                if (vehicle_type is None or v.type == vehicle_type)
+                and (brand is None or v.brand.lower() == brand.lower())
+                and (min_rate is None or v.daily_rate >= min_rate)
+                and (max_rate is None or v.daily_rate <= max_rate)
+                and (min_year is None or v.year >= min_year)
+                and (max_year is None or v.year <= max_year)
+                and (available is None or self.shop.is_vehicle_available(v.vehicle_id) == available)]
+
+    def _check(self, **criteria):
+        expected = sorted(self._scan(**criteria), key=lambda v: (v.daily_rate, v.vehicle_id))
+        found = self.shop.search_vehicles(**criteria)
+        self.assertEqual([(v.daily_rate, v.vehicle_id) for v in found],
+                         [(v.daily_rate, v.vehicle_id) for v in expected], criteria)
+
+    def test_search_matches_full_scan(self):
+        self.shop.create_rental("V1", "C1")
+        self.shop.create_rental("V2", "C1")
+        for criteria in ({}, {'vehicle_type': 'Car'}, {'brand': 'bmw'}, {'brand': 'BMW', 'vehicle_type': 'Motorbike'},
+                         {'min_rate': 50, 'max_rate': 90}, {'max_rate': 30, 'vehicle_type': 'Truck'},
+                         {'min_year': 2015, 'max_year': 2020, 'brand': 'Toyota'}, {'available': False},
+                         {'available': True, 'min_rate': 100}, {'brand': 'Ferrari'}, {'vehicle_type': 'Boat'}):
+            self._check(**criteria)
+
+    def test_sort_and_limit(self):
+        cheapest = self.shop.search_vehicles(vehicle_type='Car', limit=3)
+        self.assertEqual(cheapest, sorted(self._scan(vehicle_type='Car'), key=lambda v: v.daily_rate)[:3])
+        priciest = self.shop.search_vehicles(max_rate=100, descending=True, limit=2)
+        self.assertEqual([v.daily_rate for v in priciest],
+                         sorted((v.daily_rate for v in self._scan(max_rate=100)), reverse=True)[:2])
+        newest = self.shop.search_vehicles(brand='Volvo', sort_by='year', descending=True)
+        self.assertEqual([v.year for v in newest], sorted((v.year for v in self._scan(brand='Volvo')), reverse=True))
+        self.assertEqual(self.shop.search_vehicles(limit=0), [])
+        with self.assertRaises(ValueError):
+            self.shop.search_vehicles(sort_by='color')
+
+    def test_indexes_follow_updates(self):
+        vehicle = self.shop.get_vehicle_by_id("V0")
+        vehicle.update_info(brand="Lancia", daily_rate=999.0)
+        self.assertEqual(self.shop.search_vehicles(brand="lancia"), [vehicle])
+        self.assertEqual(self.shop.search_vehicles(min_rate=500), [vehicle])
+        self._check(max_rate=200)
+
+        self.shop.remove_vehicle("V0")
+        self.assertEqual(self.shop.search_vehicles(brand="Lancia"), [])
+        self.assertNotIn(vehicle, self.shop.get_vehicles_by_type(vehicle.type))
+
+        self.shop.add_vehicle(Car("V100", "Lancia", "Ypsilon", 2022, 35.0, 5))
+        self.assertEqual([v.vehicle_id for v in self.shop.search_vehicles(brand="LANCIA")], ["V100"])
+        self.assertEqual(self.shop.get_vehicles_by_type('Car')[-1].vehicle_id, "V100")
+
+        with self.assertRaises(ValueError):
+            vehicle.update_info(daily_rate=-5)
+
+
+if __name__ == "__main__":
+    unittest.main()